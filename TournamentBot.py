@@ -32,29 +32,169 @@ intents.message_content = True
 intents.members = True
 intents.guilds = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+# LAZY_MEMBER_CHUNKING=1 skips downloading every member list at startup;
+# members are then resolved on demand through member_cache
+from member_cache import member_cache, LAZY_MEMBER_CHUNKING
+
+# SHARD_COUNT / CLUSTER_* select sharded and multi-process mode (see cluster.py)
+from cluster import cluster, invalidation_bus
+from registration_journal import registration_journal
+from registration_records import registration_store, withdraw_member
+from strength_index import strength_index
+
+if cluster.sharded:
+    bot = commands.AutoShardedBot(
+        command_prefix="!",
+        intents=intents,
+        chunk_guilds_at_startup=not LAZY_MEMBER_CHUNKING,
+        shard_count=cluster.shard_count,
+        shard_ids=list(cluster.shard_ids) if cluster.shard_ids is not None else None
+    )
+else:
+    bot = commands.Bot(
+        command_prefix="!",
+        intents=intents,
+        chunk_guilds_at_startup=not LAZY_MEMBER_CHUNKING
+    )
 
 # ============================================================================
 # BOT EVENTS
 # ============================================================================
 
+# (module, view class) pairs restored at startup; each is registered on its own
+PERSISTENT_VIEWS = (
+    ('views', 'RegistrationTypeView'),
+    ('views', 'ParticipantRegistrationMethodView'),
+    ('views', 'AdvancedRegistrationView'),
+    ('views', 'AdvancedRegistrationConfirmView'),
+    ('approval_views', 'PersistentDivisionView'),
+    ('approval_views', 'ExportSettingsView'),
+    ('dashboard_views', 'TournamentDashboardView'),
+    ('browser_approval_handler', 'BrowserApprovalView'),  # Browser approval buttons
+    ('pending_queue', 'PendingQueueView'),                # Moderator queue Prev/Next
+)
+
+
+def register_persistent_views() -> int:
+    """Register persistent views so they work after bot restarts (once per process)
+
+    A view whose module is missing or broken is skipped with a warning, so
+    it cannot keep the others from being registered. Returns how many were.
+    """
+    import importlib
+    
+    registered = 0
+    for module_name, class_name in PERSISTENT_VIEWS:
+        try:
+            view_class = getattr(importlib.import_module(module_name), class_name)
+            bot.add_view(view_class())
+            registered += 1
+        except Exception as e:
+            print(f"⚠️ Could not register {module_name}.{class_name}: {e}")
+    return registered
+
+
+async def setup_hook():
+    """One-shot startup pipeline; runs once after login, never again on reconnects"""
+    from async_database import async_db
+    from startup import StartupReport, sync_if_changed
+    
+    report = StartupReport()
+    
+    # Database init and cog loading don't depend on each other
+    async def init_database():
+        with report.phase("database"):
+            await async_db.init_db()
+        print("✅ Database initialized")
+    
+    async def load_all_cogs():
+        with report.phase("cogs"):
+            await load_cogs()
+    
+    await asyncio.gather(init_database(), load_all_cogs())
+    
+    with report.phase("persistent views"):
+        registered = register_persistent_views()
+        print(f"✅ {registered}/{len(PERSISTENT_VIEWS)} persistent views registered")
+    
+    with report.phase("cluster"):
+        # Keep the whole bot under Discord's global limit across processes
+        from outbox import outbox, GLOBAL_LIMIT
+        from snapshots import snapshot_store
+        outbox.global_limiter.limit = cluster.request_share(GLOBAL_LIMIT[0])
+        invalidation_bus.subscribe('guild', snapshot_store.invalidate)
+        invalidation_bus.subscribe('guild', strength_index.unload_guild)
+        await invalidation_bus.start()
+        if cluster.cluster_count > 1:
+            print(f"✅ Cluster {cluster.cluster_id}/{cluster.cluster_count} "
+                  f"owns shard(s) {list(cluster.shard_ids or [])}")
+    
+    with report.phase("journal"):
+        # Append-only event log; undecided registrations survive a restart
+        from registration_journal import journal_path
+        events = registration_journal.open(journal_path(cluster))
+        restored = registration_journal.restore_pending(registration_store)
+        registration_journal.start()
+        print(f"✅ Registration journal: {events} event(s), {restored} pending restored")
+    
+    with report.phase("metrics"):
+        from stats_commands import register_gauges
+        from metrics import loop_lag
+        register_gauges(bot)
+        loop_lag.start()
+    
+    with report.phase("session store"):
+        # Bounded, TTL-evicting store for in-progress registrations
+        try:
+            import registration_modals
+            import session_store
+            session_store.install(registration_modals)
+            restored = session_store.registration_sessions.start_snapshots()
+            if restored:
+                print(f"✅ Restored {restored} in-progress registration(s)")
+        except Exception as e:
+            print(f"⚠️ Session store not started: {e}")
+    
+    # Start the public JSON API (cached snapshots) on the bot's event loop
+    with report.phase("web api"):
+        try:
+            import web_api
+            bot.web_api_runner = await web_api.start_web_api(bot)
+            print(f"✅ Web API started on http://localhost:{web_api.WEB_API_PORT}")
+        except Exception as e:
+            print(f"⚠️ Web API not started: {e}")
+    
+    # The dashboard is served from the same event loop (primary cluster only)
+    if cluster.is_primary:
+        with report.phase("dashboard"):
+            try:
+                import web_api
+                bot.dashboard_runner = await web_api.start_dashboard(bot)
+                print(f"✅ Web dashboard started on http://localhost:{web_api.DASHBOARD_PORT}")
+            except Exception as e:
+                print(f"⚠️ Web dashboard not started: {e}")
+    
+    # Only upload slash commands when their definitions changed
+    with report.phase("command sync"):
+        try:
+            synced = await sync_if_changed(bot)
+            if synced < 0:
+                print("✅ Slash commands unchanged, sync skipped")
+            else:
+                print(f"✅ Synced {synced} slash command(s)")
+        except Exception as e:
+            print(f"❌ Failed to sync commands: {e}")
+    
+    print(report.summary())
+
+bot.setup_hook = setup_hook
+
 @bot.event
 async def on_ready():
-    """Initialize bot when ready"""
+    """Runs on every (re)connect; one-time setup lives in setup_hook"""
     print(f"✅ {bot.user} is now online!")
     print(f"   Connected to {len(bot.guilds)} guild(s)")
     
-    # Initialize database
-    db.init_db()
-    print("✅ Database initialized")
-    
-    # Sync slash commands
-    try:
-        synced = await bot.tree.sync()
-        print(f"✅ Synced {len(synced)} slash command(s)")
-    except Exception as e:
-        print(f"❌ Failed to sync commands: {e}")
-    
     # Set bot status
     await bot.change_presence(
         activity=discord.Activity(
@@ -63,49 +203,9 @@ async def on_ready():
         )
     )
     
-    # Register persistent views so they work after bot restarts
-    try:
-        from views import (
-            RegistrationTypeView, 
-            ParticipantRegistrationMethodView,
-            AdvancedRegistrationView,
-            AdvancedRegistrationConfirmView,
-            HeroItemQuestionView,
-            HeroItemSelectView
-        )
-        from approval_views import (
-            PersistentDivisionView,
-            ExportSettingsView,
-            ParticipantApprovalView
-        )
-        from registration_modals import HeroItemLevelTriggerView
-        from dashboard_views import TournamentDashboardView
-        from browser_approval_handler import BrowserApprovalView
-        
-        # Add persistent views
-        bot.add_view(RegistrationTypeView())
-        bot.add_view(ParticipantRegistrationMethodView())
-        bot.add_view(AdvancedRegistrationView())
-        bot.add_view(AdvancedRegistrationConfirmView())
-        bot.add_view(PersistentDivisionView())
-        bot.add_view(ExportSettingsView())
-        bot.add_view(TournamentDashboardView())
-        bot.add_view(BrowserApprovalView())  # Add browser approval view
-        
-        print("✅ Persistent views registered")
-        
-    except Exception as e:
-        print(f"⚠️ Error loading persistent views: {e}")
-        import traceback
-        traceback.print_exc()
-    
-    # Start web dashboard if enabled
-    try:
-        import web_app
-        web_app.start_web_dashboard(bot)
-        print("✅ Web dashboard started on http://localhost:5000")
-    except Exception as e:
-        print(f"⚠️ Web dashboard not started: {e}")
+    if getattr(bot, 'ready_banner_shown', False) or not cluster.is_primary:
+        return
+    bot.ready_banner_shown = True
     
     print("=" * 60)
     print("🎮 Rush Royale Tournament Bot Ready!")
@@ -116,13 +216,14 @@ async def on_ready():
 async def on_guild_join(guild):
     """Handle bot joining a new guild"""
     print(f"✅ Joined new guild: {guild.name} (ID: {guild.id})")
-    
-    # Initialize tournament state for new guild
-    try:
-        db.init_db()
-        print(f"   Database initialized for {guild.name}")
-    except Exception as e:
-        print(f"   Error initializing database: {e}")
+    # The schema is created once at startup; a new guild needs no global re-init
+
+@bot.event
+async def on_raw_member_remove(payload):
+    # on_member_remove only fires for cached members, and with
+    # LAZY_MEMBER_CHUNKING most members are never cached
+    member_cache.forget(payload.guild_id, payload.user.id)
+    withdraw_member(payload.guild_id, payload.user.id)
 
 @bot.event
 async def on_command_error(ctx, error):
@@ -151,9 +252,14 @@ async def load_cogs():
         'setup_commands',           # Server setup
         'webhook_commands',         # Browser registration webhook setup
         'browser_approval_handler', # Browser registration approval buttons
+        'registration_intake',      # Browser registrations received by the bot
+        'ticket_lifecycle',         # Close, archive and delete ticket channels
+        'pending_queue',            # Paged moderator queue of pending registrations
+        'participant_export',       # Streaming roster export
+        'stats_commands',           # /botstats latency report
     ]
     
-    for cog in cogs:
+    async def load(cog):
         try:
             await bot.load_extension(cog)
             print(f"✅ Loaded cog: {cog}")
@@ -161,6 +267,9 @@ async def load_cogs():
             print(f"❌ Failed to load {cog}: {e}")
             import traceback
             traceback.print_exc()
+    
+    # The cogs don't depend on each other, so load them concurrently
+    await asyncio.gather(*(load(cog) for cog in cogs))
 
 # ============================================================================
 # MAIN BOT STARTUP
@@ -169,8 +278,7 @@ async def load_cogs():
 async def main():
     """Main bot startup sequence"""
     async with bot:
-        # Load all cogs
-        await load_cogs()
+        # Cogs, views and command sync run once in setup_hook after login
         
         # Get token from environment
         token = os.getenv('DISCORD_TOKEN')
@@ -194,7 +302,12 @@ async def main():
             return
         
         print(f"✅ Discord token found (length: {len(token)} chars)")
-        await bot.start(token)
+        try:
+            await bot.start(token)
+        finally:
+            # Keep half-finished registrations across restarts (when snapshots are enabled)
+            import session_store
+            session_store.registration_sessions.save()
 
 # ============================================================================
 # RUN THE BOT
@@ -81,6 +81,9 @@ export default async function handler(req, res) {
         fields.push({ name: "⭐ Hero Item",          value: heroItemValue,                           inline: true });
         fields.push({ name: "🃏 Deck (5 Cards)",     value: deckText,                                inline: false });
         fields.push({ name: "📊 Calculated Strength",value: strengthText,                            inline: false });
+        if (data.export_code) {
+            fields.push({ name: "📋 Export Code",   value: `\`\`\`${data.export_code}\`\`\``,      inline: false });
+        }
         
         console.log('Total fields:', fields.length);
         
@@ -0,0 +1,253 @@
+"""async_database.py - Non-blocking database access for interaction handlers"""
+
+import asyncio
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+# Worker threads that run database calls off the event loop
+DB_POOL_SIZE = 4
+
+# Write-behind batching for approval bursts
+BATCH_MAX_SIZE = 100
+BATCH_MAX_DELAY = 0.05  # seconds
+
+# Rows per page when streaming a roster
+PARTICIPANT_PAGE_SIZE = 500
+
+
+class _HalfWritten(Exception):
+    """A participant was added but its approval failed (no savepoint to undo just that row)"""
+
+    def __init__(self, error: Exception):
+        super().__init__(str(error))
+        self.error = error
+        self.index = 0
+
+
+class AsyncDatabase:
+    """Runs the blocking `database` module on a small thread pool.
+
+    Each worker thread acts as one pooled connection. If the backend exposes a
+    `transaction()` context manager, multi-statement jobs run inside it so they
+    commit once; approvals need it (or `savepoint()`) to stay all-or-nothing. Writes made through this class bump a per-guild version,
+    which caches of participant data use as their fingerprint.
+    """
+
+    def __init__(self, backend=None, pool_size: int = DB_POOL_SIZE):
+        self._backend = backend
+        self.pool_size = pool_size
+        self._executor = None
+        self._versions = {}  # guild_id -> participant writes so far
+
+    def version(self, guild_id: int) -> int:
+        return self._versions.get(guild_id, 0)
+
+    def _bump(self, guild_ids):
+        for guild_id in set(guild_ids):
+            self._versions[guild_id] = self._versions.get(guild_id, 0) + 1
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            import database
+            self._backend = database
+        return self._backend
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.pool_size,
+                thread_name_prefix="db-pool"
+            )
+        return self._executor
+
+    def _transaction(self):
+        transaction = getattr(self.backend, 'transaction', None)
+        return transaction() if transaction else contextlib.nullcontext()
+
+    def _check_atomic_writes(self):
+        # Without either, a failed approve would leave its participant added
+        # and the batch replay below would add the earlier rows twice
+        if not any(hasattr(self.backend, name) for name in ('transaction', 'savepoint')):
+            raise RuntimeError(
+                "Database backend needs transaction() or savepoint() for add-and-approve writes"
+            )
+
+    async def run(self, func, *args, **kwargs):
+        """Run one blocking database call in the pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: func(*args, **kwargs))
+
+    def _add_and_approve_row(self, row: dict):
+        """Add and approve one participant; either both writes land or neither does
+
+        Uses the backend's `savepoint()` context manager when it has one.
+        Otherwise an approve that fails after its add raises _HalfWritten, which
+        aborts (rolls back) the surrounding transaction.
+        """
+        savepoint = getattr(self.backend, 'savepoint', None)
+        if savepoint is not None:
+            with savepoint():
+                self.backend.add_participant(**row)
+                self.backend.approve_participant(row['discord_id'], row['guild_id'])
+            return
+        self.backend.add_participant(**row)
+        try:
+            self.backend.approve_participant(row['discord_id'], row['guild_id'])
+        except Exception as e:
+            raise _HalfWritten(e)
+
+    def _add_and_approve_rows(self, rows: list) -> list:
+        """Insert and approve every row in one transaction; returns per-row errors"""
+        self._check_atomic_writes()
+        errors = []
+        try:
+            with self._transaction():
+                for row in rows:
+                    try:
+                        self._add_and_approve_row(row)
+                        errors.append(None)
+                    except _HalfWritten as e:
+                        e.index = len(errors)
+                        raise
+                    except Exception as e:
+                        errors.append(e)
+            return errors
+        except _HalfWritten as e:
+            # The batch was rolled back; redo it without the row that failed halfway
+            rest = self._add_and_approve_rows(rows[:e.index] + rows[e.index + 1:])
+            return rest[:e.index] + [e.error] + rest[e.index:]
+
+    async def add_and_approve(self, participant: dict):
+        """Add a participant and mark them approved in a single pooled job"""
+        try:
+            errors = await self.run(self._add_and_approve_rows, [participant])
+        finally:
+            self._bump([participant['guild_id']])
+        if errors[0] is not None:
+            raise errors[0]
+
+    async def add_and_approve_many(self, participants: list) -> list:
+        """Add and approve many participants in one job; returns per-row errors"""
+        if not participants:
+            return []
+        try:
+            return await self.run(self._add_and_approve_rows, participants)
+        finally:
+            self._bump(p['guild_id'] for p in participants)
+
+    async def get_participants(self, guild_id: int) -> list:
+        """All participants in a guild as dicts"""
+        return await self.run(self.backend.get_participants, guild_id)
+
+    async def iter_participants(self, guild_id: int, page_size: int = PARTICIPANT_PAGE_SIZE):
+        """Yield a guild's participants one page (list of dicts) at a time
+
+        Uses keyset paging through `get_participants_page(guild_id, after_discord_id, limit)`
+        when the backend has it; older backends return everything as one page.
+        """
+        get_page = getattr(self.backend, 'get_participants_page', None)
+        if get_page is None:
+            yield await self.get_participants(guild_id)
+            return
+
+        after = 0
+        while True:
+            page = await self.run(get_page, guild_id, after, page_size)
+            if not page:
+                return
+            yield page
+            if len(page) < page_size:
+                return
+            after = page[-1]['discord_id']
+
+    def _update_strength_rows(self, guild_id: int, rows: list):
+        with self._transaction():
+            for discord_id, total_strength, division in rows:
+                self.backend.update_participant_strength(discord_id, guild_id, total_strength, division)
+
+    async def update_strengths(self, guild_id: int, rows: list):
+        """Write (discord_id, total_strength, division) rows in one transaction"""
+        try:
+            await self.run(self._update_strength_rows, guild_id, rows)
+        finally:
+            self._bump([guild_id])
+
+    async def init_db(self):
+        self._check_atomic_writes()
+        await self.run(self.backend.init_db)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+class ApprovalBatcher:
+    """Write-behind batcher that groups bursts of approvals into one commit"""
+
+    def __init__(self, database: AsyncDatabase, max_size: int = BATCH_MAX_SIZE,
+                 max_delay: float = BATCH_MAX_DELAY):
+        self.database = database
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self._queue = None
+        self._worker = None
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run(), name="approval-batcher")
+
+    async def submit(self, participant: dict):
+        """Queue an approval and wait until its batch has been committed"""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((participant, future))
+        return await future
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+
+            # Keep collecting until the batch is full or the delay has passed
+            while len(batch) < self.max_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                errors = await self.database.add_and_approve_many([row for row, _ in batch])
+            except Exception as e:
+                errors = [e] * len(batch)
+
+            for (_, future), error in zip(batch, errors):
+                if future.done():
+                    continue
+                if error is None:
+                    future.set_result(True)
+                else:
+                    future.set_exception(error)
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._worker
+            self._worker = None
+
+
+# Shared instances used by the cogs
+async_db = AsyncDatabase()
+approval_batcher = ApprovalBatcher(async_db)
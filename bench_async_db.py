@@ -0,0 +1,174 @@
+"""bench_async_db.py - Event-loop stall benchmark for approval database writes
+
+Runs 500 approvals in a row three ways and reports how long the event loop
+was blocked while they ran:
+
+    sync      db.add_participant + db.approve_participant called inline (old path)
+    async     AsyncDatabase.add_and_approve, one pooled job per approval
+    batched   ApprovalBatcher, all approvals submitted at once
+
+Usage: python bench_async_db.py [approvals]
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from async_database import AsyncDatabase, ApprovalBatcher
+
+APPROVALS = 500
+TICK = 0.001  # seconds between event-loop probes
+
+
+class SqliteBackend:
+    """Minimal stand-in with the same call shape as the bot's `database` module"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with sqlite3.connect(path) as conn:
+            conn.execute("PRAGMA journal_mode=DELETE")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS participants ("
+                "guild_id INTEGER, discord_id INTEGER, data TEXT, approved INTEGER DEFAULT 0, "
+                "PRIMARY KEY (guild_id, discord_id))"
+            )
+
+    @contextlib.contextmanager
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            yield conn
+            return
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA synchronous=FULL")
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    @contextlib.contextmanager
+    def transaction(self):
+        with self._connection() as conn:
+            self._local.conn = conn
+            try:
+                yield conn
+            finally:
+                self._local.conn = None
+
+    def init_db(self):
+        pass
+
+    def add_participant(self, guild_id, discord_id, **fields):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO participants (guild_id, discord_id, data) VALUES (?, ?, ?)",
+                (guild_id, discord_id, json.dumps(fields))
+            )
+
+    def approve_participant(self, discord_id, guild_id):
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE participants SET approved = 1 WHERE guild_id = ? AND discord_id = ?",
+                (guild_id, discord_id)
+            )
+
+
+def make_rows(count):
+    return [{
+        'guild_id': 1,
+        'discord_id': 10_000 + i,
+        'username': f"user{i}",
+        'game_username': f"Player{i}",
+        'division': 'Heavyweight',
+        'cards': [{'name': 'Dryad', 'level': '15'}] * 5,
+    } for i in range(count)]
+
+
+class LoopStallProbe:
+    """Measures event-loop lag by scheduling a short sleep over and over"""
+
+    def __init__(self):
+        self.max_stall = 0.0
+        self.total_stall = 0.0
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(TICK)
+            lag = loop.time() - start - TICK
+            if lag > 0:
+                self.total_stall += lag
+                self.max_stall = max(self.max_stall, lag)
+
+    def __enter__(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        self._task.cancel()
+
+
+async def run_sync(backend, rows):
+    for row in rows:
+        backend.add_participant(**row)
+        backend.approve_participant(row['discord_id'], row['guild_id'])
+        await asyncio.sleep(0)
+
+
+async def run_async(backend, rows):
+    database = AsyncDatabase(backend)
+    for row in rows:
+        await database.add_and_approve(row)
+    database.close()
+
+
+async def run_batched(backend, rows):
+    database = AsyncDatabase(backend)
+    batcher = ApprovalBatcher(database)
+    await asyncio.gather(*(batcher.submit(row) for row in rows))
+    await batcher.close()
+    database.close()
+
+
+async def measure(name, runner, count):
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SqliteBackend(os.path.join(tmp, "bench.db"))
+        rows = make_rows(count)
+        await asyncio.sleep(TICK * 5)
+        with LoopStallProbe() as probe:
+            start = time.perf_counter()
+            await runner(backend, rows)
+            wall = time.perf_counter() - start
+            await asyncio.sleep(TICK * 5)
+    return {
+        'mode': name,
+        'approvals': count,
+        'wall_s': round(wall, 3),
+        'max_stall_ms': round(probe.max_stall * 1000, 2),
+        'total_stall_ms': round(probe.total_stall * 1000, 2),
+    }
+
+
+async def main(count):
+    results = []
+    for name, runner in (("sync", run_sync), ("async", run_async), ("batched", run_batched)):
+        results.append(await measure(name, runner, count))
+
+    print(f"{'mode':<10}{'wall (s)':>10}{'max stall (ms)':>18}{'total stall (ms)':>20}")
+    for r in results:
+        print(f"{r['mode']:<10}{r['wall_s']:>10}{r['max_stall_ms']:>18}{r['total_stall_ms']:>20}")
+    return results
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else APPROVALS))
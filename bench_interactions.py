@@ -0,0 +1,542 @@
+"""bench_interactions.py - Offline load test for the interaction handlers
+
+Drives the real handlers with fake Interaction/Guild/Message objects. Every
+Discord call the fakes make is a real HTTP request to a local stand-in REST
+server (aiohttp) that adds latency and enforces per-route and global rate
+limits, answering 429 + Retry-After like Discord does.
+
+Scenarios, each run at 10, 100 and 1000 concurrent users:
+
+    intake    BrowserApprovalHandler.on_message parses and stores a registration
+    extract   BrowserApprovalView.extract_registration_data on a pending embed
+    approve   BrowserApprovalView.handle_approval (defer, DB write, followup)
+    card      CardSelect.callback (views.py is loaded with the names its fragment expects)
+
+Like discord.py, the fake REST client waits out 429s and retries them, so
+they cost latency rather than failing the handler. For each run it reports
+throughput, p50/p99 handler latency, handler errors, the time for the outbox
+to drain the queued side effects, and event-loop stall.
+
+Usage:
+    python bench_interactions.py                 # run and compare with the saved baseline
+    python bench_interactions.py --save          # run and store the results as the baseline
+    python bench_interactions.py --users 10 100  # custom concurrency levels
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import discord
+from aiohttp import web, ClientSession
+
+from async_database import async_db
+from bench_async_db import SqliteBackend, LoopStallProbe
+from metrics import interaction_errors
+from registration_records import PENDING_TITLE, registration_store
+from outbox import outbox
+
+USER_LEVELS = (10, 100, 1000)
+BASELINE_PATH = 'bench_baselines.json'
+REGRESSION_TOLERANCE = 0.25      # 25% worse p99 / throughput counts as a regression
+
+REST_LATENCY = (0.02, 0.06)      # seconds, uniform per simulated request
+REST_MAX_TRIES = 5               # discord.py's HTTPClient gives up on a 429 after 5 tries
+GLOBAL_LIMIT = (50, 1.0)         # Discord's global requests per second
+ROUTE_LIMITS = {
+    'callback': None,            # interaction callbacks are not rate limited
+    'followup': (5, 2.0),        # per interaction token
+    'message': (5, 5.0),         # per channel
+    'role': (10, 10.0),          # per guild
+    'dm': (5, 5.0),              # DM channel open + send
+}
+
+GUILD_ID = 900_000_000_000_000_001
+CHANNEL_ID = 900_000_000_000_000_002
+MODERATOR_ID = 900_000_000_000_000_003
+
+
+# ============================================================================
+# STAND-IN REST SERVER
+# ============================================================================
+
+class _Window:
+    __slots__ = ('limit', 'per', 'hits')
+
+    def __init__(self, limit, per):
+        self.limit = limit
+        self.per = per
+        self.hits = []
+
+    def retry_after(self, now: float) -> float:
+        """0 if a request is allowed now (and records it), else seconds to wait"""
+        self.hits = [t for t in self.hits if now - t < self.per]
+        if len(self.hits) < self.limit:
+            self.hits.append(now)
+            return 0.0
+        return self.per - (now - self.hits[0])
+
+
+class StandInDiscord:
+    """Local REST server with latency and Discord-style 429s"""
+
+    def __init__(self):
+        self.global_window = _Window(*GLOBAL_LIMIT)
+        self.windows = {}
+        self.requests = 0
+        self.rate_limited = 0
+        self.runner = None
+        self.url = None
+
+    def _limited(self, route: str, major: str) -> float:
+        now = time.monotonic()
+        limit = ROUTE_LIMITS.get(route)
+        if limit is not None:
+            window = self.windows.get((route, major))
+            if window is None:
+                window = self.windows[(route, major)] = _Window(*limit)
+            wait = window.retry_after(now)
+            if wait:
+                return wait
+        return self.global_window.retry_after(now) if route != 'callback' else 0.0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        route, major = request.match_info['route'], request.match_info['major']
+        await asyncio.sleep(random.uniform(*REST_LATENCY))
+        wait = self._limited(route, major)
+        if wait:
+            self.rate_limited += 1
+            return web.json_response(
+                {'message': 'You are being rate limited.', 'retry_after': wait, 'global': False},
+                status=429, headers={'Retry-After': f'{wait:.3f}'}
+            )
+        return web.json_response({'id': str(self.requests)})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_route('*', '/{route}/{major}/{tail:.*}', self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f'http://127.0.0.1:{port}'
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+class RateLimited(discord.HTTPException):
+    """429 from the stand-in server, shaped like discord.py's exception"""
+
+    def __init__(self, retry_after: float):
+        Exception.__init__(self, f"429 Too Many Requests (retry after {retry_after:.2f}s)")
+        self.status = 429
+        self.code = 0
+        self.text = 'rate limited'
+        self.response = None
+        self.retry_after = retry_after
+
+
+class FakeRest:
+    def __init__(self, server: StandInDiscord):
+        self.server = server
+        self.session = None
+
+    async def call(self, method: str, route: str, major, tail: str = 'x'):
+        """One request; 429s are slept off and retried like discord.py's HTTPClient does"""
+        url = f'{self.server.url}/{route}/{major}/{tail}'
+        for attempt in range(1, REST_MAX_TRIES + 1):
+            async with self.session.request(method, url) as response:
+                data = await response.json()
+            if response.status != 429:
+                return data
+            if attempt == REST_MAX_TRIES:
+                raise RateLimited(data['retry_after'])
+            await asyncio.sleep(data['retry_after'])
+
+
+# ============================================================================
+# FAKE DISCORD OBJECTS
+# ============================================================================
+
+class FakeUser:
+    def __init__(self, rest: FakeRest, user_id: int):
+        self.rest = rest
+        self.id = user_id
+        self.name = f"user{user_id}"
+        self.mention = f"<@{user_id}>"
+
+    async def send(self, *args, **kwargs):
+        await self.rest.call('POST', 'dm', 'open')
+        await self.rest.call('POST', 'dm', 'send')
+
+
+class FakeMember(FakeUser):
+    def __init__(self, rest, user_id, guild):
+        super().__init__(rest, user_id)
+        self.guild = guild
+
+    async def add_roles(self, *roles):
+        await self.rest.call('PUT', 'role', self.guild.id)
+
+
+class FakeRole:
+    def __init__(self, name):
+        self.id = hash(name)
+        self.name = name
+
+
+class FakePartialMessage:
+    def __init__(self, channel, message_id):
+        self.channel = channel
+        self.id = message_id
+
+    async def edit(self, **kwargs):
+        await self.channel.rest.call('PATCH', 'message', self.channel.id, str(self.id))
+
+
+class FakeChannel:
+    def __init__(self, rest, channel_id):
+        self.rest = rest
+        self.id = channel_id
+        self.messages = {}
+
+    def get_partial_message(self, message_id):
+        return FakePartialMessage(self, message_id)
+
+    async def fetch_message(self, message_id):
+        await self.rest.call('GET', 'message', self.id, str(message_id))
+        return self.messages[message_id]
+
+
+class FakeGuild:
+    def __init__(self, rest, guild_id, channel):
+        self.rest = rest
+        self.id = guild_id
+        self.name = "Bench Guild"
+        self.roles = [FakeRole("Participant")]
+        self.channel = channel
+        self._members = {}
+
+    def get_member(self, user_id):
+        member = self._members.get(user_id)
+        if member is None:
+            member = self._members[user_id] = FakeMember(self.rest, user_id, self)
+        return member
+
+    def get_channel(self, channel_id):
+        return self.channel if channel_id == self.channel.id else None
+
+
+class FakeClient:
+    def __init__(self, rest, bot_id):
+        self.rest = rest
+        self.user = FakeUser(rest, bot_id)
+        self._users = {}
+
+    def get_user(self, user_id):
+        user = self._users.get(user_id)
+        if user is None:
+            user = self._users[user_id] = FakeUser(self.rest, user_id)
+        return user
+
+    async def fetch_user(self, user_id):
+        return self.get_user(user_id)
+
+
+class FakeMessage:
+    def __init__(self, message_id, channel, guild, author, embed):
+        self.id = message_id
+        self.channel = channel
+        self.guild = guild
+        self.author = author
+        self.embeds = [embed]
+        self.nonce = None
+
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def defer(self, **kwargs):
+        await self.interaction.rest.call('POST', 'callback', self.interaction.id)
+        self._done = True
+
+    async def send_message(self, *args, **kwargs):
+        await self.defer()
+
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, *args, **kwargs):
+        await self.interaction.rest.call('POST', 'followup', self.interaction.token)
+
+
+class FakeInteraction:
+    _ids = itertools.count(1)
+
+    def __init__(self, rest, client, guild, message=None, user=None):
+        self.rest = rest
+        self.id = next(self._ids)
+        self.token = f"token{self.id}"
+        self.client = client
+        self.guild = guild
+        self.channel = guild.channel
+        self.message = message
+        self.user = user or FakeUser(rest, MODERATOR_ID)
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+
+def pending_embed(discord_id: int, i: int) -> discord.Embed:
+    """A pending registration embed in the format api/register.js posts"""
+    embed = discord.Embed(title=f"🌐 {PENDING_TITLE}")
+    embed.add_field(name="👤 Discord User", value=f"<@{discord_id}>")
+    embed.add_field(name="🎮 Game Username", value=f"Player{i}")
+    embed.add_field(name="🆔 Game ID", value=str(100000 + i))
+    embed.add_field(name="🌍 Community", value=f"Community {i % 20}")
+    embed.add_field(name="⏰ Timezone", value="UTC-05:00")
+    embed.add_field(
+        name="💪 Strength",
+        value=f"**Base Crit:** {600 + i % 400}\n**Legendarity:** {20 + i % 60}\n"
+              f"**Perks:** {50 + i % 150}\n**Total Strength:** 0\n**Division:** Unknown"
+    )
+    embed.add_field(
+        name="🃏 Deck",
+        value="\n".join(f"{n}. {card} - Lv {10 + n}" for n, card in
+                        enumerate(("Wukong", "Twins", "Banshee", "Clown", "Thrower"), 1))
+    )
+    embed.set_footer(text=f"User ID: {discord_id}")
+    return embed
+
+
+# ============================================================================
+# SCENARIOS
+# ============================================================================
+
+class Harness:
+    def __init__(self, rest: FakeRest):
+        self.rest = rest
+        self.client = FakeClient(rest, 1)
+        self.channel = FakeChannel(rest, CHANNEL_ID)
+        self.guild = FakeGuild(rest, GUILD_ID, self.channel)
+        self._ids = itertools.count(1)
+
+    def message(self) -> FakeMessage:
+        n = next(self._ids)
+        discord_id = 500_000_000_000_000_000 + n
+        message = FakeMessage(800_000_000_000_000_000 + n, self.channel, self.guild,
+                              self.client.user, pending_embed(discord_id, n))
+        self.channel.messages[message.id] = message
+        return message
+
+
+async def scenario_intake(harness, users):
+    from browser_approval_handler import BrowserApprovalHandler
+    cog = BrowserApprovalHandler(harness.client)
+    messages = [harness.message() for _ in range(users)]
+    return [lambda m=m: cog.on_message(m) for m in messages]
+
+
+async def scenario_extract(harness, users):
+    from browser_approval_handler import BrowserApprovalView
+    view = BrowserApprovalView()
+    messages = [harness.message() for _ in range(users)]
+
+    async def extract(message):
+        view.extract_registration_data(message.embeds[0], 0)
+    return [lambda m=m: extract(m) for m in messages]
+
+
+async def scenario_approve(harness, users):
+    from browser_approval_handler import BrowserApprovalView
+    from registration_records import parse_registration_embed
+    view = BrowserApprovalView()
+    interactions = []
+    for _ in range(users):
+        message = harness.message()
+        registration_store.put(parse_registration_embed(message.embeds[0], message))
+        interactions.append(FakeInteraction(harness.rest, harness.client, harness.guild, message))
+    return [lambda i=i: view.handle_approval(i, approved=True) for i in interactions]
+
+
+class BenchCardLevelSelectView:
+    """Stands in for the level picker CardSelect sends (not part of this tree)"""
+
+    def __init__(self, card_name, is_legendary):
+        self.card_name = card_name
+        self.is_legendary = is_legendary
+
+
+def load_views():
+    """Import views.py, giving its fragment the names the full module defines"""
+    spec = importlib.util.spec_from_file_location('views', os.path.join(os.path.dirname(__file__), 'views.py'))
+    module = importlib.util.module_from_spec(spec)
+    module.discord = discord
+    module.Select = discord.ui.Select
+    module.CardLevelSelectView = BenchCardLevelSelectView
+    spec.loader.exec_module(module)
+    return module
+
+
+async def scenario_card(harness, users):
+    from session_store import registration_sessions
+    select = load_views().CardSelect(menu_number=1)
+    calls = []
+    for n in range(users):
+        user = FakeUser(harness.rest, 600_000_000_000_000_000 + n)
+        registration_sessions.start(GUILD_ID, user.id)
+        interaction = FakeInteraction(harness.rest, harness.client, harness.guild, user=user)
+        calls.append((select, interaction))
+
+    async def pick(interaction):
+        select._values = ["Wukong"]
+        await select.callback(interaction)
+    return [lambda i=i: pick(i) for _, i in calls]
+
+
+SCENARIOS = {
+    'intake': scenario_intake,
+    'extract': scenario_extract,
+    'approve': scenario_approve,
+    'card': scenario_card,
+}
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+async def run_level(server, rest, name, users):
+    harness = Harness(rest)
+    try:
+        calls = await SCENARIOS[name](harness, users)
+    except (ImportError, NameError) as e:
+        return {'scenario': name, 'users': users, 'skipped': str(e)}
+
+    requests_before, limited_before = server.requests, server.rate_limited
+    errors_before = interaction_errors.total()
+    latencies = []
+    raised = 0
+
+    async def timed(call):
+        nonlocal raised
+        start = time.perf_counter()
+        try:
+            await call()
+        except Exception:
+            raised += 1
+        latencies.append(time.perf_counter() - start)
+
+    await asyncio.sleep(0.01)
+    with LoopStallProbe() as probe:
+        start = time.perf_counter()
+        await asyncio.gather(*(timed(call) for call in calls))
+        wall = time.perf_counter() - start
+        await outbox.flush()
+        drained = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'scenario': name,
+        'users': users,
+        'throughput_per_s': round(users / wall, 1),
+        'p50_ms': round(_percentile(latencies, 0.50) * 1000, 2),
+        'p99_ms': round(_percentile(latencies, 0.99) * 1000, 2),
+        'errors': interaction_errors.total() - errors_before + raised,
+        'outbox_drain_s': round(drained, 2),
+        'max_stall_ms': round(probe.max_stall * 1000, 2),
+        'total_stall_ms': round(probe.total_stall * 1000, 2),
+        'rest_requests': server.requests - requests_before,
+        'rate_limited': server.rate_limited - limited_before,
+    }
+
+
+def compare(results, baseline) -> list:
+    """Human-readable regressions against a saved baseline"""
+    previous = {(r['scenario'], r['users']): r for r in baseline}
+    regressions = []
+    for r in results:
+        old = previous.get((r['scenario'], r['users']))
+        if not old or 'skipped' in r or 'skipped' in old:
+            continue
+        if r.get('errors', 0) > old.get('errors', 0):
+            regressions.append(f"{r['scenario']}@{r['users']}: errors {old.get('errors', 0)} -> {r['errors']}")
+        if r['p99_ms'] > old['p99_ms'] * (1 + REGRESSION_TOLERANCE):
+            regressions.append(f"{r['scenario']}@{r['users']}: p99 {old['p99_ms']} -> {r['p99_ms']} ms")
+        if r['throughput_per_s'] < old['throughput_per_s'] * (1 - REGRESSION_TOLERANCE):
+            regressions.append(
+                f"{r['scenario']}@{r['users']}: throughput {old['throughput_per_s']} -> {r['throughput_per_s']}/s"
+            )
+    return regressions
+
+
+async def main(levels, scenarios, save: bool, baseline_path: str):
+    server = StandInDiscord()
+    await server.start()
+    rest = FakeRest(server)
+    rest.session = ClientSession()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        async_db._backend = SqliteBackend(os.path.join(tmp, "bench.db"))
+        try:
+            for name in scenarios:
+                for users in levels:
+                    results.append(await run_level(server, rest, name, users))
+        finally:
+            await rest.session.close()
+            await server.stop()
+            async_db.close()
+
+    print(f"{'scenario':<10}{'users':>7}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+          f"{'errors':>8}{'drain s':>10}{'stall ms':>10}{'429s':>7}")
+    for r in results:
+        if 'skipped' in r:
+            print(f"{r['scenario']:<10}{r['users']:>7}  skipped: {r['skipped']}")
+            continue
+        print(f"{r['scenario']:<10}{r['users']:>7}{r['throughput_per_s']:>10}{r['p50_ms']:>10}"
+              f"{r['p99_ms']:>10}{r['errors']:>8}{r['outbox_drain_s']:>10}{r['total_stall_ms']:>10}"
+              f"{r['rate_limited']:>7}")
+
+    if save:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Baseline saved to {baseline_path}")
+    elif os.path.exists(baseline_path):
+        with open(baseline_path, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f))
+        if regressions:
+            print("\n❌ Regressions against the baseline:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print("\n✅ No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--users', type=int, nargs='+', default=list(USER_LEVELS))
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--save', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.users, args.scenarios, args.save, args.baseline)))
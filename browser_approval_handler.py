@@ -1,22 +1,341 @@
 """browser_approval_handler.py - Handle approval buttons from browser registrations"""
 
+import asyncio
+import time
+from collections import OrderedDict
+
 import discord
+from discord import app_commands
 from discord.ext import commands
-import database as db
+from async_database import async_db, approval_batcher
+from outbox import outbox, OutboxTracker, channel_bucket, roles_bucket, DM_BUCKET
+from cluster import invalidation_bus
+from strength_index import strength_index
+from pending_index import pending_index
+from member_cache import member_cache
+from metrics import start_interaction, log
+from strength_engine import strength_engine, calculate_many
+from export_codec import decode_record
+from event_hub import event_hub
+from registration_intake import public_event, registration_intake
+from registration_journal import registration_journal
+from ticket_lifecycle import ticket_lifecycle
+from registration_records import (
+    registration_store,
+    is_pending_registration,
+    parse_registration_embed,
+)
+
+# Seconds between progress updates during /bulk_review
+BULK_PROGRESS_INTERVAL = 2.0
+
+# Participants written per transaction during /import_codes
+IMPORT_BATCH_SIZE = 500
+
+# How long (seconds) and how many decided messages late clicks are answered from memory
+DECIDED_TTL = 10 * 60
+DECIDED_CACHE_SIZE = 2000
+
+
+class Decision:
+    __slots__ = ('approved', 'moderator', 'decided_at')
+    
+    def __init__(self, approved: bool, moderator: str):
+        self.approved = approved
+        self.moderator = moderator
+        self.decided_at = time.monotonic()
+    
+    def describe(self) -> str:
+        return f"{'✅ approved' if self.approved else '❌ rejected'} by {self.moderator}"
+
+
+class DecisionRegistry:
+    """In-flight decisions keyed by approval message id, plus a short-lived decided cache
+    
+    A second click while a decision is running waits for the first one's
+    outcome instead of repeating the DB write and side effects; clicks after
+    it finished are answered from the cache.
+    """
+    
+    def __init__(self, ttl: float = DECIDED_TTL, max_size: int = DECIDED_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._in_flight = {}          # message_id -> Future[Decision | None]
+        self._decided = OrderedDict() # message_id -> Decision
+        self.coalesced = 0
+    
+    def decided(self, message_id: int):
+        decision = self._decided.get(message_id)
+        if decision is not None and time.monotonic() - decision.decided_at > self.ttl:
+            del self._decided[message_id]
+            return None
+        return decision
+    
+    def in_flight(self, message_id: int):
+        return self._in_flight.get(message_id)
+    
+    def begin(self, message_id: int) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[message_id] = future
+        return future
+    
+    def finish(self, message_id: int, decision: Decision = None):
+        """Resolve waiters; None means the decision failed and may be retried"""
+        future = self._in_flight.pop(message_id, None)
+        if decision is not None:
+            self.remember(message_id, decision)
+        if future is not None and not future.done():
+            future.set_result(decision)
+    
+    def remember(self, message_id: int, decision: Decision):
+        self._decided[message_id] = decision
+        self._decided.move_to_end(message_id)
+        while len(self._decided) > self.max_size:
+            self._decided.popitem(last=False)
+
+
+# Shared by the buttons and /bulk_review
+decisions = DecisionRegistry()
 
 class BrowserApprovalHandler(commands.Cog):
     """Handle approval/rejection buttons from browser registrations"""
     
     def __init__(self, bot):
         self.bot = bot
-        
-        # Register the persistent view on startup
-        self.bot.add_view(BrowserApprovalView())
+        # BrowserApprovalView is registered once by the startup pipeline
     
     @commands.Cog.listener()
     async def on_ready(self):
         """Re-register persistent views when bot restarts"""
-        print("✅ Browser Approval Handler loaded")
+        log.info("✅ Browser Approval Handler loaded")
+    
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        """Parse browser registrations once when they are posted and keep the record"""
+        if message.author.id != self.bot.user.id or not is_pending_registration(message):
+            return
+        if message.id in registration_store or message.nonce in registration_intake.posting:
+            return   # Posted by registration_intake, which stores the record itself
+        
+        record = parse_registration_embed(message.embeds[0], message)
+        if record:
+            registration_store.put(record)
+            registration_journal.submitted(record)
+            event_hub.publish(record.guild_id, 'registration', public_event(record))
+    
+    @app_commands.command(
+        name="bulk_review",
+        description="Approve or reject every pending browser registration matching a filter"
+    )
+    @app_commands.describe(
+        action="Approve or reject the matching registrations",
+        division="Only registrations in this division",
+        community="Only registrations from this community",
+        min_strength="Minimum total strength",
+        max_strength="Maximum total strength"
+    )
+    @app_commands.choices(action=[
+        app_commands.Choice(name="Approve", value="approve"),
+        app_commands.Choice(name="Reject", value="reject"),
+    ])
+    @app_commands.checks.has_permissions(administrator=True)
+    async def bulk_review(
+        self,
+        interaction: discord.Interaction,
+        action: app_commands.Choice[str],
+        division: str = None,
+        community: str = None,
+        min_strength: int = None,
+        max_strength: int = None
+    ):
+        """Decide many pending registrations in one pass"""
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        
+        approved = action.value == "approve"
+        entries = pending_index.matching(
+            interaction.guild.id,
+            division=division,
+            community=community,
+            min_strength=min_strength,
+            max_strength=max_strength
+        )
+        
+        # Messages a moderator is deciding right now are left to that click
+        records = []
+        for entry in entries:
+            if decisions.in_flight(entry.message_id) is not None:
+                continue
+            record = registration_store.get(entry.message_id) or registration_journal.pending_record(
+                entry.guild_id, entry.discord_id, entry.message_id
+            )
+            if record is not None:
+                records.append(record)
+        
+        if not records:
+            await interaction.followup.send(
+                "ℹ️ No pending browser registrations match that filter.",
+                ephemeral=True
+            )
+            return
+        
+        total = len(records)
+        verb = "Approving" if approved else "Rejecting"
+        progress = await interaction.followup.send(
+            f"⏳ {verb} **{total}** registration(s)...",
+            ephemeral=True,
+            wait=True
+        )
+        
+        failed = 0
+        if approved:
+            # One batched transaction for every matching registration
+            rows = [r.participant_kwargs(r.username or str(r.discord_id)) for r in records]
+            try:
+                errors = await async_db.add_and_approve_many(rows)
+            except Exception as e:
+                errors = [e] * total
+            
+            decided = []
+            for record, error in zip(records, errors):
+                if error is None:
+                    decided.append(record)
+                    strength_index.upsert(
+                        record.guild_id, record.discord_id, record.division, record.total_strength
+                    )
+                else:
+                    failed += 1
+                    log.error(f"❌ Bulk approve failed for {record.discord_id}: {error}")
+            records = decided
+            
+            await progress.edit(
+                content=f"💾 Saved **{len(records)}**/{total} to the database"
+                        f"{f' ({failed} failed)' if failed else ''}. Queuing notifications..."
+            )
+        
+        if approved and records:
+            # One batched member lookup instead of one per role grant
+            await member_cache.prefetch(interaction.guild, [r.discord_id for r in records])
+        
+        # Notifications go through the throttled outbox; only this command's jobs are awaited
+        tracker = OutboxTracker()
+        missing = 0
+        for record in records:
+            registration_store.pop(record.message_id)
+            registration_journal.decided(record, approved, interaction.user.id, bulk=True)
+            decisions.remember(record.message_id, Decision(approved, interaction.user.name))
+            channel = interaction.guild.get_channel(record.channel_id)
+            if channel is None:
+                # Ticket channel is gone: still grant the role and DM, but nothing to edit
+                missing += 1
+            queue_decision_side_effects(
+                interaction.client,
+                interaction.guild,
+                channel,
+                record.message_id,
+                record,
+                approved,
+                interaction.user,
+                tracker=tracker
+            )
+        
+        if records:
+            invalidation_bus.publish('guild', interaction.guild.id, local=False)
+        
+        while not await tracker.wait(BULK_PROGRESS_INTERVAL):
+            await progress.edit(
+                content=f"📨 {verb}: **{len(records)}**/{total} saved, "
+                        f"{tracker.remaining} notification(s) still queued..."
+            )
+        
+        summary = "✅ Approved" if approved else "❌ Rejected"
+        notes = []
+        if failed:
+            notes.append(f"{failed} failed to save")
+        if missing:
+            notes.append(f"{missing} had no ticket channel (message not edited)")
+        if tracker.failed:
+            notes.append(f"{tracker.failed} notification(s) failed")
+        await progress.edit(
+            content=f"{summary} **{len(records)}**/{total} registration(s); "
+                    f"{len(records) - missing} ticket(s) updated"
+                    f"{'; ' + ', '.join(notes) if notes else ''}."
+        )
+    
+    @app_commands.command(
+        name="import_codes",
+        description="Import and approve participants from a file of export codes"
+    )
+    @app_commands.describe(
+        file="Text file with one '<discord id> <export code>' per line"
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def import_codes(self, interaction: discord.Interaction, file: discord.Attachment):
+        """Bulk-import export codes (v2 or legacy CSV) in batched transactions"""
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        
+        guild = interaction.guild
+        config = strength_engine.config_for(guild.id)
+        text = (await file.read()).decode('utf-8-sig', errors='replace')
+        
+        imported = failed = 0
+        invalid = []
+        batch = []
+        
+        async def flush():
+            nonlocal imported, failed
+            if not batch:
+                return
+            totals, divisions = calculate_many(
+                [{'crit_level': r.crit_level, 'legendarity': r.legendarity,
+                  'perks_level': r.perks_level, 'cards': r.cards} for r in batch],
+                config
+            )
+            for record, total, division in zip(batch, totals, divisions):
+                record.total_strength = total
+                record.division = division or 'Unknown'
+            
+            rows = [r.participant_kwargs(r.username) for r in batch]
+            try:
+                errors = await async_db.add_and_approve_many(rows)
+            except Exception as e:
+                errors = [e] * len(rows)
+            for record, error in zip(batch, errors):
+                if error is None:
+                    imported += 1
+                    strength_index.upsert(guild.id, record.discord_id, record.division, record.total_strength)
+                    registration_journal.decided(record, True, interaction.user.id, source='import')
+                else:
+                    failed += 1
+                    log.error(f"❌ Import failed for {record.discord_id}: {error}")
+            batch.clear()
+        
+        for line_number, line in enumerate(text.splitlines(), 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            discord_id, _, code = line.partition(' ')
+            try:
+                member = member_cache.cached_member(guild, int(discord_id))
+                record = decode_record(code, int(discord_id), guild.id)
+            except ValueError as e:  # ExportCodeError is a ValueError
+                invalid.append(f"line {line_number}: {e}")
+                continue
+            record.username = member.name if member else record.game_username
+            batch.append(record)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await flush()
+        await flush()
+        if imported:
+            invalidation_bus.publish('guild', guild.id, local=False)
+        
+        summary = f"📥 Imported **{imported}** participant(s)"
+        if failed:
+            summary += f", {failed} failed to save"
+        if invalid:
+            summary += f", {len(invalid)} invalid line(s):\n" + "\n".join(invalid[:10])
+            if len(invalid) > 10:
+                summary += f"\n...and {len(invalid) - 10} more"
+        await interaction.followup.send(summary[:2000], ephemeral=True)
 
 
 class BrowserApprovalView(discord.ui.View):
@@ -50,169 +369,126 @@ class BrowserApprovalView(discord.ui.View):
     )
     async def copy_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Extract and show export code"""
+        span = start_interaction("copy_export_code")
         try:
-            # Find the export code in the embed
-            embed = interaction.message.embeds[0]
-            export_code = None
+            record = registration_store.for_message(interaction.message)
+            export_code = record.export_code if record else None
             
-            for field in embed.fields:
-                if "Export Code" in field.name:
-                    # Extract code from ```code``` format
-                    export_code = field.value.strip('`').strip()
-                    break
-            
-            if export_code:
-                await interaction.response.send_message(
-                    f"📋 **Export Code:**\n```{export_code}```\n\nYou can copy this code for future use!",
-                    ephemeral=True
-                )
-            else:
-                await interaction.response.send_message(
-                    "❌ Could not find export code in this registration.",
-                    ephemeral=True
-                )
+            with span.phase('rest'):
+                if export_code:
+                    await interaction.response.send_message(
+                        f"📋 **Export Code:**\n```{export_code}```\n\nYou can copy this code for future use!",
+                        ephemeral=True
+                    )
+                else:
+                    await interaction.response.send_message(
+                        "❌ Could not find export code in this registration.",
+                        ephemeral=True
+                    )
+                # The response itself is the acknowledgement
+                span.deferred()
                 
         except Exception as e:
-            print(f"❌ Error copying export code: {e}")
+            span.error()
+            log.error(f"❌ Error copying export code: {e}")
             await interaction.response.send_message(
                 "❌ An error occurred while copying the code.",
                 ephemeral=True
             )
+        finally:
+            span.finish()
     
     async def handle_approval(self, interaction: discord.Interaction, approved: bool):
-        """Handle approval or rejection"""
+        """Handle approval or rejection (DB write + ack; the rest goes through the outbox)"""
+        message_id = interaction.message.id
+        
+        # Late click on a message that was just decided: answer from memory
+        decision = decisions.decided(message_id)
+        if decision is not None:
+            await interaction.response.send_message(
+                f"ℹ️ This registration was already {decision.describe()}.",
+                ephemeral=True
+            )
+            return
+        
+        # Click while another decision on this message is running: share its outcome
+        running = decisions.in_flight(message_id)
+        if running is not None:
+            decisions.coalesced += 1
+            await interaction.response.defer(ephemeral=True)
+            decision = await asyncio.shield(running)
+            await interaction.followup.send(
+                f"ℹ️ This registration was already {decision.describe()}." if decision
+                else "⚠️ Another decision on this registration failed; please try again.",
+                ephemeral=True
+            )
+            return
+        
+        decisions.begin(message_id)
+        span = start_interaction("approve_browser_reg" if approved else "reject_browser_reg")
         try:
             await interaction.response.defer()
+            span.deferred()
             
-            # Get the registration data from the embed
             embed = interaction.message.embeds[0]
             
-            # Extract discord_id from the embed
-            discord_id = None
-            for field in embed.fields:
-                if field.name == "Discord User":
-                    # Extract ID from <@123456789> format
-                    mention = field.value
-                    discord_id = int(mention.strip('<@!>'))
-                    break
+            # Look up the record stored at intake (parses the embed only for legacy messages)
+            record = registration_store.for_message(interaction.message)
             
-            if not discord_id:
-                # Try footer
-                footer_text = embed.footer.text
-                if "User ID:" in footer_text:
-                    discord_id = int(footer_text.split("User ID:")[1].split("|")[0].strip())
-            
-            if not discord_id:
+            if not record:
                 await interaction.followup.send(
                     "❌ Could not find user ID in registration!",
                     ephemeral=True
                 )
                 return
             
-            # Get the user
-            try:
-                user = await self.bot.fetch_user(discord_id)
-            except:
-                await interaction.followup.send(
-                    f"❌ Could not find user with ID {discord_id}",
-                    ephemeral=True
-                )
-                return
-            
-            # Extract registration data from embed
-            registration_data = self.extract_registration_data(embed, discord_id)
+            if not record.guild_id:
+                record.guild_id = interaction.guild.id
             
             if approved:
                 # APPROVE: Add to database
-                success = await self.approve_registration(
-                    interaction,
-                    user,
-                    registration_data
-                )
+                with span.phase('db'):
+                    success = await self.approve_registration(interaction, record)
                 
-                if success:
-                    # Update embed
-                    new_embed = embed.copy()
-                    new_embed.title = "✅ Registration APPROVED"
-                    new_embed.color = discord.Color.green()
-                    new_embed.set_footer(
-                        text=f"{embed.footer.text} | Approved by {interaction.user.name}"
-                    )
-                    
-                    # Update message (remove buttons)
-                    await interaction.message.edit(
-                        content=f"✅ **Registration APPROVED** by {interaction.user.mention}",
-                        embed=new_embed,
-                        view=None
+                if not success:
+                    await interaction.followup.send(
+                        "❌ Error saving registration to database.",
+                        ephemeral=True
                     )
-                    
-                    # Send DM to user
-                    try:
-                        await user.send(
-                            embed=discord.Embed(
-                                title="✅ Tournament Registration Approved!",
-                                description=f"Your registration for **{interaction.guild.name}** has been approved!",
-                                color=discord.Color.green()
-                            ).add_field(
-                                name="Division",
-                                value=registration_data.get('division', 'N/A')
-                            ).add_field(
-                                name="Next Steps",
-                                value="You're all set! Watch for tournament announcements."
-                            )
-                        )
-                    except:
-                        print(f"Could not DM user {discord_id}")
-                    
+                    return
+            
+            registration_store.pop(interaction.message.id)
+            registration_journal.decided(record, approved, interaction.user.id)
+            invalidation_bus.publish('guild', interaction.guild.id, local=False)
+            decision = Decision(approved, interaction.user.name)
+            
+            # Message edit, role grant and DM are queued, not awaited
+            queue_decision_side_effects(
+                interaction.client,
+                interaction.guild,
+                interaction.channel,
+                interaction.message.id,
+                record,
+                approved,
+                interaction.user,
+                embed
+            )
+            
+            with span.phase('rest'):
+                if approved:
                     await interaction.followup.send(
-                        f"✅ Registration approved! {user.mention} has been added to the tournament.",
+                        f"✅ Registration approved! <@{record.discord_id}> has been added to the tournament.",
                         ephemeral=True
                     )
                 else:
                     await interaction.followup.send(
-                        "❌ Error saving registration to database.",
+                        f"❌ Registration rejected.",
                         ephemeral=True
                     )
-            
-            else:
-                # REJECT
-                new_embed = embed.copy()
-                new_embed.title = "❌ Registration REJECTED"
-                new_embed.color = discord.Color.red()
-                new_embed.set_footer(
-                    text=f"{embed.footer.text} | Rejected by {interaction.user.name}"
-                )
-                
-                await interaction.message.edit(
-                    content=f"❌ **Registration REJECTED** by {interaction.user.mention}",
-                    embed=new_embed,
-                    view=None
-                )
-                
-                # Send DM
-                try:
-                    await user.send(
-                        embed=discord.Embed(
-                            title="❌ Tournament Registration Rejected",
-                            description=f"Your registration for **{interaction.guild.name}** was not approved.",
-                            color=discord.Color.red()
-                        ).add_field(
-                            name="What to do",
-                            value="Please contact a moderator if you have questions."
-                        )
-                    )
-                except:
-                    print(f"Could not DM user {discord_id}")
-                
-                await interaction.followup.send(
-                    f"❌ Registration rejected.",
-                    ephemeral=True
-                )
         
         except Exception as e:
-            print(f"❌ Error in handle_approval: {e}")
-            import traceback
-            traceback.print_exc()
+            span.error()
+            log.exception(f"❌ Error in handle_approval: {e}")
             
             try:
                 await interaction.followup.send(
@@ -221,116 +497,149 @@ class BrowserApprovalView(discord.ui.View):
                 )
             except:
                 pass
+        finally:
+            decisions.finish(message_id, decision)
+            span.finish()
     
     def extract_registration_data(self, embed: discord.Embed, discord_id: int) -> dict:
-        """Extract registration data from the embed fields"""
-        data = {
-            'discord_id': discord_id,
-            'cards': []
-        }
-        
-        for field in embed.fields:
-            name = field.name.lower()
-            value = field.value
-            
-            if "game username" in name:
-                data['game_username'] = value
-            elif "game id" in name:
-                data['game_id'] = value
-            elif "community" in name:
-                data['community'] = value
-            elif "timezone" in name:
-                data['timezone'] = value
-            elif "hero" in name and "item" not in name:
-                # Extract hero and level from "HeroName (Lv 50)"
-                if "(Lv" in value:
-                    hero_parts = value.split("(Lv")
-                    data['hero'] = hero_parts[0].strip()
-                    data['hero_level'] = int(hero_parts[1].strip(")").strip())
-            elif "hero item" in name:
-                if value and value != "None":
-                    if "(Lv" in value:
-                        item_parts = value.split("(Lv")
-                        data['hero_item'] = item_parts[0].strip()
-                        data['hero_item_level'] = int(item_parts[1].strip(")").strip())
-                    else:
-                        data['hero_item'] = value
-            elif "perks" in name:
-                data['perks_level'] = int(value)
-            elif "deck" in name or "card" in name:
-                # Parse deck: "1. CardName - Lv 15\n2. CardName - Lv 14..."
-                lines = value.split('\n')
-                for line in lines:
-                    if ". " in line and " - Lv " in line:
-                        card_name = line.split(". ")[1].split(" - Lv ")[0]
-                        card_level = line.split(" - Lv ")[1].strip()
-                        data['cards'].append({
-                            'name': card_name,
-                            'level': card_level
-                        })
-            elif "calculated strength" in name or "strength" in name:
-                # Parse strength info
-                if "Base Crit:" in value:
-                    for line in value.split('\n'):
-                        if "Base Crit:" in line:
-                            data['crit_level'] = int(line.split(":")[1].replace("%", "").strip())
-                        elif "Legendarity:" in line:
-                            data['legendarity'] = int(line.split(":")[1].strip())
-                        elif "Perks:" in line and "**Perks:**" in line:
-                            data['perks_level'] = int(line.split(":")[1].strip())
-                        elif "Division:" in line:
-                            data['division'] = line.split(":")[1].strip()
-        
-        return data
+        """Extract registration data from the embed fields (legacy messages without a stored record)"""
+        record = parse_registration_embed(embed)
+        if record is None:
+            return {'discord_id': discord_id, 'cards': []}
+        record.discord_id = discord_id
+        return record.as_dict()
     
-    async def approve_registration(self, interaction: discord.Interaction, user: discord.User, data: dict) -> bool:
+    async def approve_registration(self, interaction: discord.Interaction, record) -> bool:
         """Add the approved registration to the database"""
         try:
-            guild_id = interaction.guild.id
-            discord_id = user.id
-            
-            # Add participant to database
-            db.add_participant(
-                guild_id=guild_id,
-                discord_id=discord_id,
-                username=user.name,
-                game_username=data.get('game_username', ''),
-                game_id=data.get('game_id', ''),
-                crit_level=data.get('crit_level', 0),
-                legendarity=data.get('legendarity', 0),
-                perks_level=data.get('perks_level', 0),
-                division=data.get('division', 'Unknown'),
-                timezone=data.get('timezone', 'UTC'),
-                community=data.get('community', ''),
-                hero=data.get('hero', ''),
-                hero_level=data.get('hero_level', 1),
-                hero_item=data.get('hero_item'),
-                hero_item_level=data.get('hero_item_level'),
-                cards=data.get('cards', [])
+            # Add and approve in one transaction, off the event loop
+            await approval_batcher.submit(
+                record.participant_kwargs(record.username or str(record.discord_id))
             )
             
-            # Mark as approved
-            db.approve_participant(discord_id, guild_id)
-            
-            # Assign Participant role
-            try:
-                participant_role = discord.utils.get(interaction.guild.roles, name="Participant")
-                if participant_role:
-                    member = interaction.guild.get_member(discord_id)
-                    if member:
-                        await member.add_roles(participant_role)
-            except Exception as e:
-                print(f"Could not assign role: {e}")
-            
+            # Keep the matchmaking ladder current without a rebuild
+            strength_index.upsert(
+                record.guild_id, record.discord_id, record.division, record.total_strength
+            )
             return True
             
         except Exception as e:
-            print(f"❌ Error approving registration: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception(f"❌ Error approving registration: {e}")
             return False
 
 
+# ============================================================================
+# QUEUED SIDE EFFECTS
+# ============================================================================
+
+def decision_embed(embed: discord.Embed, approved: bool, moderator_name: str) -> discord.Embed:
+    """Copy of the registration embed marked approved/rejected"""
+    new_embed = embed.copy()
+    if approved:
+        new_embed.title = "✅ Registration APPROVED"
+        new_embed.color = discord.Color.green()
+        new_embed.set_footer(text=f"{embed.footer.text} | Approved by {moderator_name}")
+    else:
+        new_embed.title = "❌ Registration REJECTED"
+        new_embed.color = discord.Color.red()
+        new_embed.set_footer(text=f"{embed.footer.text} | Rejected by {moderator_name}")
+    return new_embed
+
+
+def decision_dm_embed(guild_name: str, approved: bool, division: str) -> discord.Embed:
+    if approved:
+        return discord.Embed(
+            title="✅ Tournament Registration Approved!",
+            description=f"Your registration for **{guild_name}** has been approved!",
+            color=discord.Color.green()
+        ).add_field(
+            name="Division",
+            value=division or 'N/A'
+        ).add_field(
+            name="Next Steps",
+            value="You're all set! Watch for tournament announcements."
+        )
+    return discord.Embed(
+        title="❌ Tournament Registration Rejected",
+        description=f"Your registration for **{guild_name}** was not approved.",
+        color=discord.Color.red()
+    ).add_field(
+        name="What to do",
+        value="Please contact a moderator if you have questions."
+    )
+
+
+def queue_decision_side_effects(client, guild: discord.Guild, channel, message_id: int, record,
+                                approved: bool, moderator, embed: discord.Embed = None,
+                                tracker: OutboxTracker = None):
+    """Queue the message edit, role grant, DM and ticket close that follow a decision
+
+    `channel` may be None when the ticket channel is gone; the edit and close are skipped.
+    """
+    status = "APPROVED" if approved else "REJECTED"
+    icon = "✅" if approved else "❌"
+    content = f"{icon} **Registration {status}** by {moderator.mention}"
+    
+    async def edit_message():
+        source_embed = embed
+        if source_embed is None:
+            message = await channel.fetch_message(message_id)
+            source_embed = message.embeds[0]
+        # Update message (remove buttons)
+        await channel.get_partial_message(message_id).edit(
+            content=content,
+            embed=decision_embed(source_embed, approved, moderator.name),
+            view=None
+        )
+    
+    if channel is not None:
+        outbox.enqueue(
+            channel_bucket(channel.id),
+            edit_message,
+            key=f"edit:{message_id}",
+            description=f"edit registration {message_id}",
+            tracker=tracker
+        )
+    
+    if approved:
+        async def grant_role():
+            participant_role = discord.utils.get(guild.roles, name="Participant")
+            if not participant_role:
+                return
+            member = await member_cache.get_member(guild, record.discord_id)
+            if member is None:
+                log.warning(f"⚠️ {record.discord_id} is no longer in {guild.name}; Participant role not granted")
+                return
+            await member.add_roles(participant_role)
+        
+        outbox.enqueue(
+            roles_bucket(guild.id),
+            grant_role,
+            key=f"role:{guild.id}:{record.discord_id}",
+            description=f"grant Participant to {record.discord_id}",
+            tracker=tracker
+        )
+    
+    async def send_dm():
+        user = await member_cache.get_user(client, record.discord_id)
+        await user.send(embed=decision_dm_embed(guild.name, approved, record.division))
+    
+    outbox.enqueue(
+        DM_BUCKET,
+        send_dm,
+        key=f"dm:{guild.id}:{record.discord_id}",
+        description=f"DM {record.discord_id}",
+        tracker=tracker
+    )
+    
+    # Queued behind the edit on the same channel bucket
+    if channel is not None:
+        ticket_lifecycle.close(guild, channel, record, approved, moderator, tracker=tracker)
+    
+    if approved:
+        event_hub.publish(guild.id, 'approval', public_event(record))
+
+
 async def setup(bot):
     """Setup function to load the cog"""
     await bot.add_cog(BrowserApprovalHandler(bot))
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""card_catalog.py - Card metadata and select-menu options, built once at import
+
+Card ids are positions in CARD_ORDER. The list is append-only (new cards go at
+the end) because export codes store ids. It matches the order of
+LEGENDARY_CARDS followed by the other cards in registration.js.
+"""
+
+from dataclasses import dataclass
+
+import discord
+
+from strength_engine import DEFAULT_PANTHEON
+
+SELECT_PAGE_SIZE = 25          # Discord's option limit per select menu
+MAX_LEVEL = 15
+MAX_REINCARNATION_LEVEL = 18
+
+LEGENDARY_CARDS = (
+    "Banshee", "Bard", "Bruiser", "Blade Dancer", "Boreas", "Corsair", "Cultist",
+    "Demon Hunter", "Demonologist", "Spirit Master", "Dryad", "Franky & Stein",
+    "Frost", "Gun Slinger", "Harlequin", "Inquisitor", "Genie", "Hex",
+    "Knight Statue", "Kobold", "Twilight Ranger", "Clock", "Meteor", "Minotaur",
+    "Monk", "Swords", "Phoenix", "Riding Hood", "Robot", "Scrapper", "Stasis",
+    "Summoner", "Tesla", "Trapper", "Treant", "Sea Dog", "Twins", "Witch", "Shaman",
+    "Valkerie", "Wukong",
+)
+
+OTHER_CARDS = (
+    "Catapult", "Clown", "Crystalmancer", "Earth Elemental", "Cold Elemental",
+    "Engineer", "Gargoyle", "Executioner", "Mime", "Plague Doctor", "Ivy",
+    "Portal Keeper", "Pyrotechnic", "Reaper", "Portal Mage", "Thunderer",
+    "Vampire", "Wind Archer", "Alchemist", "Banner", "Magic Cauldron", "Chemist",
+    "Grindstone", "Priestess", "Sentry", "Sharpshooter", "Zealot",
+    "Archer", "Bombardier", "Cold Mage", "Fire Mage", "Hunter",
+    "Lightning Mage", "Poisoner", "Rogue", "Thrower",
+)
+
+CARD_ORDER = LEGENDARY_CARDS + OTHER_CARDS
+
+FLAG_LEGENDARY = 1
+FLAG_PANTHEON = 2
+
+
+@dataclass(frozen=True, slots=True)
+class Card:
+    id: int
+    name: str
+    flags: int
+
+    @property
+    def is_legendary(self) -> bool:
+        return bool(self.flags & FLAG_LEGENDARY)
+
+    @property
+    def is_pantheon(self) -> bool:
+        return bool(self.flags & FLAG_PANTHEON)
+
+    @property
+    def max_level(self) -> int:
+        return MAX_REINCARNATION_LEVEL if self.is_legendary else MAX_LEVEL
+
+
+def _flags(name: str) -> int:
+    flags = 0
+    if name in LEGENDARY_CARDS:
+        flags |= FLAG_LEGENDARY
+    if name in DEFAULT_PANTHEON:
+        flags |= FLAG_PANTHEON
+    return flags
+
+
+CARDS = tuple(Card(i, name, _flags(name)) for i, name in enumerate(CARD_ORDER))
+CARDS_BY_NAME = {card.name: card for card in CARDS}
+LEGENDARY_NAMES = frozenset(c.name for c in CARDS if c.is_legendary)
+PANTHEON_NAMES = frozenset(c.name for c in CARDS if c.is_pantheon)
+
+# Bit i is set when card id i has the flag
+LEGENDARY_MASK = sum(1 << c.id for c in CARDS if c.is_legendary)
+PANTHEON_MASK = sum(1 << c.id for c in CARDS if c.is_pantheon)
+
+
+def card(name: str):
+    return CARDS_BY_NAME.get(name)
+
+
+def card_id(name: str):
+    found = CARDS_BY_NAME.get(name)
+    return found.id if found else None
+
+
+def is_legendary(name: str) -> bool:
+    return name in LEGENDARY_NAMES
+
+
+def is_legendary_id(id_: int) -> bool:
+    return bool(LEGENDARY_MASK >> id_ & 1)
+
+
+def deck_mask(names) -> int:
+    """Bitmask of the card ids in a deck (unknown names are ignored)"""
+    mask = 0
+    for name in names:
+        found = CARDS_BY_NAME.get(name)
+        if found:
+            mask |= 1 << found.id
+    return mask
+
+
+# ============================================================================
+# PREBUILT SELECT OPTIONS (shared by every view; never mutate them)
+# ============================================================================
+
+def _card_option(c: Card) -> discord.SelectOption:
+    return discord.SelectOption(label=c.name, value=c.name, emoji="⭐" if c.is_legendary else None)
+
+
+_SORTED_CARDS = sorted(CARDS, key=lambda c: c.name)
+
+CARD_OPTION_PAGES = tuple(
+    tuple(_card_option(c) for c in _SORTED_CARDS[i:i + SELECT_PAGE_SIZE])
+    for i in range(0, len(_SORTED_CARDS), SELECT_PAGE_SIZE)
+)
+
+LEVEL_OPTIONS = tuple(
+    discord.SelectOption(label=f"Level {level}", value=str(level))
+    for level in range(1, MAX_LEVEL + 1)
+)
+
+LEGENDARY_LEVEL_OPTIONS = LEVEL_OPTIONS + tuple(
+    discord.SelectOption(label=f"Reincarnated {roman} ({level})", value=str(level))
+    for roman, level in (("I", 16), ("II", 17), ("III", 18))
+)
+
+
+def card_options(page: int) -> list:
+    """Card options for a select menu page (0-based); a fresh list of shared options"""
+    return list(CARD_OPTION_PAGES[page])
+
+
+def level_options(legendary: bool) -> list:
+    return list(LEGENDARY_LEVEL_OPTIONS if legendary else LEVEL_OPTIONS)
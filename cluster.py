@@ -0,0 +1,220 @@
+"""cluster.py - Sharded, multi-process deployment
+
+Single process (default): nothing changes.
+
+Sharded: set SHARD_COUNT (a number or "auto") and the bot runs as an
+AutoShardedBot. To spread shards over several processes, run
+
+    python cluster.py            # CLUSTER_COUNT processes, default: CPU count
+
+Every process gets CLUSTER_ID/CLUSTER_COUNT/SHARD_COUNT in its environment and
+owns the shards with `shard_id % CLUSTER_COUNT == CLUSTER_ID`. A guild lives
+on exactly one shard, so per-guild state (sessions, caches, outbox buckets)
+stays inside the process that owns it. Cluster 0 is the primary: it owns the
+web dashboard and the public web API, and it proxies snapshot requests for
+other clusters' guilds to their internal API port.
+
+Processes tell each other to drop stale caches over UDP on localhost
+(InvalidationBus); no external broker is needed.
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
+
+# Base UDP port for the invalidation bus; cluster N listens on BUS_BASE_PORT + N
+BUS_BASE_PORT = int(os.getenv('CLUSTER_BUS_PORT', '47600'))
+
+# Seconds to wait before restarting a crashed cluster process (doubles up to the max)
+RESTART_BACKOFF = 5.0
+MAX_RESTART_BACKOFF = 120.0
+
+
+def shard_id_for(guild_id: int, shard_count: int) -> int:
+    """Discord's shard formula"""
+    return (guild_id >> 22) % shard_count
+
+
+@dataclass(frozen=True)
+class ClusterConfig:
+    cluster_id: int = 0
+    cluster_count: int = 1
+    shard_count: Optional[int] = None        # None = not sharded / let Discord decide
+    shard_ids: Optional[Tuple[int, ...]] = field(default=None)
+
+    @classmethod
+    def from_env(cls) -> 'ClusterConfig':
+        raw_shards = os.getenv('SHARD_COUNT')
+        cluster_count = int(os.getenv('CLUSTER_COUNT', '1'))
+        cluster_id = int(os.getenv('CLUSTER_ID', '0'))
+        shard_count = int(raw_shards) if raw_shards and raw_shards != 'auto' else None
+        shard_ids = None
+        if shard_count and cluster_count > 1:
+            shard_ids = tuple(s for s in range(shard_count) if s % cluster_count == cluster_id)
+        return cls(cluster_id, cluster_count, shard_count, shard_ids)
+
+    @property
+    def sharded(self) -> bool:
+        return self.shard_count is not None or os.getenv('SHARD_COUNT') == 'auto'
+
+    @property
+    def is_primary(self) -> bool:
+        return self.cluster_id == 0
+
+    def cluster_for_guild(self, guild_id: int) -> int:
+        if not self.shard_count or self.cluster_count == 1:
+            return 0
+        return shard_id_for(guild_id, self.shard_count) % self.cluster_count
+
+    def owns_guild(self, guild_id: int) -> bool:
+        return self.cluster_for_guild(guild_id) == self.cluster_id
+
+    def request_share(self, limit: int) -> int:
+        """This process's share of a limit that applies to the whole bot token"""
+        return max(1, limit // self.cluster_count)
+
+
+cluster = ClusterConfig.from_env()
+
+
+# ============================================================================
+# CROSS-PROCESS CACHE INVALIDATION
+# ============================================================================
+
+class InvalidationBus(asyncio.DatagramProtocol):
+    """Fire-and-forget invalidation messages between cluster processes
+
+    `publish(topic, guild_id)` runs the local handlers for the topic and sends
+    the message to every other cluster. Messages are tiny JSON datagrams on
+    127.0.0.1, so a cluster that is down simply misses them; caches are
+    rebuilt from the database on the next miss anyway.
+    """
+
+    def __init__(self, config: ClusterConfig = cluster):
+        self.config = config
+        self._handlers = {}
+        self._transport = None
+        self.received = 0
+
+    def subscribe(self, topic: str, handler):
+        """`handler(guild_id)` runs for every message on `topic`, local or remote"""
+        self._handlers.setdefault(topic, []).append(handler)
+
+    def _dispatch(self, topic: str, guild_id):
+        for handler in self._handlers.get(topic, ()):
+            try:
+                handler(guild_id)
+            except Exception as e:
+                print(f"⚠️ Invalidation handler for {topic} failed: {e}")
+
+    def publish(self, topic: str, guild_id: int = None, local: bool = True):
+        """Tell every cluster; `local=False` skips this process (its caches are already current)"""
+        if local:
+            self._dispatch(topic, guild_id)
+        if self._transport is None:
+            return
+        payload = json.dumps({'topic': topic, 'guild_id': guild_id, 'from': self.config.cluster_id}).encode()
+        for other in range(self.config.cluster_count):
+            if other != self.config.cluster_id:
+                self._transport.sendto(payload, ('127.0.0.1', BUS_BASE_PORT + other))
+
+    def datagram_received(self, data: bytes, addr):
+        try:
+            message = json.loads(data)
+        except ValueError:
+            return
+        if message.get('from') == self.config.cluster_id:
+            return
+        self.received += 1
+        self._dispatch(message.get('topic'), message.get('guild_id'))
+
+    async def start(self):
+        """Listen for other clusters (no-op in single-process mode)"""
+        if self.config.cluster_count == 1 or self._transport is not None:
+            return
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: self,
+            local_addr=('127.0.0.1', BUS_BASE_PORT + self.config.cluster_id)
+        )
+
+    def close(self):
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+
+invalidation_bus = InvalidationBus()
+
+
+# ============================================================================
+# LAUNCHER
+# ============================================================================
+
+async def _recommended_shards(token: str) -> int:
+    from aiohttp import ClientSession
+    async with ClientSession() as session:
+        async with session.get(
+            'https://discord.com/api/v10/gateway/bot',
+            headers={'Authorization': f'Bot {token}'}
+        ) as response:
+            response.raise_for_status()
+            return (await response.json())['shards']
+
+
+def launch(cluster_count: int = None, shard_count: int = None, script: str = 'TournamentBot.py'):
+    """Run `cluster_count` bot processes and restart any that exit"""
+    cluster_count = cluster_count or int(os.getenv('CLUSTER_COUNT', '0')) or os.cpu_count() or 1
+    if shard_count is None:
+        raw = os.getenv('SHARD_COUNT', 'auto')
+        if raw == 'auto':
+            shard_count = asyncio.run(_recommended_shards(os.environ['DISCORD_TOKEN']))
+        else:
+            shard_count = int(raw)
+    # Never start more processes than shards
+    cluster_count = max(1, min(cluster_count, shard_count))
+    print(f"🚀 Launching {cluster_count} cluster(s) for {shard_count} shard(s)")
+
+    def spawn(cluster_id: int) -> subprocess.Popen:
+        env = dict(os.environ, CLUSTER_ID=str(cluster_id), CLUSTER_COUNT=str(cluster_count),
+                   SHARD_COUNT=str(shard_count))
+        return subprocess.Popen([sys.executable, script], env=env)
+
+    processes = {cid: spawn(cid) for cid in range(cluster_count)}
+    backoff = {cid: RESTART_BACKOFF for cid in processes}
+    restart_at = {}
+    try:
+        while True:
+            time.sleep(1)
+            now = time.monotonic()
+            for cid, process in processes.items():
+                if process.poll() is None:
+                    continue
+                if cid not in restart_at:
+                    print(f"⚠️ Cluster {cid} exited with {process.returncode}; restarting in {backoff[cid]:.0f}s")
+                    restart_at[cid] = now + backoff[cid]
+                    backoff[cid] = min(backoff[cid] * 2, MAX_RESTART_BACKOFF)
+                elif now >= restart_at[cid]:
+                    del restart_at[cid]
+                    processes[cid] = spawn(cid)
+    except KeyboardInterrupt:
+        print("\n⚠️ Stopping clusters...")
+    finally:
+        for process in processes.values():
+            process.terminate()
+        for process in processes.values():
+            process.wait()
+
+
+if __name__ == "__main__":
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+    launch()
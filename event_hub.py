@@ -0,0 +1,108 @@
+"""event_hub.py - Live dashboard events fanned out to Server-Sent Events clients
+
+Publishing encodes an event once into an SSE frame, appends it to the
+guild's ring buffer and wakes every waiting client through one shared
+asyncio.Event. Each client then copies the frames it has not seen yet, so
+one publish serves every open tab, and no client ever reads bot state.
+
+Clients that reconnect with Last-Event-ID are resumed from the ring buffer;
+if they fell further behind than SSE_BACKLOG events (or the bot restarted)
+they get a `resync` event and reload their snapshots instead.
+"""
+
+import asyncio
+import json
+from collections import deque
+from itertools import islice
+
+SSE_BACKLOG = 256        # events kept per guild for resuming clients
+SSE_HEARTBEAT = 15.0     # seconds between keep-alive comments on idle streams
+SSE_RETRY_MS = 3000      # reconnect delay suggested to browsers
+MAX_SSE_CLIENTS = 5000   # open streams per process
+
+RESYNC_FRAME = b'event: resync\ndata: {}\n\n'
+HEARTBEAT_FRAME = b': ping\n\n'
+
+
+class GuildStream:
+    """Ring buffer of encoded frames for one guild plus a shared wakeup"""
+
+    def __init__(self, backlog: int = SSE_BACKLOG):
+        self.frames = deque(maxlen=backlog)   # (id, frame bytes)
+        self.seq = 0
+        self.subscribers = 0
+        self._changed = asyncio.Event()
+
+    def publish(self, event: str, data: dict) -> int:
+        self.seq += 1
+        payload = json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=str)
+        self.frames.append((self.seq, f"id: {self.seq}\nevent: {event}\ndata: {payload}\n\n".encode('utf-8')))
+        # Swap the event first so clients woken now wait on the next one
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+        return self.seq
+
+    def since(self, seq: int):
+        """(frames after `seq`, True if some were already dropped or `seq` is unknown)"""
+        if seq > self.seq:
+            return [], True
+        if seq == self.seq or not self.frames:
+            return [], False
+        first = self.frames[0][0]
+        gap = seq + 1 < first
+        return [frame for _, frame in islice(self.frames, max(0, seq + 1 - first), None)], gap
+
+    async def wait(self, seq: int, timeout: float) -> bool:
+        """Wait until something newer than `seq` is published; False on timeout"""
+        if self.seq > seq:
+            return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+class EventHub:
+    def __init__(self, backlog: int = SSE_BACKLOG, heartbeat: float = SSE_HEARTBEAT):
+        self.backlog = backlog
+        self.heartbeat = heartbeat
+        self._streams = {}
+        self.clients = 0
+        self.published = 0
+
+    def stream(self, guild_id: int) -> GuildStream:
+        stream = self._streams.get(guild_id)
+        if stream is None:
+            stream = self._streams[guild_id] = GuildStream(self.backlog)
+        return stream
+
+    def publish(self, guild_id: int, event: str, data: dict) -> int:
+        """Queue an event for every client of the guild (cheap; never awaits)"""
+        self.published += 1
+        return self.stream(guild_id).publish(event, data)
+
+    async def frames(self, guild_id: int, last_event_id: int = None):
+        """Bytes to write to one SSE client, forever (until the client goes away)"""
+        stream = self.stream(guild_id)
+        seq = stream.seq if last_event_id is None else last_event_id
+        stream.subscribers += 1
+        self.clients += 1
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n".encode()
+            while True:
+                frames, gap = stream.since(seq)
+                if gap:
+                    frames.insert(0, RESYNC_FRAME)
+                seq = stream.seq
+                if frames:
+                    yield b''.join(frames)
+                if not await stream.wait(seq, self.heartbeat):
+                    yield HEARTBEAT_FRAME
+        finally:
+            stream.subscribers -= 1
+            self.clients -= 1
+
+
+# Shared hub; intake and approvals publish, the web API streams
+event_hub = EventHub()
@@ -0,0 +1,221 @@
+"""export_codec.py - Versioned compact export codes (with legacy CSV support)
+
+v2 layout, before base64url encoding:
+
+    version byte (2)
+    varints   crit, legendarity, perks, hero level, hero item level (0 = none)
+    5 cards   varint card id + 1 (0 = empty slot), varint level
+    strings   game username, game id, timezone, community, hero, hero item
+              (each a varint byte length followed by UTF-8)
+    crc32     4 bytes, big endian, over everything above
+
+The code is EXPORT_PREFIX followed by the unpadded base64url payload.
+registration.js has the same encoder/decoder. Legacy codes are the 21-field
+comma string the site produced before v2.
+"""
+
+import base64
+import zlib
+
+from card_catalog import CARDS, CARDS_BY_NAME
+from registration_records import RegistrationRecord
+
+EXPORT_VERSION = 2
+EXPORT_PREFIX = "T2."
+DECK_SIZE = 5
+LEGACY_FIELD_COUNT = 21
+
+_STRING_FIELDS = ('game_username', 'game_id', 'timezone', 'community', 'hero', 'hero_item')
+
+
+class ExportCodeError(ValueError):
+    """Raised for export codes that are malformed, corrupted or from an unknown version"""
+
+
+def _put_varint(out: bytearray, value: int):
+    value = int(value or 0)
+    if value < 0:
+        raise ExportCodeError(f"Negative value {value} cannot be encoded")
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+class _Reader:
+    __slots__ = ('data', 'pos')
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def varint(self) -> int:
+        value = shift = 0
+        while True:
+            if self.pos >= len(self.data):
+                raise ExportCodeError("Export code is truncated")
+            byte = self.data[self.pos]
+            self.pos += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def string(self) -> str:
+        length = self.varint()
+        end = self.pos + length
+        if end > len(self.data):
+            raise ExportCodeError("Export code is truncated")
+        raw = self.data[self.pos:end]
+        self.pos = end
+        return raw.decode('utf-8')
+
+
+# ============================================================================
+# ENCODE / DECODE
+# ============================================================================
+
+def encode(fields: dict) -> str:
+    """Encode registration fields (RegistrationRecord names) as a v2 export code"""
+    out = bytearray([EXPORT_VERSION])
+    for key in ('crit_level', 'legendarity', 'perks_level', 'hero_level', 'hero_item_level'):
+        _put_varint(out, fields.get(key))
+
+    cards = list(fields.get('cards') or ())
+    if len(cards) > DECK_SIZE:
+        raise ExportCodeError(f"A deck holds at most {DECK_SIZE} cards")
+    for i in range(DECK_SIZE):
+        if i >= len(cards):
+            _put_varint(out, 0)
+            _put_varint(out, 0)
+            continue
+        card = cards[i]
+        name, level = (card['name'], card['level']) if isinstance(card, dict) else card
+        if not name:
+            _put_varint(out, 0)
+            _put_varint(out, 0)
+            continue
+        found = CARDS_BY_NAME.get(name)
+        if found is None:
+            raise ExportCodeError(f"Unknown card: {name}")
+        _put_varint(out, found.id + 1)
+        _put_varint(out, level)
+
+    for key in _STRING_FIELDS:
+        raw = str(fields.get(key) or '').encode('utf-8')
+        _put_varint(out, len(raw))
+        out += raw
+
+    out += zlib.crc32(out).to_bytes(4, 'big')
+    return EXPORT_PREFIX + base64.urlsafe_b64encode(bytes(out)).rstrip(b'=').decode('ascii')
+
+
+def _decode_v2(code: str) -> dict:
+    payload = code[len(EXPORT_PREFIX):]
+    try:
+        data = base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4))
+    except (ValueError, TypeError):
+        raise ExportCodeError("Export code is not valid base64url")
+    if len(data) < 5:
+        raise ExportCodeError("Export code is truncated")
+    body, checksum = data[:-4], int.from_bytes(data[-4:], 'big')
+    if zlib.crc32(body) != checksum:
+        raise ExportCodeError("Export code checksum does not match (copied incompletely?)")
+    if body[0] != EXPORT_VERSION:
+        raise ExportCodeError(f"Unsupported export code version {body[0]}")
+
+    reader = _Reader(body)
+    reader.pos = 1
+    fields = {
+        'crit_level': reader.varint(),
+        'legendarity': reader.varint(),
+        'perks_level': reader.varint(),
+        'hero_level': reader.varint(),
+        'hero_item_level': reader.varint() or None,
+    }
+
+    cards = []
+    for _ in range(DECK_SIZE):
+        card_ref, level = reader.varint(), reader.varint()
+        if card_ref:
+            if card_ref > len(CARDS):
+                raise ExportCodeError(f"Unknown card id {card_ref - 1}")
+            cards.append((CARDS[card_ref - 1].name, str(level)))
+    fields['cards'] = tuple(cards)
+
+    try:
+        for key in _STRING_FIELDS:
+            fields[key] = reader.string()
+    except UnicodeDecodeError:
+        raise ExportCodeError("Export code contains invalid text")
+    fields['hero_item'] = fields['hero_item'] or None
+    if fields['hero_item'] is None:
+        fields['hero_item_level'] = None
+    return fields
+
+
+def _int_or_zero(value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+
+def _decode_legacy(code: str) -> dict:
+    parts = [p.strip() for p in code.split(',')]
+    if len(parts) < LEGACY_FIELD_COUNT:
+        raise ExportCodeError(f"Legacy export code has {len(parts)} fields, expected {LEGACY_FIELD_COUNT}")
+
+    # Extra commas can only be told apart by position; the community name is the
+    # free-text field most likely to contain them, so it absorbs the surplus
+    head, tail = parts[:6], parts[-14:]
+    community = ','.join(parts[6:-14])
+
+    cards = tuple(
+        (tail[4 + i * 2], tail[5 + i * 2])
+        for i in range(DECK_SIZE) if tail[4 + i * 2]
+    )
+    hero_item = tail[2] if tail[2] and tail[2] != 'None' else None
+    return {
+        'game_username': head[0],
+        'game_id': head[1],
+        'crit_level': _int_or_zero(head[2]),
+        'legendarity': _int_or_zero(head[3]),
+        'perks_level': _int_or_zero(head[4]),
+        'timezone': head[5],
+        'community': community,
+        'hero': tail[0],
+        'hero_level': _int_or_zero(tail[1]) or 1,
+        'hero_item': hero_item,
+        'hero_item_level': (_int_or_zero(tail[3]) or None) if hero_item else None,
+        'cards': cards,
+    }
+
+
+def is_compact(code: str) -> bool:
+    return code.startswith(EXPORT_PREFIX) and ',' not in code
+
+
+def decode(code: str) -> dict:
+    """Registration fields from a v2 or legacy CSV export code"""
+    code = (code or '').strip().strip('`').strip()
+    if not code:
+        raise ExportCodeError("Export code is empty")
+    if is_compact(code):
+        return _decode_v2(code)
+    return _decode_legacy(code)
+
+
+def encode_record(record: RegistrationRecord) -> str:
+    return encode({
+        key: getattr(record, key)
+        for key in ('crit_level', 'legendarity', 'perks_level', 'hero_level', 'hero_item_level',
+                    'cards') + _STRING_FIELDS
+    })
+
+
+def decode_record(code: str, discord_id: int, guild_id: int = 0, username: str = '') -> RegistrationRecord:
+    """A RegistrationRecord for an export code (strength and division are not computed here)"""
+    record = RegistrationRecord(discord_id=discord_id, guild_id=guild_id, username=username, **decode(code))
+    record.export_code = code.strip()
+    return record
@@ -0,0 +1,166 @@
+"""member_cache.py - On-demand member/user lookups for bots that skip member chunking
+
+With LAZY_MEMBER_CHUNKING=1 the bot does not download every member list at
+startup. Members are resolved when needed: first from discord.py's own cache,
+then from a bounded LRU/TTL cache, and finally through gateway
+`query_members` calls that batch concurrent misses per guild (up to 100 ids
+per request). A member who has left the guild resolves to None.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+
+import discord
+
+LAZY_MEMBER_CHUNKING = os.getenv('LAZY_MEMBER_CHUNKING', '0') == '1'
+
+MEMBER_CACHE_SIZE = 10000
+MEMBER_CACHE_TTL = 15 * 60        # seconds
+QUERY_BATCH_SIZE = 100            # Discord's limit for query_members(user_ids=...)
+QUERY_BATCH_DELAY = 0.05          # seconds to collect misses before querying
+
+
+class _LRU:
+    __slots__ = ('max_size', 'ttl', '_items')
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items = OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        entry = self._items.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._items[key] = (value, time.monotonic() + self.ttl)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def pop(self, key):
+        self._items.pop(key, None)
+
+    def clear(self):
+        self._items.clear()
+
+
+class MemberCache:
+    """Bounded member and user cache with batched gateway lookups"""
+
+    def __init__(self, max_size: int = MEMBER_CACHE_SIZE, ttl: float = MEMBER_CACHE_TTL,
+                 batch_delay: float = QUERY_BATCH_DELAY):
+        self._members = _LRU(max_size, ttl)
+        self._users = _LRU(max_size, ttl)
+        self.batch_delay = batch_delay
+        self._pending = {}   # guild_id -> {user_id: future}
+        self._flushers = {}  # guild_id -> task (keeps a reference while it runs)
+        self.hits = 0
+        self.misses = 0
+        self.queries = 0
+
+    # ------------------------------------------------------------------
+    # Members
+    # ------------------------------------------------------------------
+
+    def remember(self, member: discord.Member):
+        self._members.put((member.guild.id, member.id), member)
+        self._users.put(member.id, member)
+
+    def forget(self, guild_id: int, user_id: int):
+        self._members.pop((guild_id, user_id))
+
+    def cached_member(self, guild: discord.Guild, user_id: int):
+        """Member from discord.py's cache or ours, without any network call"""
+        return guild.get_member(user_id) or self._members.get((guild.id, user_id))
+
+    async def get_member(self, guild: discord.Guild, user_id: int):
+        """Resolve a member, querying the gateway on a miss; None if not in the guild"""
+        member = self.cached_member(guild, user_id)
+        if member is not None:
+            self.hits += 1
+            return member
+        self.misses += 1
+
+        waiting = self._pending.get(guild.id)
+        if waiting is None:
+            # First miss of a new batch for this guild schedules its query
+            waiting = self._pending[guild.id] = {}
+            self._flushers[guild.id] = asyncio.create_task(self._flush(guild))
+        future = waiting.get(user_id)
+        if future is None:
+            future = waiting[user_id] = asyncio.get_running_loop().create_future()
+        return await asyncio.shield(future)
+
+    async def prefetch(self, guild: discord.Guild, user_ids) -> int:
+        """Warm the cache for many members at once; returns how many were found"""
+        members = await asyncio.gather(*(self.get_member(guild, uid) for uid in set(user_ids)))
+        return sum(member is not None for member in members)
+
+    async def _flush(self, guild: discord.Guild):
+        await asyncio.sleep(self.batch_delay)
+        waiting = self._pending.pop(guild.id, {})
+        ids = list(waiting)
+        try:
+            for start in range(0, len(ids), QUERY_BATCH_SIZE):
+                chunk = ids[start:start + QUERY_BATCH_SIZE]
+                found = await self._query(guild, chunk)
+                for user_id in chunk:
+                    future = waiting[user_id]
+                    if not future.done():
+                        future.set_result(found.get(user_id))
+        except Exception as e:
+            for future in waiting.values():
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # A later miss may already have scheduled the next flush for this guild
+            if self._flushers.get(guild.id) is asyncio.current_task():
+                del self._flushers[guild.id]
+
+    async def _query(self, guild: discord.Guild, user_ids: list) -> dict:
+        self.queries += 1
+        try:
+            members = await guild.query_members(user_ids=user_ids, limit=len(user_ids), cache=False)
+        except (asyncio.TimeoutError, discord.ClientException):
+            # Gateway query unavailable; fall back to one REST call per member
+            members = []
+            for user_id in user_ids:
+                try:
+                    members.append(await guild.fetch_member(user_id))
+                except discord.NotFound:
+                    continue
+        for member in members:
+            self.remember(member)
+        return {member.id: member for member in members}
+
+    # ------------------------------------------------------------------
+    # Users (for DMs)
+    # ------------------------------------------------------------------
+
+    async def get_user(self, client: discord.Client, user_id: int):
+        user = client.get_user(user_id) or self._users.get(user_id)
+        if user is None:
+            user = await client.fetch_user(user_id)
+            self._users.put(user_id, user)
+        return user
+
+    def clear(self):
+        self._members.clear()
+        self._users.clear()
+
+
+# Shared cache used by the approval flow
+member_cache = MemberCache()
@@ -0,0 +1,274 @@
+"""metrics.py - In-process latency histograms, gauges and Prometheus text output
+
+Interaction handlers record where their time goes with an InteractionSpan:
+
+    span = start_interaction('approve_browser_reg')
+    await interaction.response.defer()
+    span.deferred()
+    with span.phase('db'):
+        ...
+    span.finish()
+
+This records four histograms per component: time to defer, DB time, REST
+time and total handler time. Gauges are callbacks that are read when the
+metrics are rendered (queue depths, cache sizes, event-loop lag).
+"""
+
+import asyncio
+import atexit
+import bisect
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LOOP_LAG_INTERVAL = 0.5   # seconds between event-loop lag samples
+
+
+def _label_text(labels: tuple) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+
+class Histogram:
+    """Fixed-bucket histogram per label set (Prometheus semantics)"""
+
+    def __init__(self, name: str, help_text: str, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}   # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(sorted(labels.items())))
+        return sum(series[:-1]) if series else 0
+
+    def quantile(self, q: float, **labels):
+        """Upper bound of the bucket holding the q-quantile (None if no samples)"""
+        series = self._series.get(tuple(sorted(labels.items())))
+        if not series:
+            return None
+        target = q * sum(series[:-1])
+        running = 0
+        for i, n in enumerate(series[:-1]):
+            running += n
+            if running >= target and n:
+                return self.buckets[i] if i < len(self.buckets) else float('inf')
+        return None
+
+    def label_sets(self) -> list:
+        return [dict(key) for key in self._series]
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        for key, series in sorted(self._series.items()):
+            running = 0
+            for bound, n in zip(self.buckets + (float('inf'),), series[:-1]):
+                running += n
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{self.name}_bucket{_label_text(key + (("le", le),))} {running}')
+            lines.append(f'{self.name}_sum{_label_text(key)} {series[-1]:.6f}')
+            lines.append(f'{self.name}_count{_label_text(key)} {running}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+
+    def inc(self, amount: int = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> int:
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def total(self) -> int:
+        """Sum over every label set"""
+        return sum(self._values.values())
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        lines += [f'{self.name}{_label_text(key)} {v}' for key, v in sorted(self._values.items())]
+        return lines
+
+
+class Gauge:
+    """Value read from a callback at render time"""
+
+    def __init__(self, name: str, help_text: str, read):
+        self.name = name
+        self.help = help_text
+        self.read = read
+
+    def value(self):
+        try:
+            return float(self.read())
+        except Exception:
+            return float('nan')
+
+    def render(self) -> list:
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} gauge', f'{self.name} {self.value():g}']
+
+
+class ReadCounter(Gauge):
+    """Running total kept elsewhere, read at render time and exposed as a counter"""
+
+    def render(self) -> list:
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter', f'{self.name} {self.value():g}']
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+
+    def histogram(self, name: str, help_text: str, buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help_text, buckets))
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, help_text))
+
+    def gauge(self, name: str, help_text: str, read) -> Gauge:
+        gauge = self._metrics[name] = Gauge(name, help_text, read)
+        return gauge
+
+    def read_counter(self, name: str, help_text: str, read) -> ReadCounter:
+        counter = self._metrics[name] = ReadCounter(name, help_text, read)
+        return counter
+
+    def gauges(self) -> list:
+        return [m for m in self._metrics.values() if isinstance(m, Gauge)]
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+INTERACTION_PHASES = ('defer', 'db', 'rest', 'total')
+interaction_seconds = registry.histogram(
+    'bot_interaction_seconds', 'Interaction handler latency by component and phase'
+)
+interaction_errors = registry.counter(
+    'bot_interaction_errors_total', 'Interaction handlers that raised'
+)
+loop_lag_seconds = registry.histogram(
+    'bot_event_loop_lag_seconds', 'How late the event loop ran a scheduled wakeup',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+
+# ============================================================================
+# INTERACTION SPANS
+# ============================================================================
+
+class InteractionSpan:
+    __slots__ = ('component', 'started', 'defer_at', 'times', 'finished')
+
+    def __init__(self, component: str):
+        self.component = component
+        self.started = time.perf_counter()
+        self.defer_at = None
+        self.times = {'db': 0.0, 'rest': 0.0}
+        self.finished = False
+
+    def deferred(self):
+        """Call right after the interaction was acknowledged (defer or first response)"""
+        if self.defer_at is None:
+            self.defer_at = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[name] = self.times.get(name, 0.0) + time.perf_counter() - start
+
+    def error(self):
+        interaction_errors.inc(component=self.component)
+
+    def finish(self):
+        if self.finished:
+            return
+        self.finished = True
+        end = time.perf_counter()
+        if self.defer_at is not None:
+            interaction_seconds.observe(self.defer_at - self.started, component=self.component, phase='defer')
+        for name, seconds in self.times.items():
+            interaction_seconds.observe(seconds, component=self.component, phase=name)
+        interaction_seconds.observe(end - self.started, component=self.component, phase='total')
+
+
+def start_interaction(component: str) -> InteractionSpan:
+    return InteractionSpan(component)
+
+
+# ============================================================================
+# EVENT LOOP LAG
+# ============================================================================
+
+class LoopLagMonitor:
+    """Samples how late asyncio.sleep wakes up; a busy loop shows up as lag"""
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL):
+        self.interval = interval
+        self.last = 0.0
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last = max(0.0, loop.time() - expected)
+            loop_lag_seconds.observe(self.last)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="loop-lag-monitor")
+
+
+loop_lag = LoopLagMonitor()
+registry.gauge('bot_event_loop_lag_last_seconds', 'Most recent event-loop lag sample', lambda: loop_lag.last)
+
+
+# ============================================================================
+# QUEUED LOGGER
+# ============================================================================
+
+def _queued_logger(name: str) -> logging.Logger:
+    """Logger whose handler only enqueues; a background thread does the writing"""
+    log_queue = queue.SimpleQueue()
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(logging.Formatter('%(message)s'))
+    listener = logging.handlers.QueueListener(log_queue, stream)
+    listener.start()
+    atexit.register(listener.stop)
+
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.propagate = False
+    return logger
+
+
+log = _queued_logger('tournament_bot')
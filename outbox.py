@@ -0,0 +1,260 @@
+"""outbox.py - Rate-limit-aware background queue for Discord side effects"""
+
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+
+import discord
+
+from metrics import log
+
+# (requests, per seconds) for each bucket prefix, kept under Discord's route limits
+BUCKET_LIMITS = {
+    'channel': (5, 5.0),    # message posts/edits per channel
+    'roles': (10, 10.0),    # role grants per guild
+    'dm': (5, 5.0),         # DM channel opens + sends
+    'guild': (5, 5.0),      # channel create/delete per guild
+}
+DEFAULT_LIMIT = (5, 5.0)
+
+# Shared across every bucket, below Discord's global 50 requests/second
+GLOBAL_LIMIT = (40, 1.0)
+
+MAX_ATTEMPTS = 5
+BASE_BACKOFF = 1.0   # seconds, doubled per attempt
+MAX_BACKOFF = 60.0
+
+# Idle buckets are dropped at most this often, once their limiter holds no state
+BUCKET_SWEEP_INTERVAL = 60.0   # seconds
+
+
+def channel_bucket(channel_id: int) -> str:
+    return f"channel:{channel_id}"
+
+
+def roles_bucket(guild_id: int) -> str:
+    return f"roles:{guild_id}"
+
+
+def guild_bucket(guild_id: int) -> str:
+    return f"guild:{guild_id}"
+
+
+DM_BUCKET = "dm"
+
+
+class RateLimiter:
+    """Sliding-window limiter for one bucket"""
+
+    def __init__(self, limit: int, per: float):
+        self.limit = limit
+        self.per = per
+        self._sent = []
+        self.blocked_until = 0.0
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                await asyncio.sleep(self.blocked_until - now)
+                continue
+            self._sent = [t for t in self._sent if now - t < self.per]
+            if len(self._sent) < self.limit:
+                self._sent.append(now)
+                return
+            await asyncio.sleep(self.per - (now - self._sent[0]))
+
+    def block_for(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def is_idle(self, now: float) -> bool:
+        """True once the backoff and the last request's window have both expired"""
+        return now >= self.blocked_until and (not self._sent or now - self._sent[-1] >= self.per)
+
+
+class OutboxTracker:
+    """Counts the jobs one caller enqueued, so it can wait for just those
+
+    `on_failed()` is called whenever one of them gives up.
+    """
+
+    def __init__(self, on_failed=None):
+        self.queued = 0
+        self.sent = 0
+        self.failed = 0
+        self.on_failed = on_failed
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @property
+    def remaining(self) -> int:
+        return self.queued - self.sent - self.failed
+
+    def _add(self):
+        self.queued += 1
+        self._idle.clear()
+
+    def _finish(self, ok: bool):
+        if ok:
+            self.sent += 1
+        else:
+            self.failed += 1
+            if self.on_failed is not None:
+                self.on_failed()
+        if not self.remaining:
+            self._idle.set()
+
+    async def wait(self, timeout: float = None) -> bool:
+        """Wait until every tracked job finished; False if `timeout` passed first"""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+class OutboxJob:
+    """One queued side effect; `factory` returns a fresh coroutine per attempt"""
+
+    __slots__ = ('bucket', 'key', 'factory', 'description', 'attempts', 'trackers')
+
+    def __init__(self, bucket, key, factory, description):
+        self.bucket = bucket
+        self.key = key
+        self.factory = factory
+        self.description = description
+        self.attempts = 0
+        self.trackers = []
+
+    def finish(self, ok: bool):
+        for tracker in self.trackers:
+            tracker._finish(ok)
+
+
+class _Bucket:
+    __slots__ = ('pending', 'limiter', 'worker')
+
+    def __init__(self, limiter: RateLimiter):
+        self.pending = OrderedDict()
+        self.limiter = limiter
+        self.worker = None
+
+
+def _retry_after(error: Exception):
+    """Seconds to wait before retrying, or None if the error is permanent"""
+    if isinstance(error, (discord.Forbidden, discord.NotFound)):
+        return None
+    if isinstance(error, discord.HTTPException):
+        if error.status == 429:
+            retry_after = getattr(error, 'retry_after', None)
+            if retry_after is None and error.response is not None:
+                retry_after = float(error.response.headers.get('Retry-After', 0) or 0)
+            return retry_after or BASE_BACKOFF
+        if error.status < 500:
+            return None
+    return 0.0
+
+
+class Outbox:
+    """Per-bucket job queues drained by background workers.
+
+    Jobs enqueued with the same key while still pending are coalesced: the
+    newest factory replaces the old one but keeps its place in the queue.
+    """
+
+    def __init__(self, limits: dict = None, max_attempts: int = MAX_ATTEMPTS,
+                 global_limit: tuple = GLOBAL_LIMIT):
+        self.limits = limits or BUCKET_LIMITS
+        self.max_attempts = max_attempts
+        self.global_limiter = RateLimiter(*global_limit)
+        self._buckets = {}
+        self._swept_at = time.monotonic()
+        self._ids = itertools.count()
+        self.sent = 0
+        self.failed = 0
+        self.coalesced = 0
+
+    def _bucket(self, name: str) -> _Bucket:
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            self._sweep()
+            limit, per = self.limits.get(name.split(':', 1)[0], DEFAULT_LIMIT)
+            bucket = self._buckets[name] = _Bucket(RateLimiter(limit, per))
+        return bucket
+
+    def _sweep(self):
+        """Drop idle buckets so per-channel state does not accumulate"""
+        now = time.monotonic()
+        if now - self._swept_at < BUCKET_SWEEP_INTERVAL:
+            return
+        self._swept_at = now
+        # A bucket still inside its window or backoff keeps its limiter
+        idle = [name for name, b in self._buckets.items()
+                if not b.pending and (b.worker is None or b.worker.done()) and b.limiter.is_idle(now)]
+        for name in idle:
+            del self._buckets[name]
+
+    def enqueue(self, bucket: str, factory, key: str = None, description: str = '',
+                tracker: OutboxTracker = None):
+        """Queue a side effect without waiting for it"""
+        state = self._bucket(bucket)
+        key = key or f"job:{next(self._ids)}"
+
+        job = state.pending.get(key)
+        if job is not None:
+            job.factory = factory
+            self.coalesced += 1
+        else:
+            job = state.pending[key] = OutboxJob(bucket, key, factory, description or key)
+        if tracker is not None:
+            tracker._add()
+            job.trackers.append(tracker)
+
+        if state.worker is None or state.worker.done():
+            state.worker = asyncio.create_task(self._drain(state), name=f"outbox:{bucket}")
+
+    @property
+    def depth(self) -> int:
+        return sum(len(b.pending) for b in self._buckets.values())
+
+    async def _drain(self, state: _Bucket):
+        while state.pending:
+            key, job = state.pending.popitem(last=False)
+            await state.limiter.acquire()
+            await self.global_limiter.acquire()
+            job.attempts += 1
+            try:
+                await job.factory()
+                self.sent += 1
+                job.finish(True)
+                continue
+            except Exception as e:
+                delay = _retry_after(e)
+                if delay is None or job.attempts >= self.max_attempts:
+                    self.failed += 1
+                    job.finish(False)
+                    log.error(f"❌ Outbox job failed ({job.description}): {e}")
+                    continue
+
+            # Back off (Retry-After for 429s, exponential otherwise), then retry
+            # unless a newer job with the same key replaced it
+            backoff = delay or min(MAX_BACKOFF, BASE_BACKOFF * 2 ** (job.attempts - 1))
+            state.limiter.block_for(backoff)
+            if key not in state.pending:
+                state.pending[key] = job
+                state.pending.move_to_end(key, last=False)
+            else:
+                state.pending[key].trackers.extend(job.trackers)
+
+    async def flush(self):
+        """Wait until every queued job has been attempted"""
+        while True:
+            workers = [b.worker for b in self._buckets.values() if b.worker and not b.worker.done()]
+            if not workers:
+                return
+            await asyncio.gather(*workers, return_exceptions=True)
+
+
+# Shared outbox used by the cogs
+outbox = Outbox()
@@ -0,0 +1,203 @@
+"""participant_export.py - Streaming roster export (CSV / JSONL / CSV per division)
+
+Participants are read from the database one page at a time and each row is
+written straight into a spooled temporary file, so memory stays flat however
+large the guild is. Output that would exceed the guild's upload limit is
+split into numbered parts, each a complete file with its own header.
+"""
+
+import csv
+import io
+import json
+import tempfile
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from async_database import async_db
+
+# Bytes kept in memory per output file before it spills to disk
+SPOOL_MAX_MEMORY = 1024 * 1024
+
+# Headroom left under the guild upload limit for the multipart envelope
+UPLOAD_MARGIN = 64 * 1024
+
+DECK_SIZE = 5
+
+PARTICIPANT_COLUMNS = [
+    'discord_id', 'username', 'game_username', 'game_id', 'community', 'timezone',
+    'division', 'total_strength', 'crit_level', 'legendarity', 'perks_level',
+    'hero', 'hero_level', 'hero_item', 'hero_item_level',
+]
+COLUMNS = PARTICIPANT_COLUMNS + [f'card{i}_{part}' for i in range(1, DECK_SIZE + 1) for part in ('name', 'level')]
+
+
+def _cards(participant: dict) -> list:
+    cards = participant.get('cards') or []
+    if isinstance(cards, str):
+        try:
+            cards = json.loads(cards)
+        except ValueError:
+            cards = []
+    return [c if isinstance(c, dict) else {'name': c[0], 'level': c[1]} for c in cards]
+
+
+def participant_row(participant: dict) -> list:
+    """One flat CSV row in COLUMNS order"""
+    row = [participant.get(column) for column in PARTICIPANT_COLUMNS]
+    cards = _cards(participant)
+    for i in range(DECK_SIZE):
+        card = cards[i] if i < len(cards) else {}
+        row.append(card.get('name'))
+        row.append(card.get('level'))
+    return ['' if value is None else value for value in row]
+
+
+def participant_record(participant: dict) -> dict:
+    """One JSONL object; cards stay a nested list"""
+    record = {column: participant.get(column) for column in PARTICIPANT_COLUMNS}
+    record['cards'] = _cards(participant)
+    return record
+
+
+class SplitFile:
+    """Append-only output split into spooled parts that each fit under `limit` bytes"""
+
+    def __init__(self, filename: str, limit: int, header: bytes = b''):
+        self.filename = filename
+        self.limit = limit
+        self.header = header
+        self.rows = 0
+        self._parts = []
+        self._size = 0
+
+    def _new_part(self):
+        part = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+        part.write(self.header)
+        self._parts.append(part)
+        self._size = len(self.header)
+
+    def write(self, data: bytes):
+        if not self._parts or (self._size + len(data) > self.limit and self._size > len(self.header)):
+            self._new_part()
+        self._parts[-1].write(data)
+        self._size += len(data)
+        self.rows += 1
+
+    def part_names(self) -> list:
+        if len(self._parts) <= 1:
+            return [self.filename]
+        stem, dot, ext = self.filename.rpartition('.')
+        return [f"{stem}.part{i}{dot}{ext}" for i in range(1, len(self._parts) + 1)]
+
+    def files(self) -> list:
+        """discord.File objects for every part, rewound for upload"""
+        files = []
+        for part, name in zip(self._parts, self.part_names()):
+            part.seek(0)
+            files.append(discord.File(part, filename=name))
+        return files
+
+    def close(self):
+        for part in self._parts:
+            part.close()
+        self._parts.clear()
+
+
+class _CsvEncoder:
+    """Encodes single CSV rows to bytes through one reused buffer"""
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def encode(self, row: list) -> bytes:
+        self._writer.writerow(row)
+        data = self._buffer.getvalue().encode('utf-8')
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+
+async def export_guild(guild_id: int, fmt: str, limit: int) -> list:
+    """Stream a guild's roster into SplitFiles; `fmt` is 'csv', 'jsonl' or 'division_csv'"""
+    encoder = _CsvEncoder()
+    header = encoder.encode(COLUMNS)
+    outputs = {}
+
+    def output_for(key: str, filename: str, file_header: bytes) -> SplitFile:
+        output = outputs.get(key)
+        if output is None:
+            output = outputs[key] = SplitFile(filename, limit, file_header)
+        return output
+
+    try:
+        async for page in async_db.iter_participants(guild_id):
+            for participant in page:
+                if fmt == 'jsonl':
+                    line = json.dumps(participant_record(participant), ensure_ascii=False, default=str)
+                    output_for('all', f'participants_{guild_id}.jsonl', b'').write(line.encode('utf-8') + b'\n')
+                elif fmt == 'division_csv':
+                    division = str(participant.get('division') or 'Unassigned')
+                    slug = ''.join(ch if ch.isalnum() else '_' for ch in division).strip('_').lower()
+                    output_for(division, f'participants_{guild_id}_{slug}.csv', header).write(
+                        encoder.encode(participant_row(participant))
+                    )
+                else:
+                    output_for('all', f'participants_{guild_id}.csv', header).write(
+                        encoder.encode(participant_row(participant))
+                    )
+    except BaseException:
+        for output in outputs.values():
+            output.close()
+        raise
+
+    return [outputs[key] for key in sorted(outputs)]
+
+
+class ParticipantExport(commands.Cog):
+    """Roster export commands"""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(
+        name="export_participants",
+        description="Download every participant as CSV or JSONL"
+    )
+    @app_commands.describe(format="File format")
+    @app_commands.choices(format=[
+        app_commands.Choice(name="CSV (one file)", value="csv"),
+        app_commands.Choice(name="JSON Lines", value="jsonl"),
+        app_commands.Choice(name="CSV per division", value="division_csv"),
+    ])
+    @app_commands.checks.has_permissions(administrator=True)
+    async def export_participants(self, interaction: discord.Interaction, format: app_commands.Choice[str]):
+        """Stream the roster to temp files and upload them"""
+        await interaction.response.defer(ephemeral=True, thinking=True)
+
+        limit = interaction.guild.filesize_limit - UPLOAD_MARGIN
+        outputs = await export_guild(interaction.guild.id, format.value, limit)
+        try:
+            if not outputs:
+                await interaction.followup.send("ℹ️ There are no participants to export.", ephemeral=True)
+                return
+
+            total = sum(output.rows for output in outputs)
+            await interaction.followup.send(
+                f"📤 Exporting **{total}** participant(s) as {format.name}...",
+                ephemeral=True
+            )
+            # One file per message keeps every request under the upload limit
+            for output in outputs:
+                for file in output.files():
+                    await interaction.followup.send(file=file, ephemeral=True)
+        finally:
+            for output in outputs:
+                output.close()
+
+
+async def setup(bot):
+    """Setup function to load the cog"""
+    await bot.add_cog(ParticipantExport(bot))
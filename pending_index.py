@@ -0,0 +1,143 @@
+"""pending_index.py - Undecided browser registrations, indexed for the moderator queue
+
+Every pending registration is listed once per filter combination
+(all / division / community / division+community), each list sorted by
+(total strength, message id). A page is then two binary searches for the
+strength range plus a slice, so rendering never scans ticket channels or
+the whole pending set.
+
+The index follows registration_store (put = submitted, pop = decided) and
+is rebuilt at startup from the registration journal, so it survives
+restarts without a store of its own.
+"""
+
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from typing import Optional
+
+QUEUE_PAGE_SIZE = 10
+
+
+@dataclass(frozen=True, slots=True)
+class PendingEntry:
+    message_id: int
+    channel_id: int
+    guild_id: int
+    discord_id: int
+    game_username: str
+    division: str
+    community: str
+    total_strength: int
+
+    @property
+    def jump_url(self) -> str:
+        return f"https://discord.com/channels/{self.guild_id}/{self.channel_id}/{self.message_id}"
+
+
+@dataclass(frozen=True, slots=True)
+class QueuePage:
+    entries: list
+    page: int
+    pages: int
+    total: int
+
+
+class PendingIndex:
+    """Pending registrations by message id, with sorted lists per filter"""
+
+    def __init__(self, page_size: int = QUEUE_PAGE_SIZE):
+        self.page_size = page_size
+        self._entries = {}   # message_id -> PendingEntry
+        self._lists = {}     # (guild_id, division or None, community or None) -> [(strength, message_id)]
+        # Division and community keys are lower-cased, so filters match regardless of case
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, message_id):
+        return message_id in self._entries
+
+    @staticmethod
+    def _list_keys(entry: PendingEntry):
+        division = entry.division.lower()
+        community = entry.community.lower()
+        return (
+            (entry.guild_id, None, None),
+            (entry.guild_id, division, None),
+            (entry.guild_id, None, community),
+            (entry.guild_id, division, community),
+        )
+
+    def add(self, record):
+        """Index a pending RegistrationRecord (re-adding replaces the old entry)"""
+        if not record.message_id:
+            return
+        self.remove(record.message_id)
+        entry = PendingEntry(
+            record.message_id, record.channel_id, record.guild_id, record.discord_id,
+            record.game_username or record.username or str(record.discord_id),
+            record.division, record.community, int(record.total_strength or 0)
+        )
+        self._entries[entry.message_id] = entry
+        key = (entry.total_strength, entry.message_id)
+        for list_key in self._list_keys(entry):
+            insort(self._lists.setdefault(list_key, []), key)
+
+    def remove(self, message_id: int) -> Optional[PendingEntry]:
+        entry = self._entries.pop(message_id, None)
+        if entry is None:
+            return None
+        key = (entry.total_strength, entry.message_id)
+        for list_key in self._list_keys(entry):
+            keys = self._lists[list_key]
+            del keys[bisect_left(keys, key)]
+            if not keys:
+                del self._lists[list_key]
+        return entry
+
+    def remove_user(self, guild_id: int, discord_id: int) -> int:
+        """Drop a user's pending entries (they left the guild); rare, so a scan is fine"""
+        stale = [e.message_id for e in self._entries.values()
+                 if e.guild_id == guild_id and e.discord_id == discord_id]
+        for message_id in stale:
+            self.remove(message_id)
+        return len(stale)
+
+    def get(self, message_id: int) -> Optional[PendingEntry]:
+        return self._entries.get(message_id)
+
+    def count(self, guild_id: int) -> int:
+        return len(self._lists.get((guild_id, None, None), ()))
+
+    def _range(self, guild_id: int, division: str = None, community: str = None,
+               min_strength: int = None, max_strength: int = None):
+        """(sorted keys, start, end) for a filter and strength range"""
+        key = (guild_id, division.lower() if division else None, community.lower() if community else None)
+        keys = self._lists.get(key, [])
+        start = 0 if min_strength is None else bisect_left(keys, (min_strength, 0))
+        end = len(keys) if max_strength is None else bisect_left(keys, (max_strength + 1, 0))
+        return keys, start, max(start, end)
+
+    def matching(self, guild_id: int, division: str = None, community: str = None,
+                 min_strength: int = None, max_strength: int = None) -> list:
+        """Every matching entry, strongest first"""
+        keys, start, end = self._range(guild_id, division, community, min_strength, max_strength)
+        return [self._entries[message_id] for _, message_id in reversed(keys[start:end])]
+
+    def page(self, guild_id: int, page: int = 0, division: str = None, community: str = None,
+             min_strength: int = None, max_strength: int = None) -> QueuePage:
+        """One page of matching entries, strongest first"""
+        keys, start, end = self._range(guild_id, division, community, min_strength, max_strength)
+        total = end - start
+        pages = max(1, -(-total // self.page_size))
+        page = min(max(page, 0), pages - 1)
+
+        # Strongest first: count pages back from the top of the range
+        stop = end - page * self.page_size
+        first = max(start, stop - self.page_size)
+        entries = [self._entries[message_id] for _, message_id in reversed(keys[first:stop])]
+        return QueuePage(entries, page, pages, total)
+
+
+# Shared index kept current by registration_store
+pending_index = PendingIndex()
@@ -0,0 +1,157 @@
+"""pending_queue.py - /pending_queue: paged, filterable list of undecided registrations
+
+Pages are rendered from pending_index. The Prev/Next buttons are a
+persistent view; the current page and filters live in the embed footer, so
+the buttons keep working after a restart.
+"""
+
+import re
+from urllib.parse import quote, unquote
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from metrics import start_interaction, log
+from pending_index import pending_index, QueuePage
+
+QUEUE_TITLE = "🗂️ Pending Registrations"
+
+_STATE_RE = re.compile(r"(\w+)=([^;|]*)")
+
+
+def _state_text(state: dict) -> str:
+    # Values are URL-encoded so names containing ";", "|" or "=" survive the round trip
+    return "; ".join(f"{k}={quote(str(v), safe='')}" for k, v in state.items() if v not in (None, ''))
+
+
+def _parse_state(footer: str) -> dict:
+    """Page and filters back from a queue embed footer"""
+    state = {k: unquote(v.strip()) for k, v in _STATE_RE.findall(footer or '')}
+    for key in ('page', 'min', 'max'):
+        if key in state:
+            try:
+                state[key] = int(state[key])
+            except ValueError:
+                del state[key]
+    return state
+
+
+def _query(guild_id: int, state: dict) -> QueuePage:
+    return pending_index.page(
+        guild_id,
+        state.get('page', 0),
+        division=state.get('division'),
+        community=state.get('community'),
+        min_strength=state.get('min'),
+        max_strength=state.get('max'),
+    )
+
+
+def queue_embed(result: QueuePage, state: dict) -> discord.Embed:
+    embed = discord.Embed(title=QUEUE_TITLE, color=discord.Color.orange())
+    if not result.entries:
+        embed.description = "ℹ️ No pending browser registrations match this filter."
+    else:
+        first = result.page * pending_index.page_size
+        embed.description = "\n".join(
+            f"`{first + i:>3}.` **{e.total_strength}** · {e.game_username} · {e.community or 'N/A'} · "
+            f"{e.division} · [open]({e.jump_url})"
+            for i, e in enumerate(result.entries, 1)
+        )
+    state = dict(state, page=result.page)
+    embed.set_footer(
+        text=f"Page {result.page + 1}/{result.pages} · {result.total} pending | {_state_text(state)}"
+    )
+    return embed
+
+
+class PendingQueueView(discord.ui.View):
+    """Persistent Prev/Next buttons for the moderator queue"""
+
+    def __init__(self):
+        super().__init__(timeout=None)  # Persistent view
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.guild_permissions.administrator:
+            return True
+        await interaction.response.send_message("❌ Only administrators can browse the queue.", ephemeral=True)
+        return False
+
+    async def turn(self, interaction: discord.Interaction, step: int):
+        span = start_interaction("pending_queue_page")
+        try:
+            embeds = interaction.message.embeds
+            state = _parse_state(embeds[0].footer.text if embeds and embeds[0].footer else '')
+            state['page'] = state.get('page', 0) + step
+            result = _query(interaction.guild.id, state)
+            with span.phase('rest'):
+                await interaction.response.edit_message(embed=queue_embed(result, state), view=self)
+                span.deferred()
+        except Exception as e:
+            span.error()
+            log.error(f"❌ Error paging the pending queue: {e}")
+            try:
+                message = "❌ Could not load that page of the queue. Please run /pending_queue again."
+                if interaction.response.is_done():
+                    await interaction.followup.send(message, ephemeral=True)
+                else:
+                    await interaction.response.send_message(message, ephemeral=True)
+            except discord.HTTPException:
+                pass
+        finally:
+            span.finish()
+
+    @discord.ui.button(label="◀ Prev", style=discord.ButtonStyle.secondary, custom_id="pending_queue_prev")
+    async def prev_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.turn(interaction, -1)
+
+    @discord.ui.button(label="🔄 Refresh", style=discord.ButtonStyle.secondary, custom_id="pending_queue_refresh")
+    async def refresh_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.turn(interaction, 0)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary, custom_id="pending_queue_next")
+    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.turn(interaction, 1)
+
+
+class PendingQueue(commands.Cog):
+    """Moderator queue of undecided browser registrations"""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(
+        name="pending_queue",
+        description="Browse pending browser registrations, strongest first"
+    )
+    @app_commands.describe(
+        division="Only this division",
+        community="Only this community",
+        min_strength="Minimum total strength",
+        max_strength="Maximum total strength",
+        public="Post the queue in this channel instead of only to you"
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def pending_queue(
+        self,
+        interaction: discord.Interaction,
+        division: str = None,
+        community: str = None,
+        min_strength: int = None,
+        max_strength: int = None,
+        public: bool = False
+    ):
+        """First page of the queue with persistent Prev/Next buttons"""
+        state = {'division': division, 'community': community, 'min': min_strength, 'max': max_strength}
+        result = _query(interaction.guild.id, state)
+        await interaction.response.send_message(
+            embed=queue_embed(result, state),
+            view=PendingQueueView(),
+            ephemeral=not public
+        )
+
+
+async def setup(bot):
+    """Setup function to load the cog"""
+    await bot.add_cog(PendingQueue(bot))
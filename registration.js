@@ -42,8 +42,9 @@ const LEGENDARY_CARDS = [
     "Valkerie", "Wukong"
 ];
 
-const ALL_CARDS = [
-    ...LEGENDARY_CARDS,
+const LEGENDARY_SET = new Set(LEGENDARY_CARDS);
+
+const OTHER_CARDS = [
     "Catapult", "Clown", "Crystalmancer", "Earth Elemental", "Cold Elemental",
     "Engineer", "Gargoyle", "Executioner", "Mime", "Plague Doctor", "Ivy",
     "Portal Keeper", "Pyrotechnic", "Reaper", "Portal Mage", "Thunderer",
@@ -51,7 +52,12 @@ const ALL_CARDS = [
     "Grindstone", "Priestess", "Sentry", "Sharpshooter", "Zealot",
     "Archer", "Bombardier", "Cold Mage", "Fire Mage", "Hunter",
     "Lightning Mage", "Poisoner", "Rogue", "Thrower"
-].sort();
+];
+
+const ALL_CARDS = [...LEGENDARY_CARDS, ...OTHER_CARDS].sort();
+
+// Export-code card ids: append-only, must match CARD_ORDER in card_catalog.py
+const CARD_ORDER = [...LEGENDARY_CARDS, ...OTHER_CARDS];
 
 const HERO_ITEMS_MAP = {
     "Lucia (Legendary)":       "Shadow Blade",
@@ -178,7 +184,7 @@ function generateCardInputs() {
         ALL_CARDS.forEach(card => {
             const opt = document.createElement('option');
             opt.value = card;
-            opt.textContent = `${card} ${LEGENDARY_CARDS.includes(card) ? '⭐' : ''}`;
+            opt.textContent = `${card} ${LEGENDARY_SET.has(card) ? '⭐' : ''}`;
             nameSelect.appendChild(opt);
         });
 
@@ -207,7 +213,7 @@ function updateCardLevelOptions(cardIndex, cardName) {
     const currentValue = levelSelect.value;
     let options = '<option value="">Level...</option>';
     for (let i = 1; i <= 15; i++) options += `<option value="${i}">Level ${i}</option>`;
-    if (LEGENDARY_CARDS.includes(cardName)) {
+    if (LEGENDARY_SET.has(cardName)) {
         options += `<option value="16">Reincarnated I (16)</option>`;
         options += `<option value="17">Reincarnated II (17)</option>`;
         options += `<option value="18">Reincarnated III (18)</option>`;
@@ -368,6 +374,119 @@ function displayStrength() {
     }
 }
 
+// ============================================================================
+// EXPORT CODES (v2 compact format; mirrors export_codec.py)
+// ============================================================================
+
+const EXPORT_VERSION = 2;
+const EXPORT_PREFIX = 'T2.';
+const EXPORT_STRING_FIELDS = ['game_username', 'game_id', 'timezone', 'community', 'hero', 'hero_item'];
+
+const CRC32_TABLE = (() => {
+    const table = new Uint32Array(256);
+    for (let n = 0; n < 256; n++) {
+        let c = n;
+        for (let k = 0; k < 8; k++) c = c & 1 ? 0xEDB88320 ^ (c >>> 1) : c >>> 1;
+        table[n] = c >>> 0;
+    }
+    return table;
+})();
+
+function crc32(bytes) {
+    let crc = 0xFFFFFFFF;
+    for (const b of bytes) crc = CRC32_TABLE[(crc ^ b) & 0xFF] ^ (crc >>> 8);
+    return (crc ^ 0xFFFFFFFF) >>> 0;
+}
+
+function encodeExportCode(data) {
+    const out = [EXPORT_VERSION];
+    const putVarint = value => {
+        value = parseInt(value) || 0;
+        while (value >= 0x80) { out.push((value & 0x7F) | 0x80); value = Math.floor(value / 128); }
+        out.push(value);
+    };
+    ['crit_level', 'legendarity', 'perks_level', 'hero_level', 'hero_item_level'].forEach(k => putVarint(data[k]));
+    for (let i = 0; i < 5; i++) {
+        const card = data.cards[i] || {};
+        const id = card.name ? CARD_ORDER.indexOf(card.name) : -1;
+        // Same rule as export_codec.encode: a card without an id cannot be exported
+        if (card.name && id < 0) throw new Error(`Unknown card: ${card.name}`);
+        putVarint(id + 1);
+        putVarint(id >= 0 ? card.level : 0);
+    }
+    const encoder = new TextEncoder();
+    EXPORT_STRING_FIELDS.forEach(k => {
+        const raw = encoder.encode(String(data[k] || ''));
+        putVarint(raw.length);
+        raw.forEach(b => out.push(b));
+    });
+    const crc = crc32(out);
+    out.push((crc >>> 24) & 0xFF, (crc >>> 16) & 0xFF, (crc >>> 8) & 0xFF, crc & 0xFF);
+    const binary = String.fromCharCode(...out);
+    return EXPORT_PREFIX + btoa(binary).replace(/\+/g, '-').replace(/\//g, '_').replace(/=+$/, '');
+}
+
+function decodeExportCode(code) {
+    const b64 = code.slice(EXPORT_PREFIX.length).replace(/-/g, '+').replace(/_/g, '/');
+    const bytes = Uint8Array.from(atob(b64 + '='.repeat((4 - b64.length % 4) % 4)), c => c.charCodeAt(0));
+    if (bytes.length < 5) throw new Error('Export code is truncated');
+    const body = bytes.subarray(0, bytes.length - 4);
+    const t = bytes.subarray(bytes.length - 4);
+    if (((t[0] << 24) | (t[1] << 16) | (t[2] << 8) | t[3]) >>> 0 !== crc32(body)) {
+        throw new Error('Export code checksum does not match (copied incompletely?)');
+    }
+    if (body[0] !== EXPORT_VERSION) throw new Error(`Unsupported export code version ${body[0]}`);
+
+    let pos = 1;
+    const varint = () => {
+        let value = 0, mul = 1, byte;
+        do {
+            if (pos >= body.length) throw new Error('Export code is truncated');
+            byte = body[pos++];
+            value += (byte & 0x7F) * mul;
+            mul *= 128;
+        } while (byte >= 0x80);
+        return value;
+    };
+    const data = {
+        crit_level: varint(), legendarity: varint(), perks_level: varint(),
+        hero_level: varint(), hero_item_level: varint(), cards: []
+    };
+    for (let i = 0; i < 5; i++) {
+        const ref = varint(), level = varint();
+        if (ref > CARD_ORDER.length) throw new Error(`Unknown card id ${ref - 1}`);
+        data.cards.push(ref ? { name: CARD_ORDER[ref - 1], level: String(level) } : { name: '', level: '' });
+    }
+    const decoder = new TextDecoder();
+    EXPORT_STRING_FIELDS.forEach(k => {
+        const len = varint();
+        if (pos + len > body.length) throw new Error('Export code is truncated');
+        data[k] = decoder.decode(body.subarray(pos, pos + len));
+        pos += len;
+    });
+    return data;
+}
+
+// Positional parts (legacy CSV order) from either export code format
+function exportCodeParts(code) {
+    if (code.startsWith(EXPORT_PREFIX) && !code.includes(',')) {
+        const d = decodeExportCode(code);
+        const parts = [
+            d.game_username, d.game_id, String(d.crit_level), String(d.legendarity),
+            String(d.perks_level), d.timezone, d.community, d.hero, String(d.hero_level),
+            d.hero_item || 'None', String(d.hero_item_level || 0)
+        ];
+        d.cards.forEach(c => { parts.push(c.name); parts.push(c.level); });
+        return parts;
+    }
+    const parts = code.split(',').map(p => p.trim());
+    if (parts.length > 21) {
+        // Surplus commas belong to the community name (same rule as export_codec.py)
+        return [...parts.slice(0, 6), parts.slice(6, parts.length - 14).join(','), ...parts.slice(-14)];
+    }
+    return parts;
+}
+
 async function handleFormSubmit(e) {
     e.preventDefault();
     if (!formData.guild_id) {
@@ -387,14 +506,13 @@ async function handleFormSubmit(e) {
     await loadPantheonBonuses(formData.guild_id);
     calculateAndDisplayStrength();
 
-    const parts = [
-        formData.game_username, formData.game_id, formData.crit_level,
-        formData.legendarity, formData.perks_level, formData.timezone,
-        formData.community, formData.hero, formData.hero_level,
-        formData.hero_item || 'None', formData.hero_item_level || '0'
-    ];
-    formData.cards.forEach(card => { parts.push(card.name || ''); parts.push(card.level || ''); });
-    const exportString = parts.join(',');
+    let exportString;
+    try {
+        exportString = encodeExportCode(formData);
+    } catch (error) {
+        showAlert(`Error: ${error.message}`, 'error');
+        return;
+    }
 
     const submissionData = {
         discord_id:      formData.discord_id,
@@ -419,14 +537,16 @@ async function handleFormSubmit(e) {
     try {
         const btn = document.querySelector('button[type="submit"]');
         btn.disabled = true; btn.textContent = 'Submitting... ⏳';
-        const response = await fetch('/api/register', {
+        // The bot accepts the form itself when its API is configured
+        const registerUrl = window._BOT_API_URL ? `${window._BOT_API_URL}/api/register` : '/api/register';
+        const response = await fetch(registerUrl, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(submissionData)
         });
         const result = await response.json();
         if (!response.ok) throw new Error(result.error || 'Submission failed');
-        showSuccessModal(exportString);
+        showSuccessModal(exportString, result);
     } catch (error) {
         showAlert(`Error: ${error.message}`, 'error');
         const btn = document.querySelector('button[type="submit"]');
@@ -434,17 +554,22 @@ async function handleFormSubmit(e) {
     }
 }
 
-function showSuccessModal(exportCode) {
+// Division and total strength are the server's (it recomputes them); the rest is the form's
+function showSuccessModal(exportCode, result = {}) {
     const modal     = document.getElementById('success-modal');
     const statsDiv  = document.getElementById('success-stats');
     const exportDiv = document.getElementById('export-code');
+    const totalStrength = result.total_strength ?? calculatedStrength.totalStrength;
+    const division      = result.division || calculatedStrength.division;
     statsDiv.innerHTML = `
         <div><p class="opacity-80 text-sm">Base Crit</p><p class="text-xl font-bold">${calculatedStrength.baseCrit}%</p></div>
         <div><p class="opacity-80 text-sm">Adjusted Crit</p><p class="text-xl font-bold">${calculatedStrength.adjustedCrit}%</p></div>
         <div><p class="opacity-80 text-sm">Legendarity</p><p class="text-xl font-bold">${calculatedStrength.legendarity}</p></div>
         <div><p class="opacity-80 text-sm">Perks</p><p class="text-xl font-bold">${calculatedStrength.perks}</p></div>
-        <div class="col-span-2 border-t border-white/30 pt-4"><p class="opacity-80 text-sm">Total Strength</p><p class="text-4xl font-bold">${calculatedStrength.totalStrength}</p></div>
-        <div class="col-span-2 pt-4 border-t border-white/30"><p class="opacity-80 text-sm">Division</p><p class="text-3xl font-bold">${calculatedStrength.division}</p></div>`;
+        <div class="col-span-2 border-t border-white/30 pt-4"><p class="opacity-80 text-sm">Total Strength</p><p class="text-4xl font-bold" id="success-total"></p></div>
+        <div class="col-span-2 pt-4 border-t border-white/30"><p class="opacity-80 text-sm">Division</p><p class="text-3xl font-bold" id="success-division"></p></div>`;
+    document.getElementById('success-total').textContent = totalStrength;
+    document.getElementById('success-division').textContent = division;
     exportDiv.textContent = exportCode;
     modal.classList.remove('hidden');
 }
@@ -473,7 +598,8 @@ function showAlert(message, type) {
     const div = document.createElement('div');
     const bgColor = type === 'success' ? 'bg-green-100 text-green-800' : 'bg-red-100 text-red-800';
     div.className = `${bgColor} p-4 rounded-lg flex items-center gap-3 mb-4`;
-    div.innerHTML = `<span class="text-2xl">${type === 'success' ? '✓' : '✕'}</span><p>${message}</p>`;
+    div.innerHTML = `<span class="text-2xl">${type === 'success' ? '✓' : '✕'}</span><p></p>`;
+    div.querySelector('p').textContent = message;
     container.appendChild(div);
     setTimeout(() => div.remove(), 5000);
 }
@@ -485,7 +611,7 @@ function importCode() {
     const code = document.getElementById('import-code-input').value.trim();
     if (!code) { showAlert('Please paste an export code first!', 'error'); return; }
     try {
-        const parts = code.split(',').map(p => p.trim());
+        const parts = exportCodeParts(code);
         if (parts.length < 21) { showAlert('Invalid export code format!', 'error'); return; }
         document.getElementById('game_username').value = parts[0]; formData.game_username = parts[0];
         document.getElementById('game_id').value       = parts[1]; formData.game_id       = parts[1];
@@ -0,0 +1,382 @@
+"""registration_intake.py - Browser registrations received by the bot itself
+
+The website POSTs the form to the bot's web API (/api/register), which
+answers as soon as the submission is validated. Channels and roles are read
+from the gateway cache (memoized per guild until a channel or role changes),
+and the ticket channel, the review message and the DM go through the
+rate-limited outbox. Repeat submissions by the same user within
+DEDUPE_WINDOW seconds are acknowledged but not queued again.
+"""
+
+import secrets
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import discord
+from discord.ext import commands
+
+from event_hub import event_hub
+from member_cache import member_cache
+from metrics import log
+from outbox import outbox, OutboxTracker, channel_bucket, guild_bucket, DM_BUCKET
+from registration_journal import registration_journal
+from registration_records import RegistrationRecord, PENDING_TITLE, registration_store
+from strength_engine import strength_engine, calculate_strength
+
+DEDUPE_WINDOW = 120            # seconds
+MAX_RECENT_SUBMISSIONS = 10000
+
+# Longest accepted free-text values. Each lands in an embed field (max 1024
+# characters); the export code is wrapped in a code block there and in the DM.
+MAX_TEXT_LENGTHS = {
+    'username': 100,
+    'game_username': 64,
+    'game_id': 64,
+    'community': 64,
+    'timezone': 64,
+    'hero': 64,
+    'hero_item': 64,
+    'export_code': 900,
+}
+
+REGISTRATION_CATEGORY = "REGISTRATIONS"
+STAFF_ROLE_NAMES = ("Moderator", "Admin")
+
+# Kept in sync with config.py COMMUNITIES (and api/register.js)
+COMMUNITY_ABBREVIATIONS = {
+    'Shining Stars': 'SS',
+    'Shinning Stars': 'SS',   # legacy typo fallback
+    'Empires Gaming': 'EMP',
+    'Apoc4lipse': 'APOC',
+    'Quack Pack': 'QP',
+    'Lord Gunko': 'LG',
+    'LRT': 'LRT',
+    'Nompies': 'NOM',
+    'Moes Tavern': 'MOE',
+    'SE7ENS': 'SE7',
+    'Smile & Wave': 'S&W',
+}
+
+DIVISION_ABBREVIATIONS = {
+    'Lightweight': 'LW',
+    'Cruiserweight': 'CW',
+    'Middleweight': 'MW',
+    'Heavyweight': 'HW',
+    'Super Heavyweight': 'SHW',
+    'Champion': 'CHAMP',
+}
+
+
+class IntakeError(Exception):
+    """A submission that cannot be accepted; `status` is the HTTP status to return"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass(frozen=True)
+class GuildMeta:
+    category_id: Optional[int]
+    staff_role_ids: Tuple[int, ...]
+
+
+class GuildMetaCache:
+    """Registration category and staff roles per guild, resolved from the gateway cache"""
+
+    def __init__(self):
+        self._meta = {}
+
+    def get(self, guild: discord.Guild) -> GuildMeta:
+        meta = self._meta.get(guild.id)
+        if meta is None:
+            meta = self._meta[guild.id] = self._resolve(guild)
+        return meta
+
+    @staticmethod
+    def _resolve(guild: discord.Guild) -> GuildMeta:
+        category = discord.utils.get(guild.categories, name=REGISTRATION_CATEGORY)
+        if category is None:
+            category = next(
+                (c for c in guild.categories
+                 if 'registration' in c.name.lower() or 'pending' in c.name.lower()),
+                None
+            )
+        roles = tuple(r.id for name in STAFF_ROLE_NAMES for r in guild.roles if r.name == name)
+        return GuildMeta(category.id if category else None, roles)
+
+    def invalidate(self, guild_id: int):
+        self._meta.pop(guild_id, None)
+
+
+def ticket_channel_name(record: RegistrationRecord) -> str:
+    community = COMMUNITY_ABBREVIATIONS.get(record.community) or record.community[:3].upper()
+    division = DIVISION_ABBREVIATIONS.get(record.division, 'UNK')
+    raw = f"web-{community}-{division}-{record.game_username}".lower()
+    return ''.join(ch if ch.isascii() and (ch.isalnum() or ch == '-') else '-' for ch in raw)[:100]
+
+
+def registration_embed(record: RegistrationRecord) -> discord.Embed:
+    """The pending-review embed (same fields as api/register.js, so legacy parsing still works)"""
+    config = strength_engine.config_for(record.guild_id)
+    result = calculate_strength(record.crit_level, record.legendarity, record.perks_level, record.cards, config)
+    pantheon = ''
+    if result and result.pantheon_cards:
+        pantheon = " Pantheon Bonuses: " + ", ".join(f"{n}: +{int(b * 100)}%" for n, b in result.pantheon_cards)
+    strength_text = (
+        f"Base Crit: {record.crit_level}% "
+        f"Adjusted Crit: {result.adjusted_crit if result else record.crit_level}%{pantheon} "
+        f"Legendarity: {record.legendarity} "
+        f"Perks: {record.perks_level} "
+        f"Total Strength: {record.total_strength} "
+        f"Division: {record.division}"
+    )
+    hero_item = 'None'
+    if record.hero_item:
+        hero_item = (f"{record.hero_item} - Level {record.hero_item_level}"
+                     if record.hero_item_level else record.hero_item)
+
+    embed = discord.Embed(
+        title=f"🌐 {PENDING_TITLE}",
+        description="Please review the participant information below:",
+        color=0xFFA500,
+        timestamp=discord.utils.utcnow()
+    )
+    embed.add_field(name="👤 Discord User", value=f"<@{record.discord_id}>")
+    embed.add_field(name="📝 Username", value=record.username or 'N/A')
+    embed.add_field(name="🎮 Game Username", value=record.game_username or 'N/A')
+    embed.add_field(name="🆔 Game ID", value=record.game_id or 'N/A')
+    embed.add_field(name="🏛️ Community", value=record.community or 'N/A')
+    embed.add_field(name="🕐 Timezone", value=record.timezone)
+    embed.add_field(name="💥 Critical Damage", value=f"{record.crit_level}%")
+    embed.add_field(name="📈 Legendarity", value=str(record.legendarity))
+    embed.add_field(name="🎯 Perks Level", value=str(record.perks_level))
+    embed.add_field(name="🦸 Hero", value=f"{record.hero} (Lv {record.hero_level})")
+    embed.add_field(name="⭐ Hero Item", value=hero_item)
+    embed.add_field(
+        name="🃏 Deck (5 Cards)",
+        value="\n".join(f"{i}. {name} - Lv {level}" for i, (name, level) in enumerate(record.cards, 1)) or 'N/A',
+        inline=False
+    )
+    embed.add_field(name="📊 Calculated Strength", value=strength_text, inline=False)
+    if record.export_code:
+        embed.add_field(name="📋 Export Code", value=f"```{record.export_code}```", inline=False)
+    embed.set_footer(text=f"User ID: {record.discord_id} | Source: Browser | Status: Pending")
+    return embed
+
+
+def public_event(record: RegistrationRecord) -> dict:
+    """What the live dashboard may show about a registration"""
+    return {
+        'game_username': record.game_username,
+        'community': record.community,
+        'division': record.division,
+        'total_strength': record.total_strength,
+    }
+
+
+def submission_dm_embed(record: RegistrationRecord) -> discord.Embed:
+    embed = discord.Embed(
+        title="✅ Registration Submitted!",
+        description="Your registration has been submitted and is pending approval.",
+        color=0x5865F2
+    )
+    if record.export_code:
+        embed.add_field(
+            name="📋 Your Export Code",
+            value=f"Keep this safe in case you need it:\n```{record.export_code}```",
+            inline=False
+        )
+    embed.set_footer(text="You'll be notified once your registration is approved!")
+    return embed
+
+
+class RegistrationIntake:
+    """Validates, deduplicates and queues browser submissions"""
+
+    def __init__(self, dedupe_window: float = DEDUPE_WINDOW):
+        self.dedupe_window = dedupe_window
+        self.guild_meta = GuildMetaCache()
+        self._recent = {}   # (guild_id, discord_id) -> accepted at (monotonic)
+        self.posting = set()  # nonces of ticket messages still being sent (see on_message)
+        self.accepted = 0
+        self.duplicates = 0
+
+    def _is_duplicate(self, key) -> bool:
+        now = time.monotonic()
+        seen = self._recent.get(key)
+        if seen is not None and now - seen < self.dedupe_window:
+            return True
+        self._recent.pop(key, None)
+        self._recent[key] = now
+        # Dicts keep insertion order: drop expired / excess entries from the front
+        while self._recent:
+            oldest_key, oldest = next(iter(self._recent.items()))
+            if now - oldest < self.dedupe_window and len(self._recent) <= MAX_RECENT_SUBMISSIONS:
+                break
+            del self._recent[oldest_key]
+        return False
+
+    def submit(self, bot, data: dict) -> dict:
+        """Accept a submission and queue its ticket; returns the JSON response body"""
+        try:
+            record = RegistrationRecord.from_submission(data)
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            raise IntakeError(f"Invalid registration: {e}")
+        if len(record.cards) != 5:
+            raise IntakeError("A deck needs exactly 5 cards")
+        for name, limit in MAX_TEXT_LENGTHS.items():
+            if len(getattr(record, name) or '') > limit:
+                raise IntakeError(f"{name} is too long (at most {limit} characters)")
+
+        guild = bot.get_guild(record.guild_id)
+        if guild is None:
+            raise IntakeError("Unknown server", status=404)
+
+        meta = self.guild_meta.get(guild)
+        if meta.category_id is None:
+            raise IntakeError("Registration category not found. Please contact an administrator.", status=409)
+
+        key = (guild.id, record.discord_id)
+        if self._is_duplicate(key):
+            self.duplicates += 1
+            return {
+                'success': True,
+                'duplicate': True,
+                'message': 'Registration already received; your ticket is being created.',
+            }
+
+        # Strength and division come from the server, not the browser
+        strength_engine.apply_to_record(record)
+        self.accepted += 1
+
+        # If the ticket never gets made, let the user submit again right away
+        tracker = OutboxTracker(on_failed=lambda: self._recent.pop(key, None))
+        outbox.enqueue(
+            guild_bucket(guild.id),
+            lambda: self._create_ticket(guild, record, meta, tracker),
+            key=f"ticket:{guild.id}:{record.discord_id}",
+            description=f"ticket for {record.discord_id}",
+            tracker=tracker
+        )
+        outbox.enqueue(
+            DM_BUCKET,
+            lambda: self._send_dm(bot, record),
+            key=f"intake-dm:{guild.id}:{record.discord_id}",
+            description=f"intake DM {record.discord_id}"
+        )
+        return {
+            'success': True,
+            'queued': True,
+            'message': 'Registration submitted successfully! Your private ticket channel is being created.',
+            'division': record.division,
+            'total_strength': record.total_strength,
+        }
+
+    async def _create_ticket(self, guild: discord.Guild, record: RegistrationRecord, meta: GuildMeta,
+                             tracker: OutboxTracker = None):
+        member = member_cache.cached_member(guild, record.discord_id) or discord.Object(
+            id=record.discord_id, type=discord.Member
+        )
+        allow = discord.PermissionOverwrite(view_channel=True, send_messages=True)
+        overwrites = {guild.default_role: discord.PermissionOverwrite(view_channel=False), member: allow}
+        for role_id in meta.staff_role_ids:
+            role = guild.get_role(role_id)
+            if role is not None:
+                overwrites[role] = allow
+
+        channel = await guild.create_text_channel(
+            ticket_channel_name(record),
+            category=guild.get_channel(meta.category_id),
+            overwrites=overwrites
+        )
+        outbox.enqueue(
+            channel_bucket(channel.id),
+            lambda: self._post_ticket(channel, record, meta),
+            key=f"ticket-post:{channel.id}",
+            description=f"post registration {record.discord_id}",
+            tracker=tracker
+        )
+
+    async def _post_ticket(self, channel: discord.TextChannel, record: RegistrationRecord, meta: GuildMeta):
+        from browser_approval_handler import BrowserApprovalView
+
+        ping = " ".join(f"<@&{role_id}>" for role_id in meta.staff_role_ids)
+        # The gateway echo can reach on_message before send() returns; the nonce
+        # tells it this message is ours to store
+        nonce = secrets.token_hex(8)
+        self.posting.add(nonce)
+        try:
+            message = await channel.send(
+                content=f"<@{record.discord_id}> 🔔 New browser registration to review! {ping}".rstrip(),
+                embed=registration_embed(record),
+                view=BrowserApprovalView(),
+                nonce=nonce
+            )
+            record.channel_id = channel.id
+            record.message_id = message.id
+            registration_store.put(record)
+            registration_journal.submitted(record)
+            event_hub.publish(record.guild_id, 'registration', public_event(record))
+        finally:
+            self.posting.discard(nonce)
+
+        try:
+            from approval_views import ExportSettingsView
+        except ImportError:
+            return
+        await channel.send(content="📤 **Your Registration Settings:**", view=ExportSettingsView())
+
+    async def _send_dm(self, bot, record: RegistrationRecord):
+        user = await member_cache.get_user(bot, record.discord_id)
+        try:
+            await user.send(embed=submission_dm_embed(record))
+        except discord.Forbidden:
+            log.info(f"⚠️ Could not DM {record.discord_id} (DMs closed)")
+
+
+# Shared intake used by the web API
+registration_intake = RegistrationIntake()
+
+
+class RegistrationIntakeCog(commands.Cog):
+    """Keeps the guild metadata cache in step with channel and role changes"""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    # Only categories feed GuildMeta; ticket channels come and go constantly
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        if isinstance(channel, discord.CategoryChannel):
+            registration_intake.guild_meta.invalidate(channel.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        if isinstance(channel, discord.CategoryChannel):
+            registration_intake.guild_meta.invalidate(channel.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        if isinstance(after, discord.CategoryChannel) and before.name != after.name:
+            registration_intake.guild_meta.invalidate(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        registration_intake.guild_meta.invalidate(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        registration_intake.guild_meta.invalidate(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        if before.name != after.name:
+            registration_intake.guild_meta.invalidate(after.guild.id)
+
+
+async def setup(bot):
+    """Setup function to load the cog"""
+    await bot.add_cog(RegistrationIntakeCog(bot))
@@ -0,0 +1,472 @@
+"""registration_journal.py - Append-only journal of registration events
+
+Every submission, approval, rejection and withdrawal is appended to one log
+file as a framed JSON record:
+
+    <u32 payload length><u32 crc32(payload)><payload>
+
+Appends are buffered and written by a background task that fsyncs once per
+batch, so a rush of approvals costs one fsync per FLUSH_INTERVAL rather than
+one per event. Reads go through an mmap of the log.
+
+A sidecar index (<journal>.idx) holds one fixed-size entry per event
+(guild id, user id, offset, event type), so "latest status of user X" and
+"history of user X" never scan the log. The index is rebuilt from the log's
+tail on open if it fell behind (e.g. after a crash between the two writes).
+
+Checkpoints (<journal>.ckpt) store the set of pending submissions and the
+log offset they cover; replay() starts there and applies only later events.
+"""
+
+import asyncio
+import atexit
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from typing import Iterator, Optional, Tuple
+
+from metrics import log
+
+JOURNAL_PATH = os.getenv('REGISTRATION_JOURNAL', 'registration_journal.log')
+FLUSH_INTERVAL = 0.05          # seconds an append may wait for its fsync batch
+FLUSH_BATCH = 512              # flush early once this many events are buffered
+CHECKPOINT_EVERY = 5000        # events between checkpoints
+
+EVENT_TYPES = ('submitted', 'approved', 'rejected', 'withdrawn')
+_TYPE_CODES = {name: code for code, name in enumerate(EVENT_TYPES)}
+
+_HEADER = struct.Struct('<II')           # payload length, crc32
+_INDEX_ENTRY = struct.Struct('<QQQB')    # guild id, discord id, offset, event type
+
+
+class JournalError(Exception):
+    pass
+
+
+def _user_keys(state: dict, guild_id: int, discord_id: int) -> list:
+    return [key for key, event in state.items()
+            if event['guild_id'] == guild_id and event['discord_id'] == discord_id]
+
+
+def apply_event(state: dict, event: dict) -> dict:
+    """Default replay reducer: pending submissions keyed by approval message id
+
+    Keys are strings so the state survives a JSON checkpoint unchanged. A
+    user may have several submissions pending; a withdrawal (or a decision
+    without a message id) drops all of them.
+    """
+    message_id = event.get('message_id')
+    if event['type'] == 'submitted':
+        if message_id:
+            state[str(message_id)] = event
+    elif message_id and event['type'] != 'withdrawn':
+        state.pop(str(message_id), None)
+    else:
+        for key in _user_keys(state, event['guild_id'], event['discord_id']):
+            del state[key]
+    return state
+
+
+class RegistrationJournal:
+    """Append-only, fsync-batched event log with a per-user offset index"""
+
+    def __init__(self, flush_interval: float = FLUSH_INTERVAL, flush_batch: int = FLUSH_BATCH,
+                 checkpoint_every: int = CHECKPOINT_EVERY):
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.checkpoint_every = checkpoint_every
+        self.path = None
+        self._file = None
+        self._index_file = None
+        self._map = None
+        self._mapped = 0
+        self._end = 0                # logical end, including buffered events
+        self._buffer = []            # (frame, index entry)
+        self._unflushed = {}         # offset -> event, readable before the fsync
+        self._history = {}           # (guild_id, discord_id) -> [offsets]
+        self._latest = {}            # (guild_id, discord_id) -> event type code
+        self.pending = {}            # live replay state (apply_event), keyed by message id
+        self._since_checkpoint = 0
+        self._lock = None
+        self._wakeup = None
+        self._task = None
+        self.appended = 0
+        self.fsyncs = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self._file is not None
+
+    def __len__(self):
+        return sum(len(offsets) for offsets in self._history.values())
+
+    # ------------------------------------------------------------------
+    # Opening and recovery
+    # ------------------------------------------------------------------
+
+    def open(self, path: str = JOURNAL_PATH) -> int:
+        """Open (or create) the journal, repair its tail and load the index; returns event count"""
+        self.path = path
+        open(path, 'ab').close()
+        good_end = self._load_index()
+        good_end = self._index_tail(good_end)
+
+        size = os.path.getsize(path)
+        if good_end < size:
+            log.info(f"⚠️ Journal {path}: dropping {size - good_end} byte(s) of torn tail")
+            with open(path, 'r+b') as f:
+                f.truncate(good_end)
+
+        self._file = open(path, 'ab')
+        self._index_file = open(f"{path}.idx", 'ab')
+        self._end = good_end
+        self.pending = self.replay()
+        atexit.register(self.close)
+        return len(self)
+
+    def _load_index(self) -> int:
+        """Read the sidecar index; returns the log offset it covers up to"""
+        index_path = f"{self.path}.idx"
+        self._history.clear()
+        self._latest.clear()
+        if not os.path.exists(index_path):
+            return 0
+
+        with open(index_path, 'rb') as f:
+            data = f.read()
+        usable = len(data) - len(data) % _INDEX_ENTRY.size
+        end = kept = 0
+        with open(self.path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+            try:
+                for guild_id, discord_id, offset, code in _INDEX_ENTRY.iter_unpack(data[:usable]):
+                    if offset + _HEADER.size > size:
+                        break   # The log was truncated behind the index
+                    frame_end = offset + _HEADER.size + _HEADER.unpack_from(view, offset)[0]
+                    if frame_end > size:
+                        break
+                    self._remember(guild_id, discord_id, offset, code)
+                    end = frame_end
+                    kept += _INDEX_ENTRY.size
+            finally:
+                if size:
+                    view.close()
+
+        if kept != len(data):
+            with open(index_path, 'r+b') as f:
+                f.truncate(kept)
+        return end
+
+    def _index_tail(self, start: int) -> int:
+        """Index events written after the last index entry; returns the end of the last good frame"""
+        entries = []
+        end = start
+        for offset, end, event in self._scan_file(start):
+            code = _TYPE_CODES[event['type']]
+            self._remember(event['guild_id'], event['discord_id'], offset, code)
+            entries.append(_INDEX_ENTRY.pack(event['guild_id'], event['discord_id'], offset, code))
+        if entries:
+            with open(f"{self.path}.idx", 'ab') as f:
+                f.write(b''.join(entries))
+        return end
+
+    def _remember(self, guild_id: int, discord_id: int, offset: int, code: int):
+        key = (guild_id, discord_id)
+        self._history.setdefault(key, []).append(offset)
+        self._latest[key] = code
+
+    # ------------------------------------------------------------------
+    # Appending
+    # ------------------------------------------------------------------
+
+    def append(self, event_type: str, guild_id: int, discord_id: int,
+               message_id: int = 0, data: dict = None) -> int:
+        """Buffer one event for the next fsync batch; returns its offset"""
+        if event_type not in _TYPE_CODES:
+            raise JournalError(f"Unknown journal event type: {event_type}")
+        if not self.is_open:
+            raise JournalError("Journal is not open")
+
+        event = {
+            'type': event_type,
+            'ts': time.time(),
+            'guild_id': int(guild_id),
+            'discord_id': int(discord_id),
+            'message_id': int(message_id or 0),
+            'data': data or {},
+        }
+        payload = json.dumps(event, separators=(',', ':'), default=str).encode('utf-8')
+        frame = _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+        offset = self._end
+        self._end += len(frame)
+        code = _TYPE_CODES[event_type]
+        self._buffer.append((frame, _INDEX_ENTRY.pack(event['guild_id'], event['discord_id'], offset, code)))
+        self._unflushed[offset] = event
+        self._remember(event['guild_id'], event['discord_id'], offset, code)
+        apply_event(self.pending, event)
+        self.appended += 1
+        self._since_checkpoint += 1
+
+        if self._task is None:
+            self._write(self._take())   # No event loop running (scripts): write through
+        else:
+            self._wakeup.set()
+        return offset
+
+    # The helpers below are no-ops until the journal is opened (e.g. offline tools)
+
+    def submitted(self, record) -> Optional[int]:
+        if not self.is_open:
+            return None
+        return self.append('submitted', record.guild_id, record.discord_id, record.message_id, record.as_dict())
+
+    def decided(self, record, approved: bool, moderator_id: int = None, **extra) -> Optional[int]:
+        if not self.is_open:
+            return None
+        data = dict(extra)
+        if moderator_id is not None:
+            data['moderator_id'] = moderator_id
+        return self.append(
+            'approved' if approved else 'rejected',
+            record.guild_id, record.discord_id, record.message_id, data
+        )
+
+    def withdrawn(self, guild_id: int, discord_id: int, reason: str = '') -> Optional[int]:
+        """Record a withdrawal, but only if the user has a submission still pending"""
+        if not self.is_open or not _user_keys(self.pending, guild_id, discord_id):
+            return None
+        return self.append('withdrawn', guild_id, discord_id, data={'reason': reason} if reason else None)
+
+    def _take(self) -> list:
+        batch, self._buffer = self._buffer, []
+        return batch
+
+    def _write(self, batch: list):
+        if not batch:
+            return
+        self._file.write(b''.join(frame for frame, _ in batch))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        # The index can always be rebuilt from the log, so it is not fsynced
+        self._index_file.write(b''.join(entry for _, entry in batch))
+        self._index_file.flush()
+        self.fsyncs += 1
+
+    async def flush(self):
+        """Write and fsync everything appended so far"""
+        async with self._lock:
+            batch = self._take()
+            if not batch:
+                return
+            await asyncio.to_thread(self._write, batch)
+            durable_end = self._durable_end()
+            for offset in [o for o in self._unflushed if o < durable_end]:
+                del self._unflushed[offset]
+
+    def _durable_end(self) -> int:
+        return self._end - sum(len(frame) for frame, _ in self._buffer)
+
+    async def _flush_loop(self):
+        while True:
+            await self._wakeup.wait()
+            if len(self._buffer) < self.flush_batch:
+                await asyncio.sleep(self.flush_interval)   # Let the batch fill up
+            self._wakeup.clear()
+            try:
+                await self.flush()
+                if self._since_checkpoint >= self.checkpoint_every:
+                    await self.checkpoint()
+            except Exception as e:
+                log.exception(f"❌ Journal flush failed: {e}")
+
+    def start(self):
+        """Start the background flusher (call from the running event loop)"""
+        if self._task is None or self._task.done():
+            self._lock = asyncio.Lock()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._flush_loop(), name="registration-journal")
+
+    def close(self):
+        """Flush synchronously and close the files"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._file is not None:
+            self._write(self._take())
+            self._unflushed.clear()
+            self._file.close()
+            self._index_file.close()
+            self._file = self._index_file = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+            self._mapped = 0
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def _view(self, needed: int):
+        """mmap of the log covering at least `needed` bytes (remapped as the log grows)"""
+        if self._map is None or self._mapped < needed:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            size = os.path.getsize(self.path)
+            if size == 0:
+                self._mapped = 0
+                return None
+            with open(self.path, 'rb') as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped = size
+        return self._map
+
+    def _decode(self, view, offset: int) -> Tuple[Optional[dict], int]:
+        """(event, next offset); event is None for a torn or corrupt frame"""
+        if offset + _HEADER.size > len(view):
+            return None, offset
+        length, crc = _HEADER.unpack_from(view, offset)
+        start = offset + _HEADER.size
+        payload = view[start:start + length]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            return None, offset
+        return json.loads(payload), start + length
+
+    def read_at(self, offset: int) -> dict:
+        event = self._unflushed.get(offset)
+        if event is not None:
+            return event
+        view = self._view(offset + _HEADER.size)
+        event = self._decode(view, offset)[0] if view is not None else None
+        if event is None:
+            raise JournalError(f"No journal event at offset {offset}")
+        return event
+
+    def _scan_file(self, start: int) -> Iterator[Tuple[int, int, dict]]:
+        """(offset, next offset, event) up to the first torn or corrupt frame"""
+        if os.path.getsize(self.path) <= start:
+            return
+        with open(self.path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                offset = start
+                while True:
+                    event, next_offset = self._decode(view, offset)
+                    if event is None:
+                        return
+                    yield offset, next_offset, event
+                    offset = next_offset
+
+    def scan(self, start: int = 0) -> Iterator[Tuple[int, dict]]:
+        """(offset, event) for every durable event from `start` on"""
+        for offset, _, event in self._scan_file(start):
+            if self._file is not None and offset >= self._durable_end():
+                return
+            yield offset, event
+
+    def latest_status(self, guild_id: int, discord_id: int) -> Optional[str]:
+        code = self._latest.get((guild_id, discord_id))
+        return EVENT_TYPES[code] if code is not None else None
+
+    def latest(self, guild_id: int, discord_id: int) -> Optional[dict]:
+        offsets = self._history.get((guild_id, discord_id))
+        return self.read_at(offsets[-1]) if offsets else None
+
+    def history(self, guild_id: int, discord_id: int) -> list:
+        return [self.read_at(offset) for offset in self._history.get((guild_id, discord_id), ())]
+
+    # ------------------------------------------------------------------
+    # Checkpoints and replay
+    # ------------------------------------------------------------------
+
+    async def checkpoint(self):
+        """Persist the pending-submission state and the offset it covers"""
+        state = dict(self.pending)
+        offset = self._end
+        self._since_checkpoint = 0
+        await self.flush()   # The log must be durable up to the checkpoint offset
+        await asyncio.to_thread(self._write_checkpoint, offset, state)
+
+    def _write_checkpoint(self, offset: int, state: dict):
+        path = f"{self.path}.ckpt"
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'offset': offset, 'state': state}, f, default=str)
+        os.replace(tmp_path, path)
+
+    def _read_checkpoint(self) -> Tuple[int, dict]:
+        path = f"{self.path}.ckpt"
+        if not os.path.exists(path):
+            return 0, {}
+        try:
+            with open(path, encoding='utf-8') as f:
+                raw = json.load(f)
+        except (OSError, ValueError) as e:
+            log.info(f"⚠️ Ignoring unreadable journal checkpoint: {e}")
+            return 0, {}
+        if raw.get('offset', 0) > self._durable_end():
+            return 0, {}   # The log was truncated behind the checkpoint
+        # Older checkpoints keyed the state by "guild:user"
+        state = {str(event['message_id']): event
+                 for event in (raw.get('state') or {}).values() if event.get('message_id')}
+        return raw['offset'], state
+
+    def replay(self, apply=apply_event, state: dict = None, from_checkpoint: bool = True) -> dict:
+        """Rebuild state by applying events after the latest checkpoint
+
+        A custom `apply` must start from its own `state` (the checkpoint only
+        stores the default pending-submission state).
+        """
+        offset = 0
+        if from_checkpoint and apply is apply_event and state is None:
+            offset, state = self._read_checkpoint()
+        state = {} if state is None else state
+        for _, event in self.scan(offset):
+            state = apply(state, event)
+        return state
+
+    @staticmethod
+    def _record_from_event(event: dict):
+        from registration_records import RegistrationRecord
+
+        try:
+            record = RegistrationRecord.from_submission(event['data'])
+        except (KeyError, TypeError, ValueError) as e:
+            log.info(f"⚠️ Skipping journal entry for {event['discord_id']}: {e}")
+            return None
+        record.channel_id = int(event['data'].get('channel_id') or 0)
+        record.message_id = event['message_id']
+        return record
+
+    def pending_record(self, guild_id: int, discord_id: int, message_id: int):
+        """The undecided RegistrationRecord for an approval message, rebuilt from its submission"""
+        event = self.pending.get(str(message_id))
+        if event is None or event['guild_id'] != guild_id or event['discord_id'] != discord_id:
+            return None
+        return self._record_from_event(event)
+
+    def restore_pending(self, store) -> int:
+        """Put undecided submissions back into a RegistrationStore after a restart"""
+        restored = 0
+        for event in self.pending.values():
+            record = self._record_from_event(event)
+            if record is None:
+                continue
+            store.put(record)
+            restored += 1
+        return restored
+
+
+def journal_path(cluster) -> str:
+    """One journal per cluster process; they never share a file"""
+    if cluster.cluster_count > 1:
+        return f"{JOURNAL_PATH}.{cluster.cluster_id}"
+    return JOURNAL_PATH
+
+
+# Shared journal used by intake and the approval handlers
+registration_journal = RegistrationJournal()
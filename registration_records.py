@@ -0,0 +1,293 @@
+"""registration_records.py - Typed browser registration records keyed by approval message"""
+
+import re
+from dataclasses import dataclass, asdict
+from typing import Optional, Tuple
+
+import discord
+
+from pending_index import pending_index
+from registration_journal import registration_journal
+from strength_engine import strength_engine
+from strength_index import strength_index
+
+PENDING_TITLE = "Browser Registration - PENDING APPROVAL"
+
+# Keep this many undecided registrations in memory before dropping the oldest
+MAX_PENDING_RECORDS = 5000
+
+
+@dataclass(slots=True)
+class RegistrationRecord:
+    """One browser registration, parsed once at intake"""
+    discord_id: int
+    guild_id: int = 0
+    channel_id: int = 0
+    message_id: int = 0
+    username: str = ''
+    game_username: str = ''
+    game_id: str = ''
+    community: str = ''
+    timezone: str = 'UTC'
+    crit_level: int = 0
+    legendarity: int = 0
+    perks_level: int = 0
+    hero: str = ''
+    hero_level: int = 1
+    hero_item: Optional[str] = None
+    hero_item_level: Optional[int] = None
+    cards: Tuple[Tuple[str, str], ...] = ()
+    total_strength: int = 0
+    division: str = 'Unknown'
+    export_code: Optional[str] = None
+
+    @classmethod
+    def from_submission(cls, data: dict) -> 'RegistrationRecord':
+        """Build a record from the browser form JSON (raises ValueError on bad input)"""
+        def as_int(key, default=0):
+            value = data.get(key)
+            return int(value) if value not in (None, '') else default
+
+        hero_item = data.get('hero_item') or None
+        if hero_item == 'None':
+            hero_item = None
+        return cls(
+            discord_id=int(data['discord_id']),
+            guild_id=int(data['guild_id']),
+            username=str(data.get('username') or ''),
+            game_username=str(data.get('game_username') or ''),
+            game_id=str(data.get('game_id') or ''),
+            community=str(data.get('community') or ''),
+            timezone=str(data.get('timezone') or 'UTC'),
+            crit_level=as_int('crit_level'),
+            legendarity=as_int('legendarity'),
+            perks_level=as_int('perks_level'),
+            hero=str(data.get('hero') or ''),
+            hero_level=as_int('hero_level', 1),
+            hero_item=hero_item,
+            hero_item_level=as_int('hero_item_level', None) if hero_item else None,
+            cards=tuple(
+                (str(c['name']), str(c['level'])) for c in data.get('cards') or () if c.get('name')
+            ),
+            export_code=data.get('export_code') or None,
+        )
+
+    def as_dict(self) -> dict:
+        """Dict form used by the approval flow (same keys as the old embed parser)"""
+        data = asdict(self)
+        data['cards'] = [{'name': name, 'level': level} for name, level in self.cards]
+        return data
+
+    def participant_kwargs(self, username: str) -> dict:
+        """Keyword arguments for db.add_participant"""
+        return {
+            'guild_id': self.guild_id,
+            'discord_id': self.discord_id,
+            'username': username,
+            'game_username': self.game_username,
+            'game_id': self.game_id,
+            'crit_level': self.crit_level,
+            'legendarity': self.legendarity,
+            'perks_level': self.perks_level,
+            'division': self.division,
+            'timezone': self.timezone,
+            'community': self.community,
+            'hero': self.hero,
+            'hero_level': self.hero_level,
+            'hero_item': self.hero_item,
+            'hero_item_level': self.hero_item_level,
+            'cards': [{'name': name, 'level': level} for name, level in self.cards],
+        }
+
+
+class RegistrationStore:
+    """In-memory registration records with O(1) lookup by approval message id
+
+    Records evicted at max_records stay in pending_index (which holds only
+    the fields the moderator queue shows) until they are decided.
+    """
+
+    def __init__(self, max_records: int = MAX_PENDING_RECORDS):
+        self.max_records = max_records
+        self._records = {}
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, message_id):
+        return message_id in self._records
+
+    def put(self, record: RegistrationRecord):
+        # Never trust the division shown in the embed; recompute it server-side
+        strength_engine.apply_to_record(record)
+        self._records.pop(record.message_id, None)
+        self._records[record.message_id] = record
+        pending_index.add(record)
+        while len(self._records) > self.max_records:
+            # Dicts keep insertion order, so the first key is the oldest record
+            self._records.pop(next(iter(self._records)))
+
+    def get(self, message_id: int) -> Optional[RegistrationRecord]:
+        return self._records.get(message_id)
+
+    def pop(self, message_id: int) -> Optional[RegistrationRecord]:
+        pending_index.remove(message_id)
+        return self._records.pop(message_id, None)
+
+    def pop_user(self, guild_id: int, discord_id: int) -> list:
+        """Drop a user's pending records (they left the guild); rare, so a scan is fine"""
+        message_ids = [m for m, r in self._records.items()
+                       if r.guild_id == guild_id and r.discord_id == discord_id]
+        records = [self.pop(message_id) for message_id in message_ids]
+        # Evicted records are only left in the index
+        pending_index.remove_user(guild_id, discord_id)
+        return records
+
+    def values(self):
+        return list(self._records.values())
+
+    def for_message(self, message: discord.Message) -> Optional[RegistrationRecord]:
+        """Return the stored record, falling back to parsing the embed of a legacy message
+
+        Only a still-pending legacy message is stored (and indexed); a decided
+        one is parsed for the caller and left out of the queue.
+        """
+        record = self._records.get(message.id)
+        if record is None and message.embeds:
+            record = parse_registration_embed(message.embeds[0], message)
+            if record is not None and is_pending_registration(message):
+                self.put(record)
+        return record
+
+
+# Shared store used by the approval cog and the views
+registration_store = RegistrationStore()
+
+
+def withdraw_member(guild_id: int, discord_id: int, reason: str = 'left guild') -> list:
+    """Withdraw a member who left: journal it, drop pending records and their ladder entry
+
+    Takes plain ids so it can run from on_raw_member_remove, which also fires
+    for members that were never cached. Returns the dropped records.
+    """
+    registration_journal.withdrawn(guild_id, discord_id, reason=reason)
+    records = registration_store.pop_user(guild_id, discord_id)
+    # Approved participants who leave are withdrawn from matchmaking
+    strength_index.remove(guild_id, discord_id)
+    return records
+
+
+# ============================================================================
+# LEGACY EMBED PARSER
+# ============================================================================
+
+_MENTION_RE = re.compile(r"<@!?(\d+)>")
+_FOOTER_ID_RE = re.compile(r"User ID:\s*(\d+)")
+_LEVEL_SUFFIX_RE = re.compile(r"^(.*?)\s*(?:\(Lv\s*(\d+)\)|-\s*Level\s*(\d+))\s*$")
+_DECK_LINE_RE = re.compile(r"^\s*\d+\.\s+(.+?)\s+-\s+Lv\s+(\S+)\s*$")
+_STRENGTH_PATTERNS = {
+    'crit_level': re.compile(r"Base Crit:\**\s*(\d+)"),
+    'legendarity': re.compile(r"Legendarity:\**\s*(\d+)"),
+    'perks_level': re.compile(r"(?<![A-Za-z])Perks:\**\s*(\d+)"),
+    'total_strength': re.compile(r"Total Strength:\**\s*(\d+)"),
+}
+_DIVISION_RE = re.compile(r"Division:\**\s*([^\n*]+)")
+
+
+def is_pending_registration(message: discord.Message) -> bool:
+    """True for bot-posted browser registration messages that still await a decision"""
+    return bool(message.embeds) and PENDING_TITLE in (message.embeds[0].title or '')
+
+
+def _first_int(text: str) -> Optional[int]:
+    match = re.search(r"-?\d+", text or '')
+    return int(match.group()) if match else None
+
+
+def _split_level(value: str):
+    """Split "Name (Lv 50)" / "Name - Level 3" into (name, level)"""
+    match = _LEVEL_SUFFIX_RE.match(value)
+    if not match:
+        return value.strip(), None
+    level = match.group(2) or match.group(3)
+    return match.group(1).strip(), int(level)
+
+
+def parse_registration_embed(embed: discord.Embed, message: Optional[discord.Message] = None) -> Optional[RegistrationRecord]:
+    """Rebuild a RegistrationRecord from the display embed (legacy messages only)"""
+    discord_id = None
+    values = {}
+    cards = []
+    export_code = None
+
+    for embed_field in embed.fields:
+        name = embed_field.name.lower()
+        value = embed_field.value or ''
+
+        if name.endswith("discord user"):
+            match = _MENTION_RE.search(value)
+            if match:
+                discord_id = int(match.group(1))
+        elif "game username" in name:
+            values['game_username'] = value
+        elif name.endswith("username"):
+            values['username'] = value
+        elif "game id" in name:
+            values['game_id'] = value
+        elif "community" in name:
+            values['community'] = value
+        elif "timezone" in name:
+            values['timezone'] = value
+        elif "critical damage" in name:
+            crit = _first_int(value)
+            if crit is not None:
+                values.setdefault('crit_level', crit)
+        elif "legendarity" in name:
+            values['legendarity'] = _first_int(value) or 0
+        elif "perks" in name:
+            values['perks_level'] = _first_int(value) or 0
+        elif "hero item" in name:
+            if value and value != "None":
+                item, level = _split_level(value)
+                values['hero_item'] = item
+                values['hero_item_level'] = level
+        elif "hero" in name:
+            hero, level = _split_level(value)
+            values['hero'] = hero
+            if level is not None:
+                values['hero_level'] = level
+        elif "export code" in name:
+            export_code = value.strip('`').strip() or None
+        elif "deck" in name or "card" in name:
+            for line in value.split('\n'):
+                match = _DECK_LINE_RE.match(line)
+                if match:
+                    cards.append((match.group(1), match.group(2)))
+        elif "strength" in name:
+            for key, pattern in _STRENGTH_PATTERNS.items():
+                match = pattern.search(value)
+                if match:
+                    values[key] = int(match.group(1))
+            match = _DIVISION_RE.search(value)
+            if match:
+                values['division'] = match.group(1).strip()
+
+    if discord_id is None and embed.footer and embed.footer.text:
+        match = _FOOTER_ID_RE.search(embed.footer.text)
+        if match:
+            discord_id = int(match.group(1))
+
+    if discord_id is None:
+        return None
+
+    record = RegistrationRecord(
+        discord_id=discord_id,
+        cards=tuple(cards),
+        export_code=export_code,
+        **values
+    )
+    if message is not None:
+        record.message_id = message.id
+        record.channel_id = message.channel.id
+        record.guild_id = message.guild.id if message.guild else 0
+    return record
@@ -0,0 +1,216 @@
+"""round_robin.py - Lazy round-robin schedules (circle method) that survive roster changes
+
+Nothing beyond the played rounds is stored: any future round is computed on
+demand in O(n) from the slot list, so jumping to round k costs the same as
+generating round 1.
+"""
+
+from dataclasses import dataclass, field
+
+BYE = None
+
+
+@dataclass(slots=True)
+class Round:
+    number: int
+    matches: list
+    byes: list = field(default_factory=list)
+
+
+def circle_round(slots: list, index: int) -> list:
+    """Pairs for round `index` (0-based) of the circle method over an even slot list"""
+    n = len(slots)
+    m = n - 1
+    rotating = slots[1:]
+    arrangement = [slots[0]] + [rotating[(j - index) % m] for j in range(m)]
+    return [(arrangement[i], arrangement[n - 1 - i]) for i in range(n // 2)]
+
+
+def slot_opponent(slots: list, slot: int, index: int):
+    """Who sits opposite `slot` in round `index`, in O(1)"""
+    n = len(slots)
+    m = n - 1
+    if slot == 0:
+        return slots[1 + (n - 2 - index) % m]
+    position = 1 + (slot - 1 + index) % m
+    partner = n - 1 - position
+    if partner == 0:
+        return slots[0]
+    return slots[1 + (partner - 1 - index) % m]
+
+
+def _pair(a, b) -> frozenset:
+    return frozenset((a, b))
+
+
+class RoundRobinSchedule:
+    """Round-robin schedule that generates rounds lazily.
+
+    Adding or removing a player only changes rounds that have not been played:
+    a removed player's slot becomes a bye, a new player takes a free slot (or
+    the circle is re-seeded from the current round with already-played pairs
+    skipped), and anyone a newcomer can no longer meet in the circle gets a
+    make-up match in extra rounds at the end.
+    """
+
+    def __init__(self, players: list):
+        players = list(players)
+        if len(set(players)) != len(players):
+            raise ValueError("Players must be unique")
+        if len(players) % 2:
+            players.append(BYE)
+        self._slots = players
+        self._epoch = 0            # played rounds before the current circle started
+        self._played = []          # list[Round]
+        self._played_pairs = set()
+        self._makeup_pairs = []
+        self._makeup_rounds = None
+        self._makeup_floor = 0     # played rounds when the make-up rounds were last regrouped
+        self.version = 0           # bumped on every change, used to detect stale snapshots
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    @property
+    def players(self) -> list:
+        return [p for p in self._slots if p is not BYE]
+
+    @property
+    def played_rounds(self) -> int:
+        return len(self._played)
+
+    @property
+    def circle_rounds(self) -> int:
+        return max(0, len(self._slots) - 1)
+
+    @property
+    def _makeup_start(self) -> int:
+        return max(self._epoch + self.circle_rounds, self._makeup_floor)
+
+    @property
+    def total_rounds(self) -> int:
+        return max(self._makeup_start + len(self._get_makeup_rounds()), len(self._played))
+
+    def round(self, number: int) -> Round:
+        """Round `number` (1-based), played or not"""
+        if number < 1 or number > self.total_rounds:
+            raise IndexError(f"Round {number} is out of range (1-{self.total_rounds})")
+        if number <= len(self._played):
+            return self._played[number - 1]
+
+        index = number - 1 - self._epoch
+        if index < self.circle_rounds:
+            pairs = circle_round(self._slots, index)
+        else:
+            pairs = self._get_makeup_rounds()[number - 1 - self._makeup_start]
+
+        matches = [
+            (a, b) for a, b in pairs
+            if a is not BYE and b is not BYE and _pair(a, b) not in self._played_pairs
+        ]
+        busy = {p for match in matches for p in match}
+        return Round(number, matches, [p for p in self.players if p not in busy])
+
+    def current_round(self):
+        """The next round to be played, or None when the schedule is finished"""
+        number = len(self._played) + 1
+        return self.round(number) if number <= self.total_rounds else None
+
+    def upcoming(self):
+        """Lazily yield every unplayed round"""
+        for number in range(len(self._played) + 1, self.total_rounds + 1):
+            yield self.round(number)
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def complete_round(self) -> Round:
+        """Lock in the current round as played"""
+        current = self.current_round()
+        if current is None:
+            raise IndexError("All rounds have been played")
+        self._played.append(current)
+        for a, b in current.matches:
+            self._played_pairs.add(_pair(a, b))
+        self.version += 1
+        return current
+
+    def remove_player(self, player):
+        """Withdraw a player: their unplayed matches become byes"""
+        slot = self._slots.index(player)
+        self._slots[slot] = BYE
+        self._makeup_pairs = [p for p in self._makeup_pairs if player not in p]
+        self._invalidate_makeup()
+        self.version += 1
+
+    def add_player(self, player):
+        """Late registration: patch only the rounds that have not been played"""
+        if player in self._slots:
+            raise ValueError(f"{player!r} is already scheduled")
+        self._invalidate_makeup()
+        self.version += 1
+
+        if BYE in self._slots:
+            slot = self._slots.index(BYE)
+            self._slots[slot] = player
+            start = len(self._played) - self._epoch
+            future = {slot_opponent(self._slots, slot, i) for i in range(start, self.circle_rounds)}
+            for other in self.players:
+                if other is player or other in future:
+                    continue
+                if _pair(player, other) not in self._played_pairs:
+                    self._makeup_pairs.append((player, other))
+            return
+
+        # No free slot: re-seed the circle from here; played pairs are skipped,
+        # and the new circle covers every pair that is still owed
+        self._slots = self._slots + [player, BYE]
+        self._epoch = len(self._played)
+        self._makeup_pairs = []
+
+    def _invalidate_makeup(self):
+        # Regroup only what is still owed, starting from the current round
+        self._makeup_pairs = [p for p in self._makeup_pairs if _pair(*p) not in self._played_pairs]
+        self._makeup_floor = len(self._played)
+        self._makeup_rounds = None
+
+    def _get_makeup_rounds(self) -> list:
+        """Greedily pack make-up pairs into rounds where nobody plays twice"""
+        if self._makeup_rounds is None:
+            rounds = []
+            for a, b in self._makeup_pairs:
+                for pairs, busy in rounds:
+                    if a not in busy and b not in busy:
+                        pairs.append((a, b))
+                        busy.update((a, b))
+                        break
+                else:
+                    rounds.append(([(a, b)], {a, b}))
+            self._makeup_rounds = [pairs for pairs, _ in rounds]
+        return self._makeup_rounds
+
+
+def format_round(round_: Round, names: dict = None) -> str:
+    """Discord-ready text for one round (used by the bracket commands to post the current round)"""
+    names = names or {}
+    label = lambda p: names.get(p, str(p))
+    lines = [f"**Round {round_.number}**"]
+    lines += [f"⚔️ {label(a)} vs {label(b)}" for a, b in round_.matches]
+    if round_.byes:
+        lines.append(f"💤 Bye: {', '.join(label(p) for p in round_.byes)}")
+    return "\n".join(lines)
+
+
+# Active schedules per (guild_id, division), shared by the bracket commands
+schedules = {}
+
+
+def get_schedule(guild_id: int, division: str, players: list = None) -> RoundRobinSchedule:
+    """Return the division's schedule, creating it from `players` on first use"""
+    key = (guild_id, division)
+    schedule = schedules.get(key)
+    if schedule is None and players is not None:
+        schedule = schedules[key] = RoundRobinSchedule(players)
+    return schedule
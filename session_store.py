@@ -0,0 +1,309 @@
+"""session_store.py - Bounded TTL/LRU store for in-progress Discord registrations"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+SESSION_TTL = 30 * 60          # seconds of inactivity before a session expires
+MAX_SESSIONS = 5000
+MAX_SESSION_BYTES = 16 * 1024 * 1024
+SNAPSHOT_INTERVAL = 60         # seconds between disk snapshots when enabled
+SNAPSHOT_PATH = os.getenv('REGISTRATION_SESSION_SNAPSHOT')  # unset = no snapshots
+
+
+class RegistrationSession:
+    """One half-finished registration; also behaves like the dict it replaces
+
+    Item writes are reported to the owning store so its size accounting and
+    snapshots follow them. A list changed in place (e.g. `cards.append`) must
+    be written back (`session['cards'] = cards`) to be re-measured.
+    """
+
+    FIELDS = (
+        'game_username', 'game_id', 'crit_level', 'legendarity', 'perks_level',
+        'timezone', 'community', 'hero', 'hero_level', 'hero_item', 'hero_item_level',
+    )
+    ATTRIBUTES = ('user_id', 'guild_id', 'cards', 'created_at', 'touched_at')
+    __slots__ = ATTRIBUTES + FIELDS + ('extra', 'assigned', 'store')
+
+    def __init__(self, user_id: int, guild_id: int = 0, data: dict = None):
+        now = time.time()
+        self.user_id = user_id
+        self.guild_id = guild_id
+        self.cards = []
+        self.created_at = now
+        self.touched_at = now
+        self.extra = None
+        self.assigned = set()   # FIELDS that have been set (None is a valid value)
+        self.store = None
+        for name in self.FIELDS:
+            setattr(self, name, None)
+        for key, value in (data or {}).items():
+            self[key] = value
+
+    def _changed(self):
+        if self.store is not None:
+            self.store.touch(self.user_id)
+
+    # dict-style access so existing `registration_data[uid]['cards']` code keeps working
+    def __getitem__(self, key):
+        if key in self.ATTRIBUTES:
+            return getattr(self, key)
+        if key in self.FIELDS:
+            if key not in self.assigned:
+                raise KeyError(key)
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self.ATTRIBUTES:
+            setattr(self, key, value)
+        elif key in self.FIELDS:
+            setattr(self, key, value)
+            self.assigned.add(key)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+        self._changed()
+
+    def __delitem__(self, key):
+        if key in self.assigned:
+            setattr(self, key, None)
+            self.assigned.discard(key)
+        elif self.extra and key in self.extra:
+            del self.extra[key]
+        else:
+            raise KeyError(key)
+        self._changed()
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def to_dict(self) -> dict:
+        data = {name: getattr(self, name) for name in self.FIELDS if name in self.assigned}
+        data.update(self.extra or {})
+        data['cards'] = self.cards
+        return data
+
+    def approx_size(self) -> int:
+        return sys.getsizeof(self) + len(json.dumps(self.to_dict(), default=str))
+
+    def to_snapshot(self) -> dict:
+        return {
+            'user_id': self.user_id,
+            'guild_id': self.guild_id,
+            'created_at': self.created_at,
+            'touched_at': self.touched_at,
+            'data': self.to_dict(),
+        }
+
+    @classmethod
+    def from_snapshot(cls, raw: dict) -> 'RegistrationSession':
+        session = cls(raw['user_id'], raw.get('guild_id', 0), raw.get('data'))
+        session.created_at = raw.get('created_at', session.created_at)
+        session.touched_at = raw.get('touched_at', session.touched_at)
+        return session
+
+
+class SessionStore(MutableMapping):
+    """Sessions keyed by user id with TTL expiry, LRU eviction and a memory cap"""
+
+    def __init__(self, ttl: float = SESSION_TTL, max_sessions: int = MAX_SESSIONS,
+                 max_bytes: int = MAX_SESSION_BYTES, snapshot_path: str = SNAPSHOT_PATH):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.snapshot_path = snapshot_path
+        self._sessions = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._dirty = False
+        self._task = None
+        self.evicted = 0
+        self.expired = 0
+
+    def _expired(self, session: RegistrationSession, now: float) -> bool:
+        return now - session.touched_at > self.ttl
+
+    def _drop(self, user_id):
+        session = self._sessions.pop(user_id, None)
+        if session is not None:
+            session.store = None
+        self._bytes -= self._sizes.pop(user_id, 0)
+        self._dirty = True
+
+    def _account(self, user_id, session: RegistrationSession):
+        size = session.approx_size()
+        self._bytes += size - self._sizes.get(user_id, 0)
+        self._sizes[user_id] = size
+
+    def _evict(self):
+        now = time.time()
+        # Least recently used sessions sit at the front
+        while self._sessions:
+            user_id, session = next(iter(self._sessions.items()))
+            if self._expired(session, now):
+                self._drop(user_id)
+                self.expired += 1
+            elif len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes:
+                self._drop(user_id)
+                self.evicted += 1
+            else:
+                break
+
+    def __getitem__(self, user_id) -> RegistrationSession:
+        session = self._sessions[user_id]
+        now = time.time()
+        if self._expired(session, now):
+            self._drop(user_id)
+            self.expired += 1
+            raise KeyError(user_id)
+        # Reads only refresh the TTL/LRU position; snapshots follow writes
+        session.touched_at = now
+        self._sessions.move_to_end(user_id)
+        return session
+
+    def __setitem__(self, user_id, value):
+        if not isinstance(value, RegistrationSession):
+            value = RegistrationSession(user_id, data=value)
+        previous = self._sessions.get(user_id)
+        if previous is not None and previous is not value:
+            previous.store = None
+        value.store = self
+        self._sessions[user_id] = value
+        self._sessions.move_to_end(user_id)
+        self._account(user_id, value)
+        self._dirty = True
+        self._evict()
+
+    def __delitem__(self, user_id):
+        if user_id not in self._sessions:
+            raise KeyError(user_id)
+        self._drop(user_id)
+
+    def __contains__(self, user_id):
+        try:
+            self[user_id]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(list(self._sessions))
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def start(self, guild_id: int, user_id: int) -> RegistrationSession:
+        """Begin (or restart) a registration for a user"""
+        session = RegistrationSession(user_id, guild_id)
+        self[user_id] = session
+        return session
+
+    def touch(self, user_id):
+        """Re-measure a session after it was written to (called by RegistrationSession)"""
+        session = self._sessions.get(user_id)
+        if session is not None:
+            self._account(user_id, session)
+            self._dirty = True
+            self._evict()
+
+    @property
+    def approx_bytes(self) -> int:
+        return self._bytes
+
+    # ------------------------------------------------------------------
+    # Disk snapshots
+    # ------------------------------------------------------------------
+
+    def save(self, path: str = None):
+        """Write all live sessions to disk atomically"""
+        path = path or self.snapshot_path
+        if not path:
+            return
+        self._evict()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump([s.to_snapshot() for s in self._sessions.values()], f, default=str)
+        os.replace(tmp_path, path)
+        self._dirty = False
+
+    def load(self, path: str = None) -> int:
+        """Restore sessions saved by save(); expired ones are skipped"""
+        path = path or self.snapshot_path
+        if not path or not os.path.exists(path):
+            return 0
+        with open(path, encoding='utf-8') as f:
+            raw_sessions = json.load(f)
+        now = time.time()
+        restored = 0
+        for raw in sorted(raw_sessions, key=lambda r: r.get('touched_at', 0)):
+            session = RegistrationSession.from_snapshot(raw)
+            if not self._expired(session, now):
+                session.store = self
+                self._sessions[session.user_id] = session
+                self._account(session.user_id, session)
+                restored += 1
+        self._evict()
+        self._dirty = False
+        return restored
+
+    async def _snapshot_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(SNAPSHOT_INTERVAL)
+            self._evict()
+            if self._dirty:
+                payload = [s.to_snapshot() for s in self._sessions.values()]
+                self._dirty = False
+                await loop.run_in_executor(None, self._write_snapshot, payload)
+
+    def _write_snapshot(self, payload: list):
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, default=str)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def start_snapshots(self):
+        """Restore the last snapshot and keep saving in the background (if a path is set)"""
+        if not self.snapshot_path or (self._task and not self._task.done()):
+            return 0
+        restored = self.load()
+        self._task = asyncio.create_task(self._snapshot_loop(), name="session-snapshots")
+        return restored
+
+
+# Shared store for every registration view
+registration_sessions = SessionStore()
+
+
+def install(registration_modals_module):
+    """Point registration_modals.registration_data at the shared store"""
+    existing = getattr(registration_modals_module, 'registration_data', None)
+    if existing is registration_sessions:
+        return
+    for user_id, data in dict(existing or {}).items():
+        registration_sessions[user_id] = data
+    registration_modals_module.registration_data = registration_sessions
@@ -0,0 +1,197 @@
+"""snapshots.py - Versioned, pre-compressed JSON snapshots of public guild data
+
+The website reads divisions, communities, pantheon bonuses, the schedule and
+results from these snapshots instead of live bot state. A snapshot is only
+rebuilt when its source fingerprint changes, and its body is serialized and
+gzip-compressed once per version.
+"""
+
+import gzip
+import hashlib
+import inspect
+import json
+import time
+
+from round_robin import schedules, format_round
+from standings import standings
+from strength_engine import strength_engine
+from strength_index import strength_index
+from async_database import async_db
+
+
+class Snapshot:
+    __slots__ = ('version', 'fingerprint', 'body', 'gzip_body', 'etag', 'generated_at')
+
+    def __init__(self, version, fingerprint, body: bytes):
+        self.version = version
+        self.fingerprint = fingerprint
+        self.body = body
+        self.gzip_body = gzip.compress(body, compresslevel=6)
+        self.etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self.generated_at = time.time()
+
+
+class SnapshotStore:
+    """Per-guild snapshots, each with a cheap fingerprint and a builder"""
+
+    def __init__(self):
+        self._sources = {}
+        self._snapshots = {}
+        self.builds = 0
+
+    def register(self, name: str, fingerprint, build, prepare=None):
+        """`fingerprint(guild_id)` must be cheap; `build(guild_id)` returns JSON data (may be async)
+
+        `prepare(guild_id)` is awaited before the fingerprint is taken, for
+        sources that must load state before they can be read.
+        """
+        self._sources[name] = (fingerprint, build, prepare)
+
+    @property
+    def names(self) -> list:
+        return list(self._sources)
+
+    async def get(self, guild_id: int, name: str) -> Snapshot:
+        fingerprint_fn, build, prepare = self._sources[name]
+        if prepare is not None:
+            await prepare(guild_id)
+        fingerprint = fingerprint_fn(guild_id)
+        current = self._snapshots.get((guild_id, name))
+        if current is not None and current.fingerprint == fingerprint:
+            return current
+
+        data = build(guild_id)
+        if inspect.isawaitable(data):
+            data = await data
+        body = json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        self.builds += 1
+
+        # Same bytes -> keep the version and ETag so clients still get 304s
+        if current is not None and current.body == body:
+            current.fingerprint = fingerprint
+            return current
+
+        snapshot = Snapshot((current.version + 1) if current else 1, fingerprint, body)
+        self._snapshots[(guild_id, name)] = snapshot
+        return snapshot
+
+    def invalidate(self, guild_id: int = None):
+        """Drop cached snapshots (all guilds when guild_id is None)"""
+        if guild_id is None:
+            self._snapshots.clear()
+        else:
+            for key in [k for k in self._snapshots if k[0] == guild_id]:
+                del self._snapshots[key]
+
+
+def conditional_response(snapshot: Snapshot, if_none_match: str, accept_encoding: str):
+    """(status, headers, body) for a snapshot request, honouring If-None-Match"""
+    gzip_ok = 'gzip' in (accept_encoding or '')
+    etag = snapshot.etag[:-1] + '-gz"' if gzip_ok else snapshot.etag
+    headers = {
+        'ETag': etag,
+        'Cache-Control': 'public, max-age=10, must-revalidate',
+        'Vary': 'Accept-Encoding',
+        'X-Snapshot-Version': str(snapshot.version),
+    }
+    if if_none_match:
+        tags = {t.strip().removeprefix('W/') for t in if_none_match.split(',')}
+        if '*' in tags or etag in tags:
+            return 304, headers, b''
+
+    headers['Content-Type'] = 'application/json; charset=utf-8'
+    if gzip_ok:
+        headers['Content-Encoding'] = 'gzip'
+        return 200, headers, snapshot.gzip_body
+    return 200, headers, snapshot.body
+
+
+# ============================================================================
+# SNAPSHOT SOURCES
+# ============================================================================
+
+def _guild_schedules(guild_id: int) -> dict:
+    return {division: s for (g, division), s in schedules.items() if g == guild_id}
+
+
+def _build_pantheon(guild_id: int) -> dict:
+    pantheon = strength_engine.config_for(guild_id).pantheon
+    return {
+        'success': True,
+        'pantheon': [{'name': name, 'boost': boost} for name, boost in pantheon.items()],
+    }
+
+
+def _build_divisions(guild_id: int) -> dict:
+    config = strength_engine.config_for(guild_id)
+    divisions = []
+    for name, (low, high) in config.thresholds.items():
+        ladder = strength_index.ladder(guild_id, name)
+        top = ladder.at_rank(1)
+        divisions.append({
+            'name': name,
+            'min': low,
+            'max': high,
+            'participants': len(ladder),
+            'top_strength': top[1] if top else None,
+        })
+    return {'success': True, 'weights': config.weights, 'divisions': divisions}
+
+
+async def _build_communities(guild_id: int) -> dict:
+    participants = await async_db.get_participants(guild_id)
+    counts = {}
+    for p in participants:
+        community = p.get('community')
+        if community and p.get('approved', True):
+            counts[community] = counts.get(community, 0) + 1
+    return {
+        'success': True,
+        'communities': [{'name': c, 'participants': n} for c, n in sorted(counts.items())],
+    }
+
+
+def _build_schedule(guild_id: int) -> dict:
+    divisions = []
+    for division, schedule in sorted(_guild_schedules(guild_id).items()):
+        current = schedule.current_round()
+        divisions.append({
+            'division': division,
+            'round': current.number if current else None,
+            'total_rounds': schedule.total_rounds,
+            'matches': [list(m) for m in current.matches] if current else [],
+            'byes': current.byes if current else [],
+            'text': format_round(current) if current else None,
+        })
+    return {'success': True, 'schedule': divisions}
+
+
+def _build_results(guild_id: int) -> dict:
+    return {
+        'success': True,
+        'results': [
+            {'division': division, 'standings': [p.as_dict() for p in table.ranking()]}
+            for division, table in sorted(standings.divisions(guild_id).items())
+        ],
+    }
+
+
+snapshot_store = SnapshotStore()
+snapshot_store.register('pantheon', lambda g: strength_engine.config_for(g), _build_pantheon)
+snapshot_store.register(
+    'divisions',
+    lambda g: (strength_engine.config_for(g), strength_index.version(g)),
+    _build_divisions,
+    prepare=strength_index.ensure_loaded
+)
+snapshot_store.register('communities', async_db.version, _build_communities)
+snapshot_store.register(
+    'schedule',
+    lambda g: tuple(sorted((d, s.version) for d, s in _guild_schedules(g).items())),
+    _build_schedule
+)
+snapshot_store.register(
+    'results',
+    lambda g: tuple(sorted((d, s.version) for d, s in standings.divisions(g).items())),
+    _build_results
+)
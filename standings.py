@@ -0,0 +1,176 @@
+"""standings.py - Incremental standings per division, updated as results are reported
+
+Ranking order: points, then head-to-head among players tied on points, then
+strength differential (sum of beaten opponents' strength minus sum of the
+strength of opponents lost to), then discord id for stability.
+"""
+
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from itertools import groupby
+
+POINTS_WIN = 3
+POINTS_DRAW = 1
+POINTS_LOSS = 0
+
+
+class PlayerStanding:
+    __slots__ = ('discord_id', 'wins', 'losses', 'draws', 'points', 'strength_diff')
+
+    def __init__(self, discord_id: int):
+        self.discord_id = discord_id
+        self.wins = 0
+        self.losses = 0
+        self.draws = 0
+        self.points = 0
+        self.strength_diff = 0
+
+    @property
+    def played(self) -> int:
+        return self.wins + self.losses + self.draws
+
+    def sort_key(self) -> tuple:
+        return (-self.points, -self.strength_diff, self.discord_id)
+
+    def as_dict(self) -> dict:
+        return {
+            'discord_id': self.discord_id,
+            'played': self.played,
+            'wins': self.wins,
+            'losses': self.losses,
+            'draws': self.draws,
+            'points': self.points,
+            'strength_diff': self.strength_diff,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class MatchResult:
+    match_id: str
+    winner_id: int
+    loser_id: int
+    winner_strength: int = 0
+    loser_strength: int = 0
+    draw: bool = False
+
+
+class DivisionStandings:
+    """Standings for one division with a sorted, materialized ranking"""
+
+    def __init__(self):
+        self._players = {}
+        self._order = []          # sorted PlayerStanding.sort_key() tuples
+        self._h2h = {}            # (a, b) -> points a took from matches against b
+        self._results = {}        # match_id -> MatchResult
+        self.version = 0
+
+    def __len__(self):
+        return len(self._players)
+
+    def _player(self, discord_id: int) -> PlayerStanding:
+        player = self._players.get(discord_id)
+        if player is None:
+            player = self._players[discord_id] = PlayerStanding(discord_id)
+            insort(self._order, player.sort_key())
+        return player
+
+    def _apply(self, result: MatchResult, sign: int):
+        winner = self._player(result.winner_id)
+        loser = self._player(result.loser_id)
+        for player in (winner, loser):
+            del self._order[bisect_left(self._order, player.sort_key())]
+
+        if result.draw:
+            winner.draws += sign
+            loser.draws += sign
+            winner.points += sign * POINTS_DRAW
+            loser.points += sign * POINTS_DRAW
+            winner_h2h = loser_h2h = POINTS_DRAW
+        else:
+            winner.wins += sign
+            loser.losses += sign
+            winner.points += sign * POINTS_WIN
+            loser.points += sign * POINTS_LOSS
+            winner.strength_diff += sign * result.loser_strength
+            loser.strength_diff -= sign * result.winner_strength
+            winner_h2h, loser_h2h = POINTS_WIN, POINTS_LOSS
+
+        key = (result.winner_id, result.loser_id)
+        self._h2h[key] = self._h2h.get(key, 0) + sign * winner_h2h
+        key = (result.loser_id, result.winner_id)
+        self._h2h[key] = self._h2h.get(key, 0) + sign * loser_h2h
+
+        for player in (winner, loser):
+            insort(self._order, player.sort_key())
+        self.version += 1
+
+    def report(self, result: MatchResult):
+        """Record a match result"""
+        if result.match_id in self._results:
+            raise ValueError(f"Match {result.match_id} has already been reported")
+        if result.winner_id == result.loser_id:
+            raise ValueError("A player cannot play themselves")
+        self._results[result.match_id] = result
+        self._apply(result, +1)
+
+    def undo(self, match_id: str) -> MatchResult:
+        """Reverse a result that was reported by mistake"""
+        result = self._results.pop(match_id, None)
+        if result is None:
+            raise KeyError(f"Match {match_id} has not been reported")
+        self._apply(result, -1)
+        return result
+
+    def get(self, discord_id: int):
+        return self._players.get(discord_id)
+
+    def _resolve_tie(self, group: list) -> list:
+        """Order players tied on points by head-to-head points among themselves"""
+        ids = [p.discord_id for p in group]
+        h2h = {a: sum(self._h2h.get((a, b), 0) for b in ids if b != a) for a in ids}
+        return sorted(group, key=lambda p: (-h2h[p.discord_id], -p.strength_diff, p.discord_id))
+
+    def ranking(self, limit: int = None) -> list:
+        """Players in rank order; ties on points are broken by head-to-head"""
+        players = (self._players[key[2]] for key in self._order)
+        ranked = []
+        for _, group in groupby(players, key=lambda p: p.points):
+            group = list(group)
+            ranked.extend(self._resolve_tie(group) if len(group) > 1 else group)
+            if limit is not None and len(ranked) >= limit:
+                return ranked[:limit]
+        return ranked
+
+    def rank(self, discord_id: int):
+        """1-based rank of a player, or None if they have no standing"""
+        player = self._players.get(discord_id)
+        if player is None:
+            return None
+        # Everyone with more points is ahead; only the tie group needs resolving
+        ahead = bisect_left(self._order, (-player.points, float('-inf'), float('-inf')))
+        end = bisect_left(self._order, (-player.points + 1, float('-inf'), float('-inf')))
+        if end - ahead == 1:
+            return ahead + 1
+        group = [self._players[key[2]] for key in self._order[ahead:end]]
+        return ahead + 1 + self._resolve_tie(group).index(player)
+
+
+class StandingsRegistry:
+    """DivisionStandings per (guild_id, division)"""
+
+    def __init__(self):
+        self._divisions = {}
+
+    def division(self, guild_id: int, division: str) -> DivisionStandings:
+        key = (guild_id, division)
+        standings = self._divisions.get(key)
+        if standings is None:
+            standings = self._divisions[key] = DivisionStandings()
+        return standings
+
+    def divisions(self, guild_id: int) -> dict:
+        return {d: s for (g, d), s in self._divisions.items() if g == guild_id}
+
+
+# Shared standings used by the bracket commands and the web dashboard
+standings = StandingsRegistry()
@@ -0,0 +1,79 @@
+"""startup.py - One-shot startup helpers: phase timing and cached command-tree sync"""
+
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+
+# Where the hash of the last synced command tree is kept between restarts
+COMMAND_TREE_HASH_FILE = os.getenv('COMMAND_TREE_HASH_FILE', '.command_tree_hash')
+
+
+class StartupReport:
+    """Wall-clock timing for each startup phase"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def summary(self) -> str:
+        total = time.perf_counter() - self.started_at
+        width = max((len(name) for name, _ in self.phases), default=0)
+        lines = [f"   {name.ljust(width)}  {seconds * 1000:8.1f} ms" for name, seconds in self.phases]
+        lines.append(f"   {'total'.ljust(width)}  {total * 1000:8.1f} ms")
+        return "⏱️ Startup timing:\n" + "\n".join(lines)
+
+
+def _command_payload(command, tree) -> dict:
+    try:
+        return command.to_dict(tree)
+    except TypeError:  # discord.py < 2.4 takes no tree argument
+        return command.to_dict()
+
+
+def command_tree_hash(tree, guild=None) -> str:
+    """Stable hash of the commands `tree.sync()` would upload"""
+    payloads = sorted(
+        (_command_payload(command, tree) for command in tree.get_commands(guild=guild)),
+        key=lambda p: (p.get('type', 1), p['name'])
+    )
+    raw = json.dumps(payloads, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _read_hashes(path: str) -> dict:
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+async def sync_if_changed(bot, path: str = COMMAND_TREE_HASH_FILE) -> int:
+    """Sync the global command tree only when it differs from the last sync
+
+    Returns the number of synced commands, or -1 when the sync was skipped.
+    Set FORCE_COMMAND_SYNC=1 to always sync.
+    """
+    key = str(bot.application_id)
+    digest = command_tree_hash(bot.tree)
+    hashes = _read_hashes(path)
+    if hashes.get(key) == digest and os.getenv('FORCE_COMMAND_SYNC') != '1':
+        return -1
+
+    synced = await bot.tree.sync()
+    hashes[key] = digest
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(hashes, f)
+    os.replace(tmp_path, path)
+    return len(synced)
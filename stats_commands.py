@@ -0,0 +1,101 @@
+"""stats_commands.py - /botstats: interaction latency, event-loop lag and queue depths"""
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from metrics import registry, interaction_seconds, interaction_errors, loop_lag_seconds
+
+
+def register_gauges(bot):
+    """Queue depths and cache sizes, read whenever metrics are rendered"""
+    from async_database import approval_batcher
+    from browser_approval_handler import decisions
+    from event_hub import event_hub
+    from member_cache import member_cache
+    from outbox import outbox
+    from pending_index import pending_index
+    from registration_journal import registration_journal
+    from registration_records import registration_store
+    from session_store import registration_sessions
+    from ticket_lifecycle import ticket_lifecycle
+
+    registry.gauge('bot_outbox_depth', 'Side effects waiting in the outbox', lambda: outbox.depth)
+    registry.read_counter('bot_outbox_sent_total', 'Outbox jobs completed', lambda: outbox.sent)
+    registry.read_counter('bot_outbox_failed_total', 'Outbox jobs that gave up', lambda: outbox.failed)
+    registry.gauge('bot_approval_batch_pending', 'Approvals waiting for a DB batch',
+                   lambda: approval_batcher.pending)
+    registry.gauge('bot_pending_registrations', 'Undecided browser registrations in memory',
+                   lambda: len(registration_store))
+    registry.gauge('bot_pending_queue', 'Undecided registrations in the moderator queue',
+                   lambda: len(pending_index))
+    registry.gauge('bot_registration_sessions', 'In-progress Discord registrations',
+                   lambda: len(registration_sessions))
+    registry.read_counter('bot_journal_appended_total', 'Registration events appended this run',
+                          lambda: registration_journal.appended)
+    registry.read_counter('bot_journal_fsyncs_total', 'Journal fsync batches written this run',
+                          lambda: registration_journal.fsyncs)
+    registry.read_counter('bot_tickets_archived_total', 'Ticket channels archived this run',
+                          lambda: ticket_lifecycle.archived)
+    registry.read_counter('bot_approval_clicks_coalesced_total',
+                          'Approval clicks that joined a running decision', lambda: decisions.coalesced)
+    registry.gauge('bot_sse_clients', 'Open live-event (SSE) streams', lambda: event_hub.clients)
+    registry.read_counter('bot_sse_events_published_total', 'Live events published this run',
+                          lambda: event_hub.published)
+    registry.read_counter('bot_member_cache_misses_total', 'Member lookups that needed a query',
+                          lambda: member_cache.misses)
+    registry.gauge('bot_guilds', 'Guilds served by this process', lambda: len(bot.guilds))
+    registry.gauge('bot_gateway_latency_seconds', 'Gateway heartbeat latency', lambda: bot.latency)
+
+
+def _ms(seconds) -> str:
+    if seconds is None:
+        return '—'
+    if seconds == float('inf'):
+        return '>10s'
+    return f"{seconds * 1000:.0f}ms"
+
+
+class StatsCommands(commands.Cog):
+    """Runtime statistics for administrators"""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(name="botstats", description="Show interaction latency and queue depths")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def botstats(self, interaction: discord.Interaction):
+        """p50/p99 per component and phase, plus gauges"""
+        embed = discord.Embed(title="📊 Bot Stats", color=discord.Color.blurple())
+
+        components = sorted({labels['component'] for labels in interaction_seconds.label_sets()})
+        for component in components:
+            lines = []
+            for phase in ('defer', 'db', 'rest', 'total'):
+                count = interaction_seconds.count(component=component, phase=phase)
+                if not count:
+                    continue
+                p50 = interaction_seconds.quantile(0.5, component=component, phase=phase)
+                p99 = interaction_seconds.quantile(0.99, component=component, phase=phase)
+                lines.append(f"`{phase:<5}` p50 ≤ {_ms(p50)} · p99 ≤ {_ms(p99)}")
+            errors = interaction_errors.value(component=component)
+            calls = interaction_seconds.count(component=component, phase='total')
+            embed.add_field(
+                name=f"{component} ({calls} calls{f', {errors} errors' if errors else ''})",
+                value="\n".join(lines) or "No samples",
+                inline=False
+            )
+
+        lag = f"p50 ≤ {_ms(loop_lag_seconds.quantile(0.5))} · p99 ≤ {_ms(loop_lag_seconds.quantile(0.99))}"
+        embed.add_field(name="Event loop lag", value=lag, inline=False)
+        embed.add_field(
+            name="Gauges and totals",
+            value="\n".join(f"`{g.name}` {g.value():g}" for g in registry.gauges())[:1024],
+            inline=False
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+async def setup(bot):
+    """Setup function to load the cog"""
+    await bot.add_cog(StatsCommands(bot))
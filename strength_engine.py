@@ -0,0 +1,264 @@
+"""strength_engine.py - Server-side strength and division calculation
+
+Uses the same formulas as calculateAndDisplayStrength in registration.js:
+
+    adjustedCrit  = floor(baseCrit * (1 + sum of pantheon bonuses in the deck))
+    totalStrength = floor(adjustedCrit * w.crit + legendarity * w.legendarity + perks * w.perks)
+    division      = the threshold range containing totalStrength
+"""
+
+import asyncio
+import math
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+    print("⚠️ numpy not installed. Strength recompute falls back to pure Python (pip install numpy)")
+
+from async_database import async_db
+from cluster import invalidation_bus
+from strength_index import strength_index
+
+# Defaults kept in sync with registration.js
+DEFAULT_WEIGHTS = {'crit': 0.40, 'legendarity': 0.40, 'perks': 0.20}
+DEFAULT_THRESHOLDS = {
+    "Lightweight":       (0,    499),
+    "Cruiserweight":     (500,  999),
+    "Middleweight":      (1000, 1499),
+    "Heavyweight":       (1500, 1999),
+    "Super Heavyweight": (2000, 2499),
+    "Champion":          (2500, 10000),
+}
+DEFAULT_PANTHEON = {
+    "Twilight Ranger": 0.15,
+    "Franky & Stein":  0.15,
+    "Twins":           0.15,
+    "Valkerie":        0.15,
+    "Wukong":          0.30,
+}
+
+
+class DivisionIndex:
+    """Division thresholds sorted by lower bound for binary-search lookup"""
+
+    def __init__(self, thresholds: dict):
+        ranges = sorted((low, high, name) for name, (low, high) in thresholds.items())
+        for (_, prev_high, prev_name), (low, _, name) in zip(ranges, ranges[1:]):
+            if low <= prev_high:
+                raise ValueError(f"Division thresholds overlap: {prev_name} and {name}")
+
+        self.names = [name for _, _, name in ranges]
+        self.lows = [low for low, _, _ in ranges]
+        self.highs = [high for _, high, _ in ranges]
+        if np is not None:
+            self._lows = np.asarray(self.lows, dtype=np.float64)
+            self._highs = np.asarray(self.highs + [-math.inf], dtype=np.float64)
+            self._names = np.asarray(self.names + [None], dtype=object)
+
+    def lookup(self, strength: float) -> Optional[str]:
+        i = bisect_right(self.lows, strength) - 1
+        if i >= 0 and strength <= self.highs[i]:
+            return self.names[i]
+        return None
+
+    def lookup_many(self, strengths) -> list:
+        if np is None:
+            return [self.lookup(s) for s in strengths]
+        idx = np.searchsorted(self._lows, strengths, side='right') - 1
+        # Values below the first range or inside a gap map to the None sentinel
+        idx = np.where((idx >= 0) & (strengths <= self._highs[idx]), idx, len(self.names))
+        return self._names[idx].tolist()
+
+
+@dataclass(frozen=True)
+class StrengthConfig:
+    """Weights, thresholds and pantheon bonuses for one guild"""
+    weights: dict = field(default_factory=lambda: dict(DEFAULT_WEIGHTS))
+    thresholds: dict = field(default_factory=lambda: dict(DEFAULT_THRESHOLDS))
+    pantheon: dict = field(default_factory=lambda: dict(DEFAULT_PANTHEON))
+
+    def __post_init__(self):
+        object.__setattr__(self, 'division_index', DivisionIndex(self.thresholds))
+
+    def pantheon_bonus(self, card_names) -> float:
+        # Summed in deck order, like the JS, so floating-point results match
+        bonus = 0
+        for name in card_names:
+            if name and self.pantheon.get(name):
+                bonus += self.pantheon[name]
+        return bonus
+
+
+@dataclass(slots=True)
+class StrengthResult:
+    base_crit: int
+    adjusted_crit: int
+    legendarity: int
+    perks: int
+    total_strength: int
+    division: Optional[str]
+    pantheon_cards: tuple = ()
+
+
+def _card_names(cards) -> list:
+    return [c['name'] if isinstance(c, dict) else c[0] for c in cards or ()]
+
+
+def calculate_strength(crit_level, legendarity, perks_level, cards=(),
+                       config: StrengthConfig = None) -> Optional[StrengthResult]:
+    """Strength for one registration; None when crit or legendarity is missing (as in the JS)"""
+    config = config or DEFAULT_CONFIG
+    base_crit = int(crit_level or 0)
+    legendarity = int(legendarity or 0)
+    perks = int(perks_level or 0)
+    if not base_crit or not legendarity:
+        return None
+
+    names = _card_names(cards)
+    pantheon_cards = tuple((n, config.pantheon[n]) for n in names if n and config.pantheon.get(n))
+    adjusted_crit = math.floor(base_crit * (1 + config.pantheon_bonus(names)))
+    weights = config.weights
+    total = math.floor(
+        (adjusted_crit * weights['crit']) +
+        (legendarity * weights['legendarity']) +
+        (perks * weights['perks'])
+    )
+    return StrengthResult(
+        base_crit, adjusted_crit, legendarity, perks, total,
+        config.division_index.lookup(total), pantheon_cards
+    )
+
+
+def calculate_many(participants: list, config: StrengthConfig = None):
+    """Vectorized strength for many participants; returns (totals, divisions)
+
+    Participants missing crit or legendarity get a total of 0 and no division.
+    """
+    config = config or DEFAULT_CONFIG
+    weights = config.weights
+    crits = [int(p.get('crit_level') or 0) for p in participants]
+    legends = [int(p.get('legendarity') or 0) for p in participants]
+    perks = [int(p.get('perks_level') or 0) for p in participants]
+    bonuses = [config.pantheon_bonus(_card_names(p.get('cards'))) for p in participants]
+
+    if np is None:
+        totals = [
+            math.floor((math.floor(c * (1 + b)) * weights['crit']) +
+                       (l * weights['legendarity']) + (k * weights['perks']))
+            if c and l else 0
+            for c, l, k, b in zip(crits, legends, perks, bonuses)
+        ]
+        divisions = [
+            config.division_index.lookup(t) if c and l else None
+            for t, c, l in zip(totals, crits, legends)
+        ]
+        return totals, divisions
+
+    crit_arr = np.asarray(crits, dtype=np.float64)
+    legend_arr = np.asarray(legends, dtype=np.float64)
+    perk_arr = np.asarray(perks, dtype=np.float64)
+    adjusted = np.floor(crit_arr * (1 + np.asarray(bonuses, dtype=np.float64)))
+    totals = np.floor(
+        (adjusted * weights['crit']) +
+        (legend_arr * weights['legendarity']) +
+        (perk_arr * weights['perks'])
+    )
+    valid = (crit_arr != 0) & (legend_arr != 0)
+    totals = np.where(valid, totals, 0).astype(np.int64)
+    divisions = config.division_index.lookup_many(totals)
+    divisions = [d if ok else None for d, ok in zip(divisions, valid.tolist())]
+    return totals.tolist(), divisions
+
+
+DEFAULT_CONFIG = StrengthConfig()
+
+
+class StrengthEngine:
+    """Per-guild strength configs with batched recompute when they change"""
+
+    def __init__(self, database=async_db):
+        self.database = database
+        self._configs = {}
+        self._recomputes = {}
+        self._dirty = set()   # guild ids whose config changed since their recompute read it
+
+    def config_for(self, guild_id: int) -> StrengthConfig:
+        return self._configs.get(guild_id, DEFAULT_CONFIG)
+
+    def apply_to_record(self, record):
+        """Overwrite a registration record's strength/division with the server-side result"""
+        config = self.config_for(record.guild_id)
+        result = calculate_strength(
+            record.crit_level, record.legendarity, record.perks_level, record.cards, config
+        )
+        if result is not None:
+            record.total_strength = result.total_strength
+            record.division = result.division or 'Unknown'
+        return record
+
+    def update_config(self, guild_id: int, weights: dict = None, thresholds: dict = None,
+                      pantheon: dict = None) -> asyncio.Task:
+        """Change a guild's config and schedule a recompute of all its participants"""
+        current = self.config_for(guild_id)
+        config = StrengthConfig(
+            weights=dict(weights or current.weights),
+            thresholds=dict(thresholds or current.thresholds),
+            pantheon=dict(pantheon if pantheon is not None else current.pantheon),
+        )
+        self._configs[guild_id] = config
+
+        # Coalesce rapid config edits into one recompute; a running one repeats
+        # itself if the config changed after it read it
+        self._dirty.add(guild_id)
+        task = self._recomputes.get(guild_id)
+        if task is None or task.done():
+            task = asyncio.create_task(self._recompute_until_clean(guild_id))
+            self._recomputes[guild_id] = task
+        return task
+
+    async def _recompute_until_clean(self, guild_id: int) -> list:
+        """Recompute until no config change is left unapplied; returns the net division changes"""
+        changes = {}   # discord_id -> (first old division, latest new division)
+        while guild_id in self._dirty:
+            self._dirty.discard(guild_id)
+            for discord_id, old, new in await self.recompute_guild(guild_id):
+                changes[discord_id] = (changes.get(discord_id, (old,))[0], new)
+        # Other clusters re-read the guild once the new strengths are written
+        invalidation_bus.publish('guild', guild_id, local=False)
+        return [(discord_id, old, new) for discord_id, (old, new) in changes.items() if old != new]
+
+    async def recompute_guild(self, guild_id: int) -> list:
+        """Recompute every participant in a guild; returns (discord_id, old, new) division changes"""
+        participants = await self.database.get_participants(guild_id)
+        if not participants:
+            return []
+
+        totals, divisions = calculate_many(participants, self.config_for(guild_id))
+        updates = []
+        changes = []
+        for participant, total, division in zip(participants, totals, divisions):
+            division = division or 'Unknown'
+            if participant.get('division') != division or participant.get('total_strength') != total:
+                updates.append((participant['discord_id'], total, division))
+            if participant.get('division') != division:
+                changes.append((participant['discord_id'], participant.get('division'), division))
+
+        if updates:
+            await self.database.update_strengths(guild_id, updates)
+            # A guild that is not indexed yet reads the new values when it loads
+            if strength_index.is_loaded(guild_id):
+                approved = {p['discord_id'] for p in participants if p.get('approved', True)}
+                for discord_id, total, division in updates:
+                    if discord_id in approved:
+                        strength_index.upsert(guild_id, discord_id, division, total)
+        print(f"✅ Recomputed strength for {len(participants)} participant(s) in guild {guild_id} "
+              f"({len(changes)} division change(s))")
+        return changes
+
+
+# Shared engine used by the cogs
+strength_engine = StrengthEngine()
@@ -0,0 +1,187 @@
+"""strength_index.py - Approved participants kept sorted by strength for matchmaking"""
+
+import asyncio
+from bisect import bisect_left, insort
+
+from async_database import async_db
+
+
+class StrengthLadder:
+    """Participants of one division, sorted by (total strength, discord id)
+
+    Lookups are binary searches; inserts and removals are a binary search plus
+    one list shift, which stays well under a millisecond at 10k+ entries.
+    """
+
+    __slots__ = ('_keys', '_strengths')
+
+    def __init__(self):
+        self._keys = []
+        self._strengths = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, discord_id):
+        return discord_id in self._strengths
+
+    def __iter__(self):
+        """(discord_id, strength) from strongest to weakest"""
+        for strength, discord_id in reversed(self._keys):
+            yield discord_id, strength
+
+    def add(self, discord_id: int, strength: int):
+        self.remove(discord_id)
+        self._strengths[discord_id] = strength
+        insort(self._keys, (strength, discord_id))
+
+    def remove(self, discord_id: int) -> bool:
+        strength = self._strengths.pop(discord_id, None)
+        if strength is None:
+            return False
+        del self._keys[bisect_left(self._keys, (strength, discord_id))]
+        return True
+
+    def strength_of(self, discord_id: int):
+        return self._strengths.get(discord_id)
+
+    def rank(self, discord_id: int):
+        """1-based rank, strongest first; None if not in the ladder"""
+        strength = self._strengths.get(discord_id)
+        if strength is None:
+            return None
+        return len(self._keys) - bisect_left(self._keys, (strength, discord_id))
+
+    def at_rank(self, rank: int):
+        """(discord_id, strength) at a 1-based rank, strongest first"""
+        if not 1 <= rank <= len(self._keys):
+            return None
+        strength, discord_id = self._keys[len(self._keys) - rank]
+        return discord_id, strength
+
+    def nearest(self, strength: int, count: int = 1, exclude=()) -> list:
+        """The `count` participants closest in strength, closest first"""
+        exclude = set(exclude)
+        keys = self._keys
+        right = bisect_left(keys, (strength, -1))
+        left = right - 1
+        found = []
+        while len(found) < count and (left >= 0 or right < len(keys)):
+            take_left = right >= len(keys) or (
+                left >= 0 and strength - keys[left][0] <= keys[right][0] - strength
+            )
+            if take_left:
+                candidate, left = keys[left], left - 1
+            else:
+                candidate, right = keys[right], right + 1
+            if candidate[1] not in exclude:
+                found.append((candidate[1], candidate[0]))
+        return found
+
+    def nearest_opponent(self, discord_id: int, exclude=()):
+        """Closest-strength opponent for a participant in this ladder"""
+        strength = self._strengths.get(discord_id)
+        if strength is None:
+            return None
+        match = self.nearest(strength, 1, exclude=(discord_id, *exclude))
+        return match[0] if match else None
+
+    def seed_pools(self, pool_count: int) -> list:
+        """Snake-seed the ladder into `pool_count` pools of balanced strength"""
+        pools = [[] for _ in range(max(1, pool_count))]
+        size = len(pools)
+        for i, (discord_id, strength) in enumerate(self):
+            lap, pos = divmod(i, size)
+            pools[pos if lap % 2 == 0 else size - 1 - pos].append((discord_id, strength))
+        return pools
+
+
+class StrengthIndex:
+    """Per-guild, per-division strength ladders of approved participants"""
+
+    def __init__(self, database=async_db):
+        self.database = database
+        self._ladders = {}
+        self._members = {}
+        self._loaded = set()
+        self._loading = {}   # guild_id -> task reading the guild, shared by concurrent callers
+        self._versions = {}  # guild_id -> change counter, used to detect stale snapshots
+
+    def _bump(self, guild_id: int):
+        self._versions[guild_id] = self._versions.get(guild_id, 0) + 1
+
+    def version(self, guild_id: int) -> int:
+        return self._versions.get(guild_id, 0)
+
+    def ladder(self, guild_id: int, division: str) -> StrengthLadder:
+        key = (guild_id, division)
+        ladder = self._ladders.get(key)
+        if ladder is None:
+            ladder = self._ladders[key] = StrengthLadder()
+        return ladder
+
+    def divisions(self, guild_id: int) -> list:
+        return [division for (g, division), ladder in self._ladders.items() if g == guild_id and ladder]
+
+    def upsert(self, guild_id: int, discord_id: int, division: str, strength: int):
+        """Add or move a participant (approve / recompute)"""
+        current = self._members.get((guild_id, discord_id))
+        if current and current[0] != division:
+            self._ladders[(guild_id, current[0])].remove(discord_id)
+        self.ladder(guild_id, division).add(discord_id, strength)
+        self._members[(guild_id, discord_id)] = (division, strength)
+        self._bump(guild_id)
+
+    def remove(self, guild_id: int, discord_id: int) -> bool:
+        """Drop a participant (withdraw / removal)"""
+        current = self._members.pop((guild_id, discord_id), None)
+        if current is None:
+            return False
+        self._bump(guild_id)
+        return self._ladders[(guild_id, current[0])].remove(discord_id)
+
+    def lookup(self, guild_id: int, discord_id: int):
+        """(division, strength) for an indexed participant"""
+        return self._members.get((guild_id, discord_id))
+
+    def is_loaded(self, guild_id: int) -> bool:
+        return guild_id in self._loaded
+
+    def load_guild(self, guild_id: int, participants: list):
+        """Index a guild's approved participants (only needed once per process)"""
+        for p in participants:
+            if p.get('approved', True) and p.get('division'):
+                self.upsert(guild_id, p['discord_id'], p['division'], int(p.get('total_strength') or 0))
+        self._loaded.add(guild_id)
+
+    def unload_guild(self, guild_id: int):
+        """Forget a guild's ladders so the next ensure_loaded re-reads the database"""
+        for key in [k for k in self._ladders if k[0] == guild_id]:
+            del self._ladders[key]
+        for key in [k for k in self._members if k[0] == guild_id]:
+            del self._members[key]
+        self._loaded.discard(guild_id)
+        self._loading.pop(guild_id, None)
+        self._bump(guild_id)
+
+    async def ensure_loaded(self, guild_id: int):
+        """Read a guild's participants unless indexed already; call before reading its ladders"""
+        while guild_id not in self._loaded:
+            task = self._loading.get(guild_id)
+            if task is None:
+                task = self._loading[guild_id] = asyncio.create_task(self._load(guild_id))
+            await asyncio.shield(task)
+
+    async def _load(self, guild_id: int):
+        try:
+            participants = await self.database.get_participants(guild_id)
+            # An unload_guild during the read drops this task; the next caller reads again
+            if self._loading.get(guild_id) is asyncio.current_task():
+                self.load_guild(guild_id, participants)
+        finally:
+            if self._loading.get(guild_id) is asyncio.current_task():
+                del self._loading[guild_id]
+
+
+# Shared index used by the cogs
+strength_index = StrengthIndex()
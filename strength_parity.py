@@ -0,0 +1,122 @@
+"""strength_parity.py - Check strength_engine against the browser's JS calculation
+
+Pulls DEFAULT_WEIGHTS, DEFAULT_THRESHOLDS, PANTHEON_BONUSES and
+calculateAndDisplayStrength out of registration.js, runs them in Node over a
+set of generated registrations, and compares every result with the Python
+engine (scalar and batched paths).
+
+Usage: python strength_parity.py [cases]   (requires `node` on PATH)
+"""
+
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+
+from strength_engine import (
+    StrengthConfig, calculate_strength, calculate_many,
+    DEFAULT_WEIGHTS, DEFAULT_THRESHOLDS, DEFAULT_PANTHEON,
+)
+
+JS_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "registration.js")
+CASES = 5000
+
+
+def extract_js(source: str) -> str:
+    """The constants and strength function from registration.js, without DOM code"""
+    pieces = []
+    for pattern in (
+        r"let PANTHEON_BONUSES = \{.*?\};",
+        r"const DEFAULT_WEIGHTS = \{.*?\};",
+        r"const DEFAULT_THRESHOLDS = \{.*?\};",
+        r"function calculateAndDisplayStrength\(\) \{.*?\n\}",
+    ):
+        match = re.search(pattern, source, re.S)
+        if not match:
+            raise SystemExit(f"❌ Could not find {pattern!r} in registration.js")
+        pieces.append(match.group())
+    return "\n".join(pieces)
+
+
+def make_cases(count: int) -> list:
+    rng = random.Random(1234)
+    cards = list(DEFAULT_PANTHEON) + ["Dryad", "Harlequin", "Kobold", "Gun Slinger", "Bard", "Monk"]
+    cases = []
+    for _ in range(count):
+        deck = rng.sample(cards, 5)
+        cases.append({
+            'crit_level': rng.choice([0, rng.randint(1, 6000), rng.randint(100, 3500)]),
+            'legendarity': rng.choice([0, rng.randint(1, 1500), rng.randint(100, 900)]),
+            'perks_level': rng.randint(0, 1200),
+            'cards': [{'name': name, 'level': str(rng.randint(1, 18))} for name in deck],
+        })
+    return cases
+
+
+def run_js(cases: list) -> list:
+    with open(JS_SOURCE, encoding="utf-8") as f:
+        js = extract_js(f.read())
+    script = js + """
+let formData = {}, calculatedStrength = null;
+function displayStrength() {}
+const cases = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+const out = cases.map(c => {
+    formData = { crit_level: String(c.crit_level), legendarity: String(c.legendarity),
+                 perks_level: String(c.perks_level), cards: c.cards };
+    calculatedStrength = null;
+    calculateAndDisplayStrength();
+    return calculatedStrength && {
+        adjustedCrit: calculatedStrength.adjustedCrit,
+        totalStrength: calculatedStrength.totalStrength,
+        division: calculatedStrength.division,
+    };
+});
+process.stdout.write(JSON.stringify(out));
+"""
+    result = subprocess.run(
+        ["node", "-e", script], input=json.dumps(cases),
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout)
+
+
+def main(count: int) -> int:
+    config = StrengthConfig(
+        weights=dict(DEFAULT_WEIGHTS),
+        thresholds=dict(DEFAULT_THRESHOLDS),
+        pantheon=dict(DEFAULT_PANTHEON),
+    )
+    cases = make_cases(count)
+    expected = run_js(cases)
+    totals, divisions = calculate_many(cases, config)
+
+    mismatches = 0
+    for i, (case, js) in enumerate(zip(cases, expected)):
+        py = calculate_strength(
+            case['crit_level'], case['legendarity'], case['perks_level'], case['cards'], config
+        )
+        if js is None:
+            ok = py is None and totals[i] == 0 and divisions[i] is None
+        else:
+            ok = (
+                py is not None
+                and py.adjusted_crit == js['adjustedCrit']
+                and py.total_strength == js['totalStrength'] == totals[i]
+                and py.division == js['division'] == divisions[i]
+            )
+        if not ok:
+            mismatches += 1
+            if mismatches <= 10:
+                print(f"❌ Case {i}: js={js} py={py} batch=({totals[i]}, {divisions[i]})")
+
+    if mismatches:
+        print(f"❌ {mismatches}/{count} case(s) differ from registration.js")
+        return 1
+    print(f"✅ {count} case(s) match registration.js")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else CASES))
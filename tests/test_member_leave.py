@@ -0,0 +1,48 @@
+"""A member who leaves is withdrawn even when discord.py never cached them"""
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('discord')
+
+from member_cache import member_cache
+from pending_index import pending_index
+from registration_journal import registration_journal
+from registration_records import RegistrationRecord, registration_store, withdraw_member
+from strength_index import strength_index
+
+GUILD_ID = 111
+USER_ID = 222
+
+
+def on_raw_member_remove(payload):
+    # Mirrors TournamentBot.on_raw_member_remove, which cannot be imported without the bot's database module
+    member_cache.forget(payload.guild_id, payload.user.id)
+    withdraw_member(payload.guild_id, payload.user.id)
+
+
+@pytest.fixture
+def journal(tmp_path):
+    registration_journal.open(str(tmp_path / 'journal.log'))
+    yield registration_journal
+    registration_journal.close()
+
+
+def test_raw_remove_withdraws_uncached_member(journal):
+    record = RegistrationRecord(discord_id=USER_ID, guild_id=GUILD_ID, channel_id=1, message_id=333)
+    registration_store.put(record)
+    journal.submitted(record)
+    strength_index.upsert(GUILD_ID, USER_ID + 1, 'Gold', 100)
+    strength_index.upsert(GUILD_ID, USER_ID, 'Gold', 200)
+
+    # RawMemberRemoveEvent carries only the guild id and a User, never a Member
+    payload = SimpleNamespace(guild_id=GUILD_ID, user=SimpleNamespace(id=USER_ID))
+    assert member_cache._members.get((GUILD_ID, USER_ID)) is None
+    on_raw_member_remove(payload)
+
+    assert journal.latest_status(GUILD_ID, USER_ID) == 'withdrawn'
+    assert 333 not in registration_store
+    assert not [e for e in pending_index._entries.values() if e.discord_id == USER_ID]
+    assert strength_index.lookup(GUILD_ID, USER_ID) is None
+    assert strength_index.lookup(GUILD_ID, USER_ID + 1) == ('Gold', 100)
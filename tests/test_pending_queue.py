@@ -0,0 +1,17 @@
+"""The queue's page and filters survive a round trip through the embed footer"""
+
+import pytest
+
+pytest.importorskip('discord')
+
+from pending_queue import _parse_state, _state_text
+
+
+def test_footer_state_round_trips_awkward_names():
+    state = {'page': 3, 'division': 'Gold; Silver', 'community': 'A|B=C 100%', 'min': 250}
+    footer = f"Page 4/9 · 180 pending | {_state_text(state)}"
+    assert _parse_state(footer) == state
+
+
+def test_empty_filters_are_left_out():
+    assert _parse_state(f"Page 1/1 · 0 pending | {_state_text({'page': 0, 'division': None})}") == {'page': 0}
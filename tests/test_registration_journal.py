@@ -0,0 +1,50 @@
+"""Pending journal state is per approval message, not per user"""
+
+import asyncio
+
+import pytest
+
+from registration_journal import RegistrationJournal
+
+GUILD_ID = 111
+USER_ID = 222
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = RegistrationJournal()
+    journal.open(str(tmp_path / 'journal.log'))
+    yield journal
+    journal.close()
+
+
+def submit(journal, message_id):
+    data = {'discord_id': USER_ID, 'guild_id': GUILD_ID, 'channel_id': 1}
+    journal.append('submitted', GUILD_ID, USER_ID, message_id, data)
+
+
+def test_second_submission_keeps_the_first_pending(journal):
+    submit(journal, 10)
+    submit(journal, 20)
+    assert sorted(journal.pending) == ['10', '20']
+
+    journal.append('approved', GUILD_ID, USER_ID, 20)
+    assert sorted(journal.pending) == ['10']
+
+    # Withdrawal is still recorded while an older submission is undecided
+    assert journal.withdrawn(GUILD_ID, USER_ID, reason='left guild') is not None
+    assert journal.pending == {}
+
+
+def test_replay_from_checkpoint_keeps_both(journal):
+    async def run():
+        journal.start()
+        submit(journal, 10)
+        submit(journal, 20)
+        await journal.checkpoint()
+        journal.append('rejected', GUILD_ID, USER_ID, 10)
+        journal.close()
+
+    asyncio.run(run())
+    journal.open(journal.path)
+    assert sorted(journal.pending) == ['20']
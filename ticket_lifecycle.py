@@ -0,0 +1,331 @@
+"""ticket_lifecycle.py - Close, archive and delete browser registration ticket channels
+
+Every browser registration opens a `web-...` channel. Once a moderator
+decides, the ticket is closed: the applicant can still read it but no longer
+write. Closed tickets older than ARCHIVE_DELAY, and tickets with no activity
+for STALE_TICKET_AGE that no longer hold an undecided registration, are
+archived by a periodic sweep. Their messages go into one transcript file
+per day (by closing date), posted to the archive channel, and the channels
+are then deleted through the outbox's per-guild bucket, which keeps the
+deletes under the channel rate limit.
+
+Closing also tags the channel topic with the outcome and close time, so
+tickets closed before a restart are recognised without extra persisted
+state (a permission overwrite alone is ambiguous: a muted applicant looks
+the same).
+"""
+
+import asyncio
+import datetime
+import re
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import discord
+from discord import app_commands
+from discord.ext import commands, tasks
+
+from metrics import log
+from outbox import outbox, OutboxTracker, channel_bucket, guild_bucket
+from participant_export import SplitFile, UPLOAD_MARGIN
+from pending_index import pending_index
+from registration_records import registration_store
+
+TICKET_PREFIX = "web-"
+ARCHIVE_CHANNEL = "ticket-archive"
+APPROVE_BUTTON_ID = "approve_browser_reg"   # present while a registration is undecided
+
+# Channel topic tag written on close: "[ticket-closed approved 1712345678]"
+CLOSED_TAG = "[ticket-closed {status} {closed_at}]"
+_CLOSED_TAG_RE = re.compile(r"\[ticket-closed (\w+) (\d+)\]")
+
+ARCHIVE_DELAY = 60 * 60                  # seconds a closed ticket stays readable
+STALE_TICKET_AGE = 14 * 24 * 60 * 60     # seconds without activity before a ticket is stale
+SWEEP_INTERVAL_MINUTES = 30
+SWEEP_BATCH = 50                         # tickets archived per guild per sweep
+TRANSCRIPT_MESSAGE_LIMIT = 500           # messages copied from one ticket
+HISTORY_PAUSE = 0.5                      # seconds between channel history reads
+
+
+@dataclass(slots=True)
+class ClosedTicket:
+    channel_id: int
+    guild_id: int
+    discord_id: int
+    status: str
+    moderator: str
+    closed_at: float
+
+
+def _is_ticket(channel) -> bool:
+    return isinstance(channel, discord.TextChannel) and channel.name.startswith(TICKET_PREFIX)
+
+
+def _closed_tag(channel: discord.TextChannel) -> Optional[ClosedTicket]:
+    """The ClosedTicket recorded in a channel topic by close(), if any"""
+    match = _CLOSED_TAG_RE.search(channel.topic or '')
+    if match is None:
+        return None
+    return ClosedTicket(channel.id, channel.guild.id, 0, match.group(1), "", float(match.group(2)))
+
+
+def _has_undecided_registration(messages: list) -> bool:
+    """True if a message still carries the approval buttons"""
+    for message in messages:
+        for row in message.components:
+            for component in getattr(row, 'children', ()):
+                if getattr(component, 'custom_id', None) == APPROVE_BUTTON_ID:
+                    return True
+    return False
+
+
+def _last_activity(channel: discord.TextChannel) -> float:
+    if channel.last_message_id:
+        return discord.utils.snowflake_time(channel.last_message_id).timestamp()
+    return channel.created_at.timestamp()
+
+
+def _day(timestamp: float) -> str:
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).strftime('%Y-%m-%d')
+
+
+def _format_time(when: datetime.datetime) -> str:
+    return when.astimezone(datetime.timezone.utc).strftime('%Y-%m-%d %H:%M')
+
+
+def transcript_lines(channel: discord.TextChannel, messages: list, ticket: Optional[ClosedTicket]) -> list:
+    """Plain-text transcript of one ticket"""
+    if ticket is not None:
+        state = f"{ticket.status} by {ticket.moderator}" if ticket.moderator else ticket.status
+    else:
+        state = "stale"
+    lines = [f"=== #{channel.name} ({channel.id}) | {state} ==="]
+    for message in messages:
+        lines.append(f"[{_format_time(message.created_at)}] {message.author}: {message.content}".rstrip())
+        for embed in message.embeds:
+            lines.append(f"    [embed] {embed.title or ''}".rstrip())
+            for embed_field in embed.fields:
+                value = (embed_field.value or '').replace('\n', ' / ')
+                lines.append(f"      {embed_field.name}: {value}")
+            if embed.footer and embed.footer.text:
+                lines.append(f"      {embed.footer.text}")
+        for attachment in message.attachments:
+            lines.append(f"    [attachment] {attachment.filename} {attachment.url}")
+    lines.append('')
+    return lines
+
+
+class TicketLifecycle:
+    """Tracks closed tickets and archives them in paced batches"""
+
+    def __init__(self, archive_delay: float = ARCHIVE_DELAY, stale_age: float = STALE_TICKET_AGE,
+                 batch_size: int = SWEEP_BATCH):
+        self.archive_delay = archive_delay
+        self.stale_age = stale_age
+        self.batch_size = batch_size
+        self._closed = {}        # channel_id -> ClosedTicket
+        self._deleting = set()   # archived channel ids waiting for their delete
+        self._awaiting = set()   # stale-looking channels found to hold approval buttons
+        self._sweeping = set()   # guild ids with a sweep in progress
+        self.archived = 0
+
+    def close(self, guild: discord.Guild, channel, record, approved: bool, moderator,
+              tracker: OutboxTracker = None):
+        """Queue closing a ticket after a decision (applicant keeps read access)"""
+        if not _is_ticket(channel):
+            return
+        ticket = ClosedTicket(
+            channel.id, guild.id, record.discord_id,
+            "approved" if approved else "rejected", moderator.name, time.time()
+        )
+        self._closed[channel.id] = ticket
+
+        async def lock_channel():
+            target = guild.get_member(record.discord_id) or discord.Object(id=record.discord_id, type=discord.Member)
+            await channel.set_permissions(
+                target,
+                view_channel=True,
+                send_messages=False,
+                reason=f"Registration {ticket.status}"
+            )
+            await channel.edit(
+                topic=CLOSED_TAG.format(status=ticket.status, closed_at=int(ticket.closed_at)),
+                reason=f"Registration {ticket.status}"
+            )
+
+        outbox.enqueue(
+            channel_bucket(channel.id),
+            lock_channel,
+            key=f"close:{channel.id}",
+            description=f"close ticket {channel.id}",
+            tracker=tracker
+        )
+
+    def forget(self, channel_id: int):
+        self._closed.pop(channel_id, None)
+        self._deleting.discard(channel_id)
+        self._awaiting.discard(channel_id)
+
+    def due_tickets(self, guild: discord.Guild, now: float = None) -> list:
+        """(closed at, channel, ClosedTicket or None if stale) per ticket ready to archive, oldest first"""
+        now = now or time.time()
+        # Undecided registrations: in memory, plus those restored from the journal
+        undecided = {r.channel_id for r in registration_store.values() if r.guild_id == guild.id}
+        undecided.update(entry.channel_id for entry in pending_index.matching(guild.id))
+        due = []
+        for channel in guild.text_channels:
+            if not _is_ticket(channel) or channel.id in self._deleting:
+                continue
+            ticket = self._closed.get(channel.id)
+            if ticket is not None:
+                if now - ticket.closed_at >= self.archive_delay:
+                    due.append((ticket.closed_at, channel, ticket))
+                continue
+            if channel.id in undecided or channel.id in self._awaiting:
+                continue
+            ticket = _closed_tag(channel)
+            if ticket is not None:
+                # Closed before a restart
+                if now - ticket.closed_at >= self.archive_delay:
+                    due.append((ticket.closed_at, channel, ticket))
+                continue
+            last_activity = _last_activity(channel)
+            if now - last_activity >= self.stale_age:
+                due.append((last_activity, channel, None))
+        due.sort(key=lambda item: item[0])
+        return [(closed_at, channel, ticket) for closed_at, channel, ticket in due[:self.batch_size]]
+
+    async def archive_channel(self, guild: discord.Guild) -> discord.TextChannel:
+        channel = discord.utils.get(guild.text_channels, name=ARCHIVE_CHANNEL)
+        if channel is not None:
+            return channel
+        overwrites = {guild.default_role: discord.PermissionOverwrite(view_channel=False)}
+        for role in guild.roles:
+            if role.name in ("Moderator", "Admin"):
+                overwrites[role] = discord.PermissionOverwrite(view_channel=True, send_messages=False)
+        return await guild.create_text_channel(ARCHIVE_CHANNEL, overwrites=overwrites,
+                                               reason="Ticket transcripts")
+
+    async def sweep(self, guild: discord.Guild, now: float = None) -> int:
+        """Archive and queue deletion of due tickets in one guild; returns the number archived"""
+        if guild.id in self._sweeping:
+            return 0
+        self._sweeping.add(guild.id)
+        try:
+            return await self._sweep(guild, now)
+        finally:
+            self._sweeping.discard(guild.id)
+
+    async def _sweep(self, guild: discord.Guild, now: float = None) -> int:
+        due = self.due_tickets(guild, now)
+        if not due:
+            return 0
+
+        archive = await self.archive_channel(guild)
+        limit = guild.filesize_limit - UPLOAD_MARGIN
+        days = {}   # closing day -> SplitFile
+        captured = []
+        try:
+            for closed_at, channel, ticket in due:
+                try:
+                    messages = [m async for m in channel.history(limit=TRANSCRIPT_MESSAGE_LIMIT, oldest_first=True)]
+                except discord.NotFound:
+                    self.forget(channel.id)
+                    continue
+                except discord.HTTPException as e:
+                    log.error(f"❌ Could not read ticket #{channel.name}: {e}")
+                    continue
+                if ticket is None and _has_undecided_registration(messages):
+                    # Stale but still awaiting a decision (not in the index, e.g. a legacy post);
+                    # skipped until a decision closes it
+                    self._awaiting.add(channel.id)
+                    continue
+
+                day = _day(closed_at)
+                transcript = days.get(day)
+                if transcript is None:
+                    transcript = days[day] = SplitFile(f"tickets_{guild.id}_{day}.txt", limit)
+                transcript.write('\n'.join(transcript_lines(channel, messages, ticket)).encode('utf-8') + b'\n')
+                captured.append(channel)
+                await asyncio.sleep(HISTORY_PAUSE)
+
+            # Transcripts must be posted before anything is deleted
+            for day in sorted(days):
+                transcript = days[day]
+                for file in transcript.files():
+                    await archive.send(
+                        content=f"🗄️ **{day}**: {transcript.rows} ticket transcript(s)",
+                        file=file
+                    )
+        finally:
+            for transcript in days.values():
+                transcript.close()
+
+        for channel in captured:
+            self._closed.pop(channel.id, None)
+            self._deleting.add(channel.id)
+            outbox.enqueue(
+                guild_bucket(guild.id),
+                lambda channel=channel: channel.delete(reason="Ticket archived"),
+                key=f"delete:{channel.id}",
+                description=f"delete ticket #{channel.name}"
+            )
+        self.archived += len(captured)
+        log.info(f"🗄️ Archived {len(captured)} ticket(s) in {guild.name}")
+        return len(captured)
+
+
+# Shared lifecycle manager used by the approval handler
+ticket_lifecycle = TicketLifecycle()
+
+
+class TicketLifecycleCog(commands.Cog):
+    """Scheduled ticket sweep and a manual trigger"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.sweep_tickets.start()
+
+    def cog_unload(self):
+        self.sweep_tickets.cancel()
+
+    @tasks.loop(minutes=SWEEP_INTERVAL_MINUTES)
+    async def sweep_tickets(self):
+        for guild in list(self.bot.guilds):
+            try:
+                await ticket_lifecycle.sweep(guild)
+            except Exception as e:
+                log.exception(f"❌ Ticket sweep failed in {guild.name}: {e}")
+
+    @sweep_tickets.before_loop
+    async def before_sweep(self):
+        await self.bot.wait_until_ready()
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        ticket_lifecycle.forget(channel.id)
+
+    @app_commands.command(
+        name="archive_tickets",
+        description="Archive closed and stale registration tickets now"
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def archive_tickets(self, interaction: discord.Interaction):
+        """Run one sweep batch for this server"""
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        archived = await ticket_lifecycle.sweep(interaction.guild)
+        if not archived:
+            await interaction.followup.send("ℹ️ No tickets are ready to archive.", ephemeral=True)
+            return
+        remaining = len(ticket_lifecycle.due_tickets(interaction.guild))
+        await interaction.followup.send(
+            f"🗄️ Archived **{archived}** ticket(s) to #{ARCHIVE_CHANNEL}; deletions are queued."
+            f"{f' {remaining} more will follow in the next sweep.' if remaining else ''}",
+            ephemeral=True
+        )
+
+
+async def setup(bot):
+    """Setup function to load the cog"""
+    await bot.add_cog(TicketLifecycleCog(bot))
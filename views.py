@@ -1,7 +1,13 @@
+import card_catalog
+from metrics import start_interaction, log
+
+
 class CardSelect(Select):
     """Card selection dropdown - FIXED"""
     
-    def __init__(self, options, menu_number):
+    def __init__(self, options=None, menu_number=1):
+        if options is None:
+            options = card_catalog.card_options(menu_number - 1)
         super().__init__(
             placeholder=f"Select a card (Menu {menu_number})",
             options=options,
@@ -12,25 +18,25 @@ class CardSelect(Select):
         self.menu_number = menu_number
     
     async def callback(self, interaction: discord.Interaction):
+        span = start_interaction("card_select")
         # CRITICAL: Defer IMMEDIATELY before any logic
         await interaction.response.defer(ephemeral=True)
+        span.deferred()
         
-        print(f"🔍 Card selected: {self.values[0]}")
+        log.info(f"🔍 Card selected: {self.values[0]}")
         
         try:
-            import registration_modals
+            from session_store import registration_sessions
             
-            if interaction.user.id not in registration_modals.registration_data:
+            session = registration_sessions.get(interaction.user.id)
+            if session is None:
                 await interaction.followup.send(
                     "❌ Registration expired.",
                     ephemeral=True
                 )
                 return
             
-            if 'cards' not in registration_modals.registration_data[interaction.user.id]:
-                registration_modals.registration_data[interaction.user.id]['cards'] = []
-            
-            current_cards = registration_modals.registration_data[interaction.user.id]['cards']
+            current_cards = session['cards']
             selected_card = self.values[0]
             
             # Check if already in deck
@@ -49,25 +55,26 @@ class CardSelect(Select):
                 return
             
             # Check if card is legendary
-            from config import LEGENDARY_CARDS
-            is_legendary = selected_card in LEGENDARY_CARDS
+            is_legendary = card_catalog.is_legendary(selected_card)
             
             # Show level selection
-            await interaction.followup.send(
-                f"✅ Added **{selected_card}** to deck!\n"
-                f"Now select its level:",
-                view=CardLevelSelectView(selected_card, is_legendary),
-                ephemeral=True
-            )
+            with span.phase('rest'):
+                await interaction.followup.send(
+                    f"✅ Added **{selected_card}** to deck!\n"
+                    f"Now select its level:",
+                    view=CardLevelSelectView(selected_card, is_legendary),
+                    ephemeral=True
+                )
             
         except Exception as e:
-            print(f"❌ ERROR: {e}")
-            import traceback
-            traceback.print_exc()
+            span.error()
+            log.exception(f"❌ ERROR: {e}")
             try:
                 await interaction.followup.send(
                     f"❌ An error occurred: {str(e)}",
                     ephemeral=True
                 )
             except:
-                pass
\ No newline at end of file
+                pass
+        finally:
+            span.finish()
\ No newline at end of file
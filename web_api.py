@@ -0,0 +1,315 @@
+"""web_api.py - Public JSON API served from the bot's own event loop (aiohttp)"""
+
+import asyncio
+import hmac
+import json
+import os
+
+from aiohttp import web, ClientError, ClientConnectorError, ClientTimeout
+
+from cluster import cluster
+from event_hub import event_hub, MAX_SSE_CLIENTS, SSE_HEARTBEAT
+from metrics import registry, log
+from registration_intake import registration_intake, IntakeError
+from snapshots import snapshot_store, conditional_response
+
+WEB_API_HOST = os.getenv('WEB_API_HOST', '0.0.0.0')
+WEB_API_PORT = int(os.getenv('WEB_API_PORT', '5001'))
+DASHBOARD_PORT = int(os.getenv('DASHBOARD_PORT', '5000'))
+# Bearer token for /metrics; without one, only direct localhost requests may scrape
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# Pages served by the dashboard site (same origin as its API)
+STATIC_DIR = os.path.dirname(os.path.abspath(__file__))
+DASHBOARD_PAGES = {
+    '/': 'index.html',
+    '/register': 'register.html',
+    '/registration.js': 'registration.js',
+}
+
+RELAY_RETRY = 5.0   # seconds before a dropped cross-cluster event relay reconnects
+PROXY_TIMEOUT = ClientTimeout(total=10)   # one proxied request to another cluster
+
+# Upstream headers kept when proxying to another cluster
+PROXIED_HEADERS = {
+    'ETag', 'Cache-Control', 'Vary', 'X-Snapshot-Version', 'Content-Type', 'Content-Encoding',
+}
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, If-None-Match, Last-Event-ID',
+    'Access-Control-Expose-Headers': 'ETag, X-Snapshot-Version',
+}
+
+
+def _guild_id(request: web.Request) -> int:
+    raw = request.match_info.get('guild_id') or request.query.get('guild_id', '0')
+    try:
+        return int(raw)
+    except ValueError:
+        raise web.HTTPBadRequest(text='guild_id must be a number')
+
+
+async def _proxy(request: web.Request, method: str, owner: int, path: str, **kwargs) -> web.Response:
+    """Forward a request to the cluster process that owns the guild
+
+    An owner that is down or too slow answers 503, a broken upstream reply 502.
+    """
+    url = f'http://127.0.0.1:{WEB_API_PORT + owner}{path}'
+    try:
+        async with request.app['cluster_session'].request(method, url, timeout=PROXY_TIMEOUT,
+                                                          **kwargs) as upstream:
+            body = await upstream.read()
+            passthrough = {k: v for k, v in upstream.headers.items() if k in PROXIED_HEADERS}
+            return web.Response(status=upstream.status, headers=passthrough, body=body)
+    except (ClientConnectorError, asyncio.TimeoutError) as e:
+        log.warning(f"⚠️ Cluster {owner} unavailable for {path}: {e!r}")
+        return web.json_response({'success': False, 'error': 'Service temporarily unavailable'},
+                                 status=503, headers={'Retry-After': '5'})
+    except ClientError as e:
+        log.warning(f"⚠️ Cluster {owner} failed {path}: {e!r}")
+        return web.json_response({'success': False, 'error': 'Bad gateway'}, status=502)
+
+
+async def _proxy_snapshot(request: web.Request, owner: int, guild_id: int, name: str) -> web.Response:
+    """Fetch a snapshot from the cluster process that owns the guild"""
+    headers = {k: request.headers[k] for k in ('If-None-Match', 'Accept-Encoding') if k in request.headers}
+    return await _proxy(request, 'GET', owner, f'/api/snapshot/{guild_id}/{name}', headers=headers)
+
+
+async def _snapshot(request: web.Request, name: str) -> web.Response:
+    if name not in snapshot_store.names:
+        raise web.HTTPNotFound(text=f'Unknown snapshot: {name}')
+    guild_id = _guild_id(request)
+    owner = cluster.cluster_for_guild(guild_id)
+    if owner != cluster.cluster_id:
+        return await _proxy_snapshot(request, owner, guild_id, name)
+    # Only guilds the bot is in get a (cached) snapshot
+    if request.app['bot'].get_guild(guild_id) is None:
+        raise web.HTTPNotFound(text='Unknown guild')
+    snapshot = await snapshot_store.get(guild_id, name)
+    status, headers, body = conditional_response(
+        snapshot,
+        request.headers.get('If-None-Match'),
+        request.headers.get('Accept-Encoding')
+    )
+    return web.Response(status=status, headers=headers, body=body)
+
+
+async def snapshot_handler(request: web.Request) -> web.Response:
+    """GET /api/snapshot/{guild_id}/{name}"""
+    return await _snapshot(request, request.match_info['name'])
+
+
+async def pantheon_handler(request: web.Request) -> web.Response:
+    """GET /api/pantheon?guild_id=... (used by registration.js)"""
+    return await _snapshot(request, 'pantheon')
+
+
+async def communities_handler(request: web.Request) -> web.Response:
+    """GET /api/communities?guild_id=..."""
+    return await _snapshot(request, 'communities')
+
+
+async def register_handler(request: web.Request) -> web.Response:
+    """POST /api/register (browser form); answers before the ticket exists"""
+    try:
+        data = await request.json()
+        guild_id = int(data['guild_id'])
+    except (ValueError, KeyError, TypeError):
+        return web.json_response({'success': False, 'error': 'Invalid registration data'}, status=400)
+
+    owner = cluster.cluster_for_guild(guild_id)
+    if owner != cluster.cluster_id:
+        return await _proxy(request, 'POST', owner, '/api/register', json=data)
+
+    try:
+        result = registration_intake.submit(request.app['bot'], data)
+    except IntakeError as e:
+        return web.json_response({'success': False, 'error': str(e)}, status=e.status)
+    return web.json_response(result, status=202)
+
+
+async def _relay_events(app: web.Application, guild_id: int, owner: int):
+    """Republish the owning cluster's event stream locally while anyone is listening
+
+    One upstream connection per guild, however many browsers are subscribed.
+    """
+    stream = event_hub.stream(guild_id)
+    url = f'http://127.0.0.1:{WEB_API_PORT + owner}/api/events/{guild_id}'
+    timeout = ClientTimeout(total=None, sock_read=SSE_HEARTBEAT * 3)
+    try:
+        while stream.subscribers:
+            try:
+                async with app['cluster_session'].get(url, timeout=timeout) as upstream:
+                    event = None
+                    async for raw in upstream.content:
+                        line = raw.decode('utf-8').rstrip('\r\n')
+                        if line.startswith('event: '):
+                            event = line[7:]
+                        elif line.startswith('data: ') and event:
+                            event_hub.publish(guild_id, event, json.loads(line[6:]))
+                        elif not line:
+                            event = None
+                        if not stream.subscribers:
+                            return
+            except (ClientError, asyncio.TimeoutError, ValueError) as e:
+                log.warning(f"⚠️ Event relay for guild {guild_id} dropped: {e}")
+            await asyncio.sleep(RELAY_RETRY)
+    finally:
+        app['event_relays'].pop(guild_id, None)
+
+
+async def guild_handler(request: web.Request) -> web.Response:
+    """GET /api/guild/{guild_id}: 204 if this deployment serves the guild, else 404"""
+    guild_id = _guild_id(request)
+    owner = cluster.cluster_for_guild(guild_id)
+    if owner != cluster.cluster_id:
+        return await _proxy(request, 'GET', owner, f'/api/guild/{guild_id}')
+    if request.app['bot'].get_guild(guild_id) is None:
+        raise web.HTTPNotFound(text='Unknown guild')
+    return web.Response(status=204)
+
+
+async def _check_served(request: web.Request, guild_id: int, owner: int):
+    """Raise unless the guild is one this deployment serves (asks the owning cluster if needed)"""
+    if owner == cluster.cluster_id:
+        if request.app['bot'].get_guild(guild_id) is None:
+            raise web.HTTPNotFound(text='Unknown guild')
+        return
+    if guild_id in request.app['event_relays']:   # Already checked for the running relay
+        return
+    response = await _proxy(request, 'GET', owner, f'/api/guild/{guild_id}')
+    if response.status == 404:
+        raise web.HTTPNotFound(text='Unknown guild')
+    if response.status != 204:
+        raise web.HTTPServiceUnavailable(text='Live updates unavailable', headers={'Retry-After': '30'})
+
+
+async def events_handler(request: web.Request) -> web.StreamResponse:
+    """GET /api/events/{guild_id} (Server-Sent Events)"""
+    guild_id = _guild_id(request)
+    if event_hub.clients >= MAX_SSE_CLIENTS:
+        raise web.HTTPServiceUnavailable(text='Too many live connections', headers={'Retry-After': '30'})
+    owner = cluster.cluster_for_guild(guild_id)
+    await _check_served(request, guild_id, owner)
+    try:
+        last_event_id = int(request.headers['Last-Event-ID'])
+    except (KeyError, ValueError):
+        last_event_id = None
+
+    response = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+        **CORS_HEADERS,
+    })
+    await response.prepare(request)
+
+    frames = event_hub.frames(guild_id, last_event_id)
+    relays = request.app['event_relays']
+    try:
+        first = await frames.__anext__()   # Registers the subscriber before the relay checks for one
+        if owner != cluster.cluster_id and guild_id not in relays:
+            relays[guild_id] = asyncio.create_task(
+                _relay_events(request.app, guild_id, owner), name=f"event-relay:{guild_id}"
+            )
+        await response.write(first)
+        async for chunk in frames:
+            await response.write(chunk)
+    except ConnectionResetError:
+        pass   # The browser went away
+    finally:
+        await frames.aclose()
+    return response
+
+
+async def dashboard_page(request: web.Request) -> web.FileResponse:
+    """Static dashboard pages (dashboard site only)"""
+    return web.FileResponse(os.path.join(STATIC_DIR, DASHBOARD_PAGES[request.path]))
+
+
+def _metrics_allowed(request: web.Request) -> bool:
+    if METRICS_TOKEN:
+        return hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {METRICS_TOKEN}')
+    # A forwarded request came through a proxy, so its localhost peer says nothing
+    return request.remote in ('127.0.0.1', '::1') and 'X-Forwarded-For' not in request.headers
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    """GET /metrics (Prometheus text format, this process only; localhost or METRICS_TOKEN)"""
+    if not _metrics_allowed(request):
+        raise web.HTTPForbidden(text='Forbidden')
+    return web.Response(
+        text=registry.render(),
+        content_type='text/plain',
+        headers={'Cache-Control': 'no-store'}
+    )
+
+
+@web.middleware
+async def cors_middleware(request: web.Request, handler):
+    if request.path == '/metrics':   # Scrapers only; never readable from a browser page
+        return await handler(request)
+    if request.method == 'OPTIONS':
+        return web.Response(status=204, headers=CORS_HEADERS)
+    try:
+        response = await handler(request)
+    except web.HTTPException as e:
+        response = e
+    if not response.prepared:   # Streams send their own headers up front
+        response.headers.update(CORS_HEADERS)
+    return response
+
+
+async def _cluster_session(app: web.Application):
+    from aiohttp import ClientSession
+    # Bodies are relayed as-is, so leave gzip responses compressed
+    app['cluster_session'] = ClientSession(auto_decompress=False)
+    yield
+    await app['cluster_session'].close()
+
+
+def create_app(bot=None, dashboard: bool = False) -> web.Application:
+    app = web.Application(middlewares=[cors_middleware])
+    app['bot'] = bot
+    app['event_relays'] = {}
+    if cluster.cluster_count > 1:
+        app.cleanup_ctx.append(_cluster_session)
+    app.router.add_get('/api/snapshot/{guild_id}/{name}', snapshot_handler)
+    app.router.add_get('/api/pantheon', pantheon_handler)
+    app.router.add_get('/api/communities', communities_handler)
+    app.router.add_post('/api/register', register_handler)
+    app.router.add_get('/api/events/{guild_id}', events_handler)
+    app.router.add_get('/api/guild/{guild_id}', guild_handler)
+    if dashboard:
+        for path in DASHBOARD_PAGES:
+            app.router.add_get(path, dashboard_page)
+    else:
+        app.router.add_get('/metrics', metrics_handler)
+    return app
+
+
+async def start_web_api(bot, host: str = None, port: int = None) -> web.AppRunner:
+    """Serve the API on the running event loop; returns the runner for cleanup
+
+    The primary cluster serves the public port; other clusters serve their own
+    guilds on WEB_API_PORT + CLUSTER_ID, bound to localhost for the proxy.
+    """
+    if host is None:
+        host = WEB_API_HOST if cluster.is_primary else '127.0.0.1'
+    if port is None:
+        port = WEB_API_PORT + cluster.cluster_id
+    runner = web.AppRunner(create_app(bot), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+async def start_dashboard(bot, host: str = WEB_API_HOST, port: int = DASHBOARD_PORT) -> web.AppRunner:
+    """Serve the dashboard pages plus the same API (and live events) on the bot's event loop"""
+    runner = web.AppRunner(create_app(bot, dashboard=True), access_log=None, shutdown_timeout=1.0)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner